@@ -22,10 +22,18 @@ except ImportError:
         pass
 
 from voice_assistant.audio import record_audio, play_audio
+from voice_assistant.microphone import get_microphone_stream
+from voice_assistant.wake_word import get_wake_word_detector
 from voice_assistant.transcription import transcribe_audio
-from voice_assistant.response_generation import generate_response
-from voice_assistant.text_to_speech import text_to_speech
+from voice_assistant.conversation import ConversationEngine
+from voice_assistant.tts_cache import cached_text_to_speech
+from voice_assistant.response_generation import FALLBACK_RESPONSES, OLLAMA_SYSTEM_PROMPT
+from voice_assistant.memory import ConversationMemory
+from voice_assistant.intents import get_intent_router
+from voice_assistant.backends import log_import_report
+from voice_assistant.tracing import end_turn, start_metrics_server, start_turn
 from voice_assistant.utils import delete_file
+from voice_assistant.warmup import warm_up
 from voice_assistant.config import Config
 
 # Configure logging
@@ -38,6 +46,19 @@ init(autoreset=True)
 WAKE_WORD = "hi windy"
 SLEEP_WORD = "bye windy"
 
+# Fixed phrases, pre-synthesized at startup so they play instantly
+WAKE_GREETING = "Hello! How can I help?"
+GOODBYE_MESSAGE = "Goodbye!"
+
+# System prompt for the cloud models (Ollama uses its own stricter OLLAMA_SYSTEM_PROMPT)
+CHAT_SYSTEM_PROMPT = """You are Windy, a friendly voice assistant. 
+Keep responses natural, conversational, and brief. 
+No special formatting, symbols, or instructions.
+Just be helpful and speak naturally."""
+
+# Recordings are kept in memory; only dump them to disk when debugging
+DEBUG_AUDIO_PATH = Config.INPUT_AUDIO if Config.SAVE_INPUT_AUDIO else None
+
 def detect_wake_word(text):
     """
     Detect if the wake word is present in the transcribed text.
@@ -65,35 +86,19 @@ def detect_wake_word(text):
     
     return False
 
-def detect_sleep_word(text):
+def is_control_command(text):
     """
-    Detect if the sleep word is present in the transcribed text.
+    Detect a sleep command in a partial transcription, so recording can stop as soon as the user says it.
     """
-    if not text:
-        return False
-    
-    text_lower = text.lower().strip()
-    
-    # Check for exact match or close variations - more flexible patterns
-    sleep_patterns = [
-        r'\bbye\s+windy\b',
-        r'\bgoodbye\s+windy\b',
-        r'\bbye\s+wendy\b',  # Common misheard variation
-        r'\bgoodbye\s+wendy\b',
-        r'\bsee\s+you\s+later\s+windy\b',
-        r'\bsleep\s+windy\b',
-        r'\bstop\s+windy\b',
-        r'\bturn\s+off\b',
-        r'\bshut\s+down\b',
-        r'\bgo\s+to\s+sleep\b',
-        r'\bstop\s+listening\b'
-    ]
-    
-    for pattern in sleep_patterns:
-        if re.search(pattern, text_lower):
-            return True
-    
-    return False
+    return get_intent_router().control_action(text, partial=True) is not None
+
+def speak_phrase(text, file_path):
+    """
+    Speak a short fixed phrase outside the conversation pipeline (greetings, timer alarms).
+    """
+    cached_text_to_speech(Config.TTS_MODEL, None, text, file_path, Config.LOCAL_MODEL_PATH)
+    play_audio(file_path)
+    delete_file(file_path)
 
 def wait_for_wake_word():
     """
@@ -104,10 +109,19 @@ def wait_for_wake_word():
     while True:
         try:
             # Record audio with wake word optimized settings
-            record_audio(Config.INPUT_AUDIO, wake_word_mode=True)
-            
-            # Transcribe only for wake word detection (faster processing)
-            wake_text = transcribe_audio(Config.TRANSCRIPTION_MODEL, None, Config.INPUT_AUDIO, Config.LOCAL_MODEL_PATH)
+            detector = get_wake_word_detector()
+            if Config.KEEP_MICROPHONE_OPEN and detector.has_templates:
+                # Spot the keyword on raw frames and only escalate to full transcription on a match
+                wake_audio = detector.listen(get_microphone_stream())
+                if Config.WAKE_WORD_CONFIRM_WITH_ASR:
+                    wake_text = transcribe_audio(Config.TRANSCRIPTION_MODEL, None, wake_audio, Config.LOCAL_MODEL_PATH)
+                else:
+                    wake_text = Config.WAKE_WORD
+            else:
+                wake_audio = record_audio(DEBUG_AUDIO_PATH, wake_word_mode=True)
+                
+                # Transcribe only for wake word detection (faster processing)
+                wake_text = transcribe_audio(Config.TRANSCRIPTION_MODEL, None, wake_audio, Config.LOCAL_MODEL_PATH)
             
             if wake_text:
                 logging.info(Fore.CYAN + f"👂 Heard: {wake_text}" + Fore.RESET)
@@ -116,16 +130,10 @@ def wait_for_wake_word():
                     logging.info(Fore.GREEN + "🎉 Wake word detected! Activating voice assistant..." + Fore.RESET)
                     
                     # Play fast wake up greeting
-                    greeting = "Hello! How can I help?"
-                    text_to_speech(Config.TTS_MODEL, None, greeting, "wake_greeting.wav", Config.LOCAL_MODEL_PATH)
-                    play_audio("wake_greeting.wav")
-                    delete_file("wake_greeting.wav")
+                    speak_phrase(WAKE_GREETING, "wake_greeting.wav")
                     
                     return True  # Wake up
             
-            # Clean up wake word audio file
-            delete_file(Config.INPUT_AUDIO)
-            
         except KeyboardInterrupt:
             logging.info(Fore.RED + "👋 Voice Assistant shutting down..." + Fore.RESET)
             return False
@@ -142,6 +150,26 @@ def main():
     logging.info(Fore.YELLOW + f"💡 Wake word: '{WAKE_WORD}'" + Fore.RESET)
     logging.info(Fore.YELLOW + f"💡 Sleep word: '{SLEEP_WORD}'" + Fore.RESET)
     
+    if Config.METRICS_PORT:
+        start_metrics_server()
+    
+    # Timers set by voice keep running while asleep and announce themselves when done
+    get_intent_router().announce = lambda text: speak_phrase(text, "timer_announcement.wav")
+    
+    # Load Whisper, the LLM and the TTS voice, open the audio devices and synthesize the
+    # canned phrases side by side, so the first conversation is as fast as the tenth
+    warm_up(phrases=[WAKE_GREETING, GOODBYE_MESSAGE] + FALLBACK_RESPONSES)
+    
+    # Only the SDKs of the configured backends are imported - show what startup paid for them
+    log_import_report()
+    
+    # Without enrolled recordings (or an open microphone) sleep mode runs Whisper on every sound
+    if not Config.KEEP_MICROPHONE_OPEN:
+        logging.warning(Fore.YELLOW + "⚠️ Wake word spotting needs KEEP_MICROPHONE_OPEN - sleep mode will transcribe every sound with Whisper" + Fore.RESET)
+    elif not get_wake_word_detector().has_templates:
+        logging.warning(Fore.YELLOW + f"⚠️ No wake word recordings in '{Config.WAKE_WORD_TEMPLATE_DIR}' - sleep mode will transcribe every sound with Whisper. "
+                        "Enroll with: python -m voice_assistant.wake_word" + Fore.RESET)
+    
     while True:
         try:
             # Start in sleep mode - wait for wake word
@@ -163,24 +191,26 @@ def active_conversation():
     """
     Active conversation mode - full voice assistant functionality.
     """
-    chat_history = [
-        {"role": "system", "content": """You are Windy, a friendly voice assistant. 
-        Keep responses natural, conversational, and brief. 
-        No special formatting, symbols, or instructions.
-        Just be helpful and speak naturally."""}
-    ]
+    # One bounded memory per awake session; Ollama gets its stricter prompt instead of a second one
+    if Config.RESPONSE_MODEL == 'ollama':
+        system_prompt = OLLAMA_SYSTEM_PROMPT["content"]
+    else:
+        system_prompt = CHAT_SYSTEM_PROMPT
+    memory = ConversationMemory(system_prompt)
     
     logging.info(Fore.GREEN + "🎤 Voice Assistant active - Start talking! Say 'Bye Windy' to sleep." + Fore.RESET)
     
+    engine = ConversationEngine(debug_audio_path=DEBUG_AUDIO_PATH)
+    router = get_intent_router()
+    
     while True:
+        # Trace every stage of the turn, from listening to the end of the reply
+        start_turn()
+        outcome = "empty"
         try:
-            # Record audio from the microphone with conversation settings
+            # Record and transcribe the next utterance with conversation settings
             logging.info("🎯 Starting conversation recording...")
-            record_audio(Config.INPUT_AUDIO, wake_word_mode=False)
-
-            # Transcribe the audio file
-            logging.info("🔄 Starting transcription...")
-            user_input = transcribe_audio(Config.TRANSCRIPTION_MODEL, None, Config.INPUT_AUDIO, Config.LOCAL_MODEL_PATH)
+            user_input = engine.listen(wake_word_mode=False, stop_when=is_control_command)
             logging.info("✅ Transcription complete")
 
             # Check if the transcription is empty and restart the recording if it is
@@ -190,65 +220,49 @@ def active_conversation():
                 
             logging.info(Fore.GREEN + "You said: " + user_input + Fore.RESET)
 
-            # Check for sleep word to go back to wake word mode
-            if detect_sleep_word(user_input):
-                logging.info(Fore.YELLOW + "😴 Sleep word detected! Going to sleep mode..." + Fore.RESET)
-                
-                # Say fast goodbye
-                goodbye_message = "Goodbye!"
-                text_to_speech(Config.TTS_MODEL, None, goodbye_message, "goodbye.wav", Config.LOCAL_MODEL_PATH)
-                play_audio("goodbye.wav")
-                delete_file("goodbye.wav")
-                
-                # Clean up and return to wake word mode
-                delete_file(Config.INPUT_AUDIO)
-                return
+            # Answer commands and simple questions locally, without the LLM
+            intent = router.route(user_input)
+            if intent is not None:
+                outcome = intent.intent
+                # Check for sleep word to go back to wake word mode
+                if intent.action == 'sleep':
+                    logging.info(Fore.YELLOW + "😴 Sleep word detected! Going to sleep mode..." + Fore.RESET)
+                    
+                    # Say fast goodbye
+                    engine.say(GOODBYE_MESSAGE)
+                    
+                    # Return to wake word mode
+                    return
 
-            # Check if the user wants to exit the program completely
-            if any(word in user_input.lower() for word in ["shutdown", "turn off", "exit program", "quit"]):
-                logging.info(Fore.RED + "👋 Shutdown command received. Exiting..." + Fore.RESET)
-                break
+                # Check if the user wants to exit the program completely
+                if intent.action == 'shutdown':
+                    logging.info(Fore.RED + "👋 Shutdown command received. Exiting..." + Fore.RESET)
+                    break
+
+                if intent.response:
+                    engine.say(intent.response)
+                    router.last_response = intent.response
+                continue
 
             # Append the user's input to the chat history
-            chat_history.append({"role": "user", "content": user_input})
+            outcome = "llm"
+            memory.add("user", user_input)
             
-            # Generate a response
+            # Generate, synthesize and play the reply as an overlapped pipeline
             logging.info("🤖 Generating response...")
-            response_text = generate_response(Config.RESPONSE_MODEL, None, chat_history, Config.LOCAL_MODEL_PATH)
-            logging.info("✅ Response generated")
-            logging.info(Fore.CYAN + "Windy: " + response_text + Fore.RESET)
+            response_text = engine.respond(memory.messages())
+            logging.info("✅ Response complete")
 
             # Append the assistant's response to the chat history
-            chat_history.append({"role": "assistant", "content": response_text})
-
-            # Determine the output file format based on the TTS model
-            if Config.TTS_MODEL == 'openai' or Config.TTS_MODEL == 'elevenlabs' or Config.TTS_MODEL == 'melotts' or Config.TTS_MODEL == 'cartesia':
-                output_file = 'output.mp3'
-            else:
-                output_file = 'output.wav'
-
-            # Convert the response text to speech
-            logging.info("🗣️ Converting to speech...")
-            text_to_speech(Config.TTS_MODEL, None, response_text, output_file, Config.LOCAL_MODEL_PATH)
-            logging.info("✅ Speech conversion complete")
-
-            # Play the generated speech audio
-            logging.info("🔊 Playing response...")
-            if Config.TTS_MODEL != "cartesia":
-                play_audio(output_file)
-            logging.info("✅ Playback complete")
-            
-            # Clean up audio files for this conversation turn
-            delete_file(Config.INPUT_AUDIO)
-            delete_file(output_file)
+            memory.add("assistant", response_text)
+            router.last_response = response_text
 
         except Exception as e:
+            outcome = "error"
             logging.error(Fore.RED + f"An error occurred in conversation: {e}" + Fore.RESET)
-            # Clean up files on error
-            delete_file(Config.INPUT_AUDIO)
-            if 'output_file' in locals():
-                delete_file(output_file)
             time.sleep(1)
+        finally:
+            end_turn(keep=outcome != "empty", outcome=outcome, interrupted=engine.interrupted)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,91 @@
+import threading
+
+from voice_assistant import response_generation
+from voice_assistant.barge_in import BargeInMonitor
+from voice_assistant.config import Config
+from voice_assistant.response_generation import generate_response_stream, get_response_cache
+
+NOISE = 300.0
+FRAME_SECONDS = 0.03
+
+
+class _FakeStream:
+    energy_threshold = NOISE
+    frame_duration = FRAME_SECONDS
+
+    def __init__(self, levels=()):
+        self.levels = levels
+
+    def iter_frames(self, timeout=None):
+        for index, rms in enumerate(self.levels):
+            yield index, b"", rms
+
+
+def _monitor(levels=(), playback_level=0.0):
+    fired = []
+    monitor = BargeInMonitor(_FakeStream(levels), lambda: fired.append(True), min_speech_seconds=0.09,
+                             echo_margin=2.0)
+    monitor._playback_level = lambda: playback_level
+    return monitor, fired
+
+
+def test_silent_playback_keeps_a_margin_above_the_noise_floor():
+    monitor, _ = _monitor(playback_level=0.0)
+    assert not monitor.is_speech(NOISE * 1.5)
+    assert monitor.is_speech(NOISE * 3)
+
+
+def test_loud_playback_raises_the_threshold_to_the_expected_echo():
+    monitor, _ = _monitor(playback_level=0.5)
+    echo = monitor.echo_coupling * 0.5 * 32768
+    assert not monitor.is_speech(echo * 1.5)
+    assert monitor.is_speech(echo * 3)
+
+
+def test_short_bursts_during_silence_do_not_interrupt():
+    monitor, fired = _monitor([100, 2000, 2000, 100, 2000, 100] * 3)
+    monitor._running = True
+    monitor._monitor()
+    assert not fired
+
+
+def test_sustained_speech_interrupts_from_its_first_frame():
+    monitor, fired = _monitor([100, 100, 2000, 2000, 2000, 2000])
+    monitor._running = True
+    monitor._monitor()
+    assert fired == [True]
+    assert monitor.speech_start == 2
+
+
+def test_reply_stops_mid_sentence_when_cancelled(monkeypatch):
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", True)
+    get_response_cache().clear()
+    cancelled = threading.Event()
+    closed = []
+
+    def tokens(chat_history):
+        try:
+            yield "The first sentence is here."
+            for word in " and the second one goes on".split(" "):
+                if word == "second":
+                    cancelled.set()  # Barge-in while the model is still mid-sentence
+                yield word + " "
+            yield "forever."
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(response_generation, "_stream_ollama_response", tokens)
+    history = [{"role": "user", "content": "tell me two things"}]
+    spoken = list(generate_response_stream('ollama', None, history, cancelled=cancelled))
+    assert spoken == ["The first sentence is here."]
+    assert closed == [True]
+    assert get_response_cache().get(response_generation._cache_key('ollama', history)) is None
+
+
+def test_barge_in_needs_a_playback_level(monkeypatch):
+    from voice_assistant.conversation import ConversationEngine
+
+    monkeypatch.setattr(Config, "BARGE_IN_ENABLED", True)
+    monkeypatch.setattr(Config, "KEEP_MICROPHONE_OPEN", True)
+    monkeypatch.setattr(Config, "PLAYBACK_ENGINE", 'pygame')
+    assert not ConversationEngine().barge_in
@@ -0,0 +1,131 @@
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from voice_assistant import clients
+from voice_assistant import text_to_speech as tts
+from voice_assistant.clients import call_with_retries, get_client
+from voice_assistant.config import Config
+
+PCM = b"\x01\x00" * 2400
+
+
+class _FlakyServer(BaseHTTPRequestHandler):
+    """Answers with the queued behaviours in order (a status code, 'hang' or 'ok'), then 'ok'."""
+
+    protocol_version = "HTTP/1.1"
+    script = []
+    attempts = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        type(self).attempts += 1
+        behaviour = self.script.pop(0) if self.script else "ok"
+        if behaviour == "hang":
+            time.sleep(1.0)
+        status, body = (int(behaviour), b"busy") if behaviour.isdigit() else (200, PCM)
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    do_GET = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(Config, "API_TIMEOUT", 0.2)
+    monkeypatch.setattr(Config, "API_MAX_RETRIES", 2)
+    monkeypatch.setattr(Config, "API_RETRY_BACKOFF", 0.01)
+    monkeypatch.setattr(Config, "TTS_CACHE_ENABLED", False)
+    get_client.cache_clear()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyServer)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    _FlakyServer.script, _FlakyServer.attempts = [], 0
+    monkeypatch.setattr(Config, "DEEPGRAM_SPEAK_URL", f"http://127.0.0.1:{httpd.server_port}/v1/speak")
+    yield _FlakyServer
+    httpd.shutdown()
+    httpd.server_close()
+    get_client.cache_clear()
+
+
+def test_session_retries_transient_errors(server):
+    server.script = ["503", "503"]
+    response = get_client('http').post(Config.DEEPGRAM_SPEAK_URL, timeout=Config.API_TIMEOUT)
+    assert response.status_code == 200
+    assert server.attempts == 3
+
+
+def test_session_does_not_repeat_posts_the_server_may_have_started(server):
+    server.script = ["500"]
+    assert get_client('http').post(Config.DEEPGRAM_SPEAK_URL, timeout=Config.API_TIMEOUT).status_code == 500
+    server.script = ["hang"]
+    with pytest.raises(requests.Timeout):
+        get_client('http').post(Config.DEEPGRAM_SPEAK_URL, timeout=Config.API_TIMEOUT)
+    assert server.attempts == 2
+
+
+def test_session_retries_gets_on_server_errors(server):
+    server.script = ["500", "hang"]
+    assert get_client('http').get(Config.DEEPGRAM_SPEAK_URL, timeout=Config.API_TIMEOUT).status_code == 200
+    assert server.attempts == 3
+
+
+def test_deepgram_speech_has_a_single_retry_layer(server, tmp_path):
+    server.script = ["503"] * 10
+    with pytest.raises(requests.RequestException):
+        tts.text_to_speech('deepgram', "key", "Hello.", str(tmp_path / "speech.wav"))
+    assert server.attempts == Config.API_MAX_RETRIES + 1
+
+
+def test_deepgram_speech_times_out(server):
+    server.script = ["hang"] * 10
+    start = time.monotonic()
+    with pytest.raises(requests.RequestException):
+        list(tts.text_to_speech_stream('deepgram', "key", "Hello."))
+    assert time.monotonic() - start < 0.2 * (Config.API_MAX_RETRIES + 1) + 0.5
+
+
+def test_call_with_retries_gives_up_on_permanent_errors(monkeypatch):
+    monkeypatch.setattr(Config, "API_RETRY_BACKOFF", 0.0)
+    calls = []
+
+    def unauthorized():
+        calls.append(1)
+        raise PermissionError("bad key")
+
+    with pytest.raises(PermissionError):
+        call_with_retries(unauthorized)
+    assert len(calls) == 1
+
+
+def test_call_with_retries_retries_timeouts(monkeypatch):
+    monkeypatch.setattr(Config, "API_RETRY_BACKOFF", 0.0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise TimeoutError("slow")
+        return "ok"
+
+    assert call_with_retries(flaky) == "ok"
+    assert len(calls) == 3
+
+
+def test_cartesia_client_gets_the_api_timeout(monkeypatch):
+    created = {}
+    fake_sdk = types.SimpleNamespace(Cartesia=lambda **kwargs: created.update(kwargs))
+    monkeypatch.setattr(clients, "load_backend", lambda name: fake_sdk)
+    clients._build_client('cartesia', "key")
+    assert created == {"api_key": "key", "timeout": Config.API_TIMEOUT}
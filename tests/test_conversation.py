@@ -0,0 +1,66 @@
+import os
+import time
+import types
+
+import pytest
+
+from voice_assistant import conversation
+from voice_assistant.config import Config
+from voice_assistant.conversation import ConversationEngine
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """An engine whose TTS writes small files and whose player records what it played."""
+    monkeypatch.setattr(Config, "TTS_STREAMING", False)
+    monkeypatch.setattr(Config, "BARGE_IN_ENABLED", False)
+    monkeypatch.setattr(Config, "KEEP_MICROPHONE_OPEN", False)
+    state = types.SimpleNamespace(files=[], played=[], failing=set(), on_play=None)
+
+    def synthesize(model, api_key, text, output_file_path, local_model_path=None):
+        if text in state.failing:
+            raise RuntimeError("TTS service unavailable")
+        state.files.append(output_file_path)
+        with open(output_file_path, "w") as output_file:
+            output_file.write(text)
+        return model
+
+    def play(file_path):
+        with open(file_path) as played_file:
+            state.played.append(played_file.read())
+        if state.on_play:
+            state.on_play()
+        now = time.monotonic()
+        return types.SimpleNamespace(started_at=now, finished_at=now)
+
+    monkeypatch.setattr(conversation, "cached_text_to_speech", synthesize)
+    monkeypatch.setattr(conversation, "play_audio", play)
+    state.engine = ConversationEngine(tts_model='piper', sentence_queue_size=1, audio_queue_size=1)
+    return state
+
+
+def test_reply_is_played_in_order(pipeline):
+    spoken = pipeline.engine.say("First.")
+    assert spoken == "First."
+    assert pipeline.engine._run_pipeline(iter(["One.", "Two.", "Three."])) == "One. Two. Three."
+    assert pipeline.played == ["First.", "One.", "Two.", "Three."]
+
+
+def test_sentences_that_failed_to_synthesize_are_not_in_the_reply(pipeline):
+    pipeline.failing.add("Two.")
+    assert pipeline.engine._run_pipeline(iter(["One.", "Two.", "Three."])) == "One. Three."
+
+
+def test_sentences_cut_off_by_barge_in_are_not_in_the_reply(pipeline):
+    pipeline.on_play = pipeline.engine.cancel  # The user interrupts during the first sentence
+    spoken = pipeline.engine._run_pipeline(iter(["One.", "Two.", "Three.", "Four."]))
+    assert spoken == "One."
+    assert pipeline.played == ["One."]
+
+
+def test_audio_files_are_private_temporary_files(pipeline, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pipeline.engine._run_pipeline(iter(["One.", "Two."]))
+    assert os.listdir(tmp_path) == []
+    assert len(set(pipeline.files)) == 2
+    assert not any(os.path.exists(path) for path in pipeline.files)
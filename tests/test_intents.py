@@ -0,0 +1,87 @@
+import re
+
+import pytest
+
+from voice_assistant import intents
+from voice_assistant.intents import IntentRouter
+
+
+@pytest.fixture
+def router(monkeypatch):
+    volume = {"level": 0.5}
+
+    def set_volume(level):
+        volume["level"] = max(0.0, min(1.0, level))
+        return volume["level"]
+
+    monkeypatch.setattr(intents, "get_volume", lambda: volume["level"])
+    monkeypatch.setattr(intents, "set_volume", set_volume)
+    return IntentRouter()
+
+
+def _intent(router, text):
+    matched = router.match(text)
+    return matched[0] if matched else None
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("Bye Windy.", 'sleep'),
+    ("Okay, goodbye Wendy!", 'sleep'),
+    ("Turn off.", 'sleep'),
+    ("Go to sleep, please.", 'sleep'),
+    ("Exit program", 'shutdown'),
+    ("Quit.", 'shutdown'),
+    ("Stop.", 'stop'),
+    ("Never mind", 'stop'),
+    ("Cancel my timers", 'cancel_timer'),
+    ("Set a timer for five minutes", 'timer'),
+    ("Hey Windy, a ten second timer please", 'timer'),
+    ("Volume 40%", 'volume'),
+    ("Turn it up", 'volume'),
+    ("A bit quieter", 'volume'),
+    ("Could you repeat that?", 'repeat'),
+    ("What time is it?", 'time'),
+    ("What's the date today?", 'date'),
+])
+def test_commands_are_recognized(router, text, intent):
+    assert _intent(router, text) == intent
+
+
+@pytest.mark.parametrize("text", [
+    "What date is the Super Bowl?",
+    "I like it quieter at night.",
+    "How do I turn off dark mode?",
+    "I quit smoking last year.",
+    "Tell me about the government shutdown.",
+    "What time is it in Tokyo?",
+    "Can you stop talking about football and tell me a joke instead of that?",
+])
+def test_questions_containing_command_words_go_to_the_llm(router, text):
+    assert router.match(text) is None
+
+
+def test_shutdown_is_never_acted_on_mid_utterance(router):
+    assert router.control_action("quit") == 'shutdown'
+    assert router.control_action("quit", partial=True) is None
+    assert router.control_action("shutdown", partial=True) is None
+
+
+def test_only_named_sleep_phrases_count_mid_utterance(router):
+    assert router.control_action("bye windy", partial=True) == 'sleep'
+    assert router.control_action("turn off", partial=True) is None
+    assert router.control_action("turn off") == 'sleep'
+
+
+def test_time_and_date_answers(router):
+    assert re.fullmatch(r"It's (?:[1-9]|1[0-2]):[0-5]\d [AP]M\.", router.route("what time is it").response)
+    assert re.fullmatch(r"Today is \w+, \w+ [1-9]\d?\.", router.route("todays date").response)
+
+
+def test_timer_parses_number_words(router):
+    result = router.route("set a timer for forty five minutes")
+    assert result.response == "Timer set for 45 minutes."
+    assert router.route("cancel the timer").response == "Timer cancelled."
+
+
+def test_volume_level(router):
+    assert router.route("set the volume to 30 percent").response == "Volume set to 30 percent."
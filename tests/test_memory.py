@@ -0,0 +1,61 @@
+import pytest
+
+from voice_assistant.config import Config
+from voice_assistant.memory import ConversationMemory, estimate_tokens
+
+
+def _converse(memory, turns, words=8):
+    for turn in range(turns):
+        memory.add("user", f"question {turn} " + "word " * words)
+        memory.add("assistant", f"answer {turn} " + "word " * words)
+
+
+@pytest.mark.parametrize("evict_turns", [1, 2, 3])
+@pytest.mark.parametrize("words", [2, 20, 80])
+def test_window_always_starts_with_a_user_turn(monkeypatch, evict_turns, words):
+    monkeypatch.setattr(Config, "CHAT_HISTORY_EVICT_TURNS", evict_turns)
+    memory = ConversationMemory("You are helpful.", context_tokens=600, reply_tokens=100, max_turns=4,
+                                summary_tokens=60)
+    for turn in range(15):
+        memory.add("user", f"question {turn} " + "word " * words)
+        assert memory.messages()[1]["role"] == "user"
+        memory.add("assistant", f"answer {turn} " + "word " * words)
+        assert memory.messages()[1]["role"] == "user"
+
+
+def test_history_starting_with_a_greeting_is_evicted_cleanly():
+    memory = ConversationMemory("You are helpful.", context_tokens=4000, max_turns=2)
+    memory.add("assistant", "Hello! How can I help?")
+    _converse(memory, 5)
+    roles = [message["role"] for message in memory.messages()]
+    assert roles[0] == "system" and roles[1] == "user"
+    assert roles.count("system") == 1
+
+
+def test_prompt_stays_within_the_context_budget():
+    memory = ConversationMemory("You are helpful.", context_tokens=400, reply_tokens=100, max_turns=50,
+                                summary_tokens=40)
+    _converse(memory, 40, words=15)
+    assert memory.token_count() <= 400 - 100
+
+
+def test_evicted_turns_are_summarized():
+    memory = ConversationMemory("You are helpful.", context_tokens=4000, max_turns=2, summary_tokens=200)
+    _converse(memory, 4)
+    system = memory.messages()[0]["content"]
+    assert "Earlier in this conversation:" in system
+    assert "The user said: question 0" in system
+
+
+def test_system_prompt_is_replaced_not_stacked():
+    memory = ConversationMemory("First prompt.")
+    memory.add("system", "Second prompt.")
+    assert memory.messages() == [{"role": "system", "content": "Second prompt."}]
+
+
+def test_oversized_message_keeps_its_end():
+    memory = ConversationMemory("You are helpful.", context_tokens=200, reply_tokens=50, summary_tokens=20)
+    memory.add("user", "start " + "filler " * 500 + "the actual question")
+    content = memory.messages()[1]["content"]
+    assert content.endswith("the actual question")
+    assert estimate_tokens(content) <= memory.history_budget
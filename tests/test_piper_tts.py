@@ -0,0 +1,67 @@
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+from voice_assistant import piper_tts
+from voice_assistant.config import Config
+from voice_assistant.piper_tts import PiperEngine
+
+# Stands in for `piper --json-input`: writes a short WAV per line, or never answers "hang"
+FAKE_PIPER = f"""#!{sys.executable}
+import json, sys, time, wave
+for line in sys.stdin:
+    request = json.loads(line)
+    if request["text"] == "hang":
+        time.sleep(60)
+    with wave.open(request["output_file"], "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(22050)
+        output.writeframes(b"\\x01\\x00" * 220)
+    print(request["output_file"], flush=True)
+"""
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    executable = tmp_path / "piper"
+    executable.write_text(FAKE_PIPER)
+    executable.chmod(executable.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(piper_tts, "find_piper_executable", lambda: str(executable))
+    monkeypatch.setattr(piper_tts, "backend_available", lambda name: False)
+    monkeypatch.setattr(Config, "PIPER_SYNTHESIS_TIMEOUT", 0.5)
+    engine = PiperEngine(model_path=str(tmp_path / "missing.onnx"))
+    yield engine
+    engine.close()
+
+
+def test_sentences_share_one_process(engine):
+    assert len(engine.synthesize("One.")) == 440
+    process = engine._process
+    assert len(engine.synthesize("Two.")) == 440
+    assert engine._process is process
+
+
+def test_hung_process_is_restarted(engine):
+    engine.synthesize("One.")
+    hung = engine._process
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        engine.synthesize("hang")
+    assert time.monotonic() - start < 2.0
+    assert hung.poll() is not None
+    assert len(engine.synthesize("Two.")) == 440
+
+
+def test_scratch_directory_is_reused_and_removed(engine):
+    engine.synthesize("One.")
+    output_dir = engine._output_dir
+    engine._process.kill()
+    engine._process.wait()
+    engine.synthesize("Two.")  # Restarts the process that died
+    assert engine._output_dir == output_dir
+    engine.close()
+    assert not os.path.exists(output_dir)
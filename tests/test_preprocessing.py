@@ -0,0 +1,49 @@
+import numpy as np
+
+from voice_assistant.audio_buffer import AudioBuffer, TARGET_SAMPLE_RATE
+from voice_assistant.preprocessing import normalize_gain, preprocess_audio, trim_silence
+
+
+def _tone(seconds, frequency=220.0, amplitude=0.3, sample_rate=TARGET_SAMPLE_RATE):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def _speech(seconds):
+    """Voiced sound with a syllable-rate loudness swing, but no quiet stretch anywhere."""
+    t = np.arange(int(seconds * TARGET_SAMPLE_RATE)) / TARGET_SAMPLE_RATE
+    envelope = 0.8 + 0.2 * np.sin(2 * np.pi * 4 * t)
+    return (_tone(seconds) * envelope).astype(np.float32)
+
+
+def test_speech_from_start_to_end_is_kept():
+    samples = _speech(0.8)
+    trimmed = trim_silence(samples, padding_seconds=0.0)
+    assert len(trimmed) > 0.8 * len(samples)
+
+
+def test_surrounding_silence_is_trimmed():
+    silence = np.zeros(TARGET_SAMPLE_RATE, dtype=np.float32)
+    samples = np.concatenate([silence, _speech(0.5), silence])
+    trimmed = trim_silence(samples, padding_seconds=0.1)
+    assert 0.5 * TARGET_SAMPLE_RATE <= len(trimmed) <= 0.75 * TARGET_SAMPLE_RATE
+
+
+def test_silent_recording_becomes_empty():
+    samples = np.random.default_rng(0).normal(0, 1e-4, TARGET_SAMPLE_RATE).astype(np.float32)
+    assert len(trim_silence(samples)) == 0
+    assert len(preprocess_audio(AudioBuffer.from_float32(samples))) == 0
+
+
+def test_gain_boost_is_capped():
+    quiet = _tone(0.1, amplitude=0.001)
+    assert np.max(np.abs(normalize_gain(quiet, target_peak_dbfs=-3.0, max_gain_db=20.0))) <= 0.0101
+
+
+def test_downsampling_filters_out_content_above_nyquist():
+    source_rate = 48000
+    wanted = AudioBuffer.from_float32(_tone(0.5, frequency=1000.0, sample_rate=source_rate), sample_rate=source_rate)
+    # 20 kHz would fold back to 4 kHz at 16 kHz without an anti-aliasing filter
+    unwanted = AudioBuffer.from_float32(_tone(0.5, frequency=20000.0, sample_rate=source_rate), sample_rate=source_rate)
+    assert np.sqrt(np.mean(wanted.to_float32() ** 2)) > 0.2
+    assert np.sqrt(np.mean(unwanted.to_float32() ** 2)) < 0.01
@@ -0,0 +1,95 @@
+import time
+import types
+
+from voice_assistant import response_generation
+from voice_assistant.config import Config
+from voice_assistant.response_generation import ResponseCache
+
+
+def _key(question, model='ollama', history=None):
+    messages = (history or []) + [{"role": "user", "content": question}]
+    return ResponseCache.lookup_key(model, messages)
+
+
+def _cache(**kwargs):
+    kwargs.setdefault("max_entries", 16)
+    kwargs.setdefault("ttl", 60)
+    return ResponseCache(**kwargs)
+
+
+def test_exact_match_ignores_case_and_punctuation():
+    cache = _cache()
+    cache.put(_key("What's the capital of France?"), ["Paris."])
+    assert cache.get(_key("whats the capital of france")) == ["Paris."]
+
+
+def test_exact_match_is_the_default():
+    cache = ResponseCache(max_entries=16, ttl=60)
+    assert not cache.similarity
+    cache.put(_key("what is the capital of france"), ["Paris."])
+    assert cache.get(_key("tell me the capital of france")) is None
+
+
+def test_similar_spelling_with_different_meaning_is_a_miss():
+    cache = _cache(similarity=0.9)
+    for question in ("capital of austria", "tell me about india", "capital of nigeria"):
+        cache.put(_key(question), ["cached"])
+    assert cache.get(_key("capital of australia")) is None
+    assert cache.get(_key("tell me about indiana")) is None
+    assert cache.get(_key("capital of niger")) is None
+
+
+def test_numbers_must_match():
+    cache = _cache(similarity=0.5)
+    cache.put(_key("what is 2 plus 3"), ["5."])
+    assert cache.get(_key("what is 2 plus 4")) is None
+
+
+def test_rephrasing_hits_when_fuzzy_matching_is_enabled():
+    cache = _cache(similarity=0.8)
+    cache.put(_key("what is the capital of france"), ["Paris."])
+    assert cache.get(_key("whats the capital of france")) == ["Paris."]
+
+
+def test_scope_separates_models_and_context():
+    cache = _cache()
+    cache.put(_key("why is that", history=[{"role": "assistant", "content": "The sky is blue."}]), ["Scattering."])
+    assert cache.get(_key("why is that", history=[{"role": "assistant", "content": "Grass is green."}])) is None
+    cache.put(_key("hello", model='ollama'), ["Hi!"])
+    assert cache.get(_key("hello", model='openai')) is None
+
+
+def test_entries_expire_and_are_evicted_lru():
+    cache = _cache(max_entries=2, ttl=60)
+    cache.put(_key("one"), ["1"])
+    cache.put(_key("two"), ["2"])
+    cache.get(_key("one"))
+    cache.put(_key("three"), ["3"])
+    assert cache.get(_key("two")) is None
+    assert cache.get(_key("one")) == ["1"]
+
+    cache.ttl = 0.01
+    time.sleep(0.02)
+    assert cache.get(_key("one")) is None
+
+
+def test_no_key_without_a_user_question():
+    assert ResponseCache.lookup_key('ollama', []) is None
+    assert ResponseCache.lookup_key('ollama', [{"role": "assistant", "content": "Hi"}]) is None
+
+
+def test_explicit_zero_limits_are_kept():
+    cache = ResponseCache(max_entries=0, ttl=0)
+    assert (cache.max_entries, cache.ttl) == (0, 0)
+    cache.put(_key("hello"), ["Hi!"])
+    assert cache.get(_key("hello")) is None
+
+
+def test_keep_alive_reaches_ollama_unchanged(monkeypatch):
+    requests = []
+    fake_ollama = types.SimpleNamespace(chat=lambda **kwargs: requests.append(kwargs) or {"message": {"content": "Hi"}})
+    monkeypatch.setattr(response_generation, "load_backend", lambda name: fake_ollama)
+    monkeypatch.setattr(Config, "OLLAMA_KEEP_ALIVE", -1)
+    assert response_generation.warm_up_ollama()
+    response_generation._generate_ollama_response([{"role": "user", "content": "hello"}])
+    assert [request["keep_alive"] for request in requests] == [-1, -1]
@@ -0,0 +1,45 @@
+import pytest
+
+from voice_assistant.config import Config
+from voice_assistant.response_generation import _SENTENCE_END, _clean_sentences, _split_sentences
+
+
+def _tokens(text):
+    # LLMs stream words with their leading space, the way the pipeline receives them
+    words = text.split(" ")
+    return iter([words[0]] + [" " + word for word in words[1:]])
+
+
+@pytest.mark.parametrize("text, sentences", [
+    ("Dr. Who is a show. It started in 1963.", ["Dr. Who is a show.", "It started in 1963."]),
+    ("Mr. Smith went home. He slept.", ["Mr. Smith went home.", "He slept."]),
+    ("Bring a tool, e.g. a hammer. Then start.", ["Bring a tool, e.g. a hammer.", "Then start."]),
+    ("J. R. R. Tolkien wrote it. Read it soon.", ["J. R. R. Tolkien wrote it.", "Read it soon."]),
+    ("Pi is about 3.14 in value. Isn't it neat? Yes it is!", ["Pi is about 3.14 in value.", "Isn't it neat?", "Yes it is!"]),
+])
+def test_split_sentences(text, sentences):
+    assert list(_split_sentences(_tokens(text))) == sentences
+
+
+def test_short_fragments_join_the_next_sentence():
+    assert list(_split_sentences(_tokens("Yes. The capital is Paris."))) == ["Yes. The capital is Paris."]
+
+
+def test_unterminated_tail_is_flushed():
+    assert list(_split_sentences(_tokens("First one here. And then"))) == ["First one here.", "And then"]
+
+
+def test_sentence_end_needs_whitespace():
+    assert _SENTENCE_END.split("Version 2.5 shipped.") == ["Version 2.5 shipped."]
+
+
+def test_clean_sentences_strips_markdown_and_terminates(monkeypatch):
+    monkeypatch.setattr(Config, "MAX_RESPONSE_WORDS", 100)
+    assert list(_clean_sentences(_tokens("It is **very** hot today. Drink water"))) == [
+        "It is very hot today.", "Drink water."]
+
+
+def test_clean_sentences_stops_at_word_limit(monkeypatch):
+    monkeypatch.setattr(Config, "MAX_RESPONSE_WORDS", 6)
+    assert list(_clean_sentences(_tokens("One two three four. Five six seven eight. Nine ten."))) == [
+        "One two three four.", "Five six."]
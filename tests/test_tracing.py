@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from voice_assistant import tracing
+from voice_assistant.config import Config
+from voice_assistant.tracing import end_turn, record_span, start_turn, trace_event
+
+
+@pytest.fixture
+def trace_log(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(Config, "TRACING_ENABLED", True)
+    monkeypatch.setattr(Config, "TRACE_LOG_PATH", str(path))
+    monkeypatch.setattr(Config, "TRACE_LOG_MAX_MB", None)
+    monkeypatch.setattr(tracing, "metrics", tracing.LatencyMetrics())
+    return path
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+def test_turn_is_logged_with_derived_latencies(trace_log):
+    turn = start_turn()
+    trace_event("vad_end", at=turn.started_at + 1.0)
+    trace_event("llm_first_token", at=turn.started_at + 1.25)
+    trace_event("playback_start", at=turn.started_at + 1.5)
+    record_span("tts", turn.started_at + 1.3, turn.started_at + 1.4)
+    end_turn(outcome="llm")
+
+    [logged] = _lines(trace_log)
+    assert logged["attributes"] == {"outcome": "llm"}
+    assert logged["events"]["response_latency"] == pytest.approx(0.5)
+    assert logged["events"]["time_to_first_token"] == pytest.approx(0.25)
+    assert [span["name"] for span in logged["spans"]] == ["tts"]
+    assert tracing.metrics.turns == 1
+
+
+def test_empty_listens_are_not_logged(trace_log):
+    start_turn()
+    assert end_turn(keep=False, outcome="empty") is None
+    assert _lines(trace_log) == []
+    assert tracing.metrics.turns == 0
+
+
+def test_log_rotates_past_its_size_cap(trace_log, monkeypatch):
+    monkeypatch.setattr(Config, "TRACE_LOG_MAX_MB", 0.001)  # About 1 KB
+    for turn in range(20):
+        start_turn(index=turn)
+        end_turn()
+
+    rotated = trace_log.with_name(trace_log.name + ".1")
+    assert rotated.exists()
+    assert trace_log.stat().st_size < 2048
+    assert _lines(trace_log)[-1]["attributes"]["index"] == 19
+
+
+def test_nothing_is_recorded_when_disabled(trace_log, monkeypatch):
+    monkeypatch.setattr(Config, "TRACING_ENABLED", False)
+    assert start_turn() is None
+    assert end_turn() is None
+    assert _lines(trace_log) == []
@@ -0,0 +1,128 @@
+import os
+
+import numpy as np
+import pytest
+
+from voice_assistant import tts_cache
+from voice_assistant.audio_buffer import AudioBuffer
+from voice_assistant.config import Config
+from voice_assistant.tts_cache import (TTSCache, cached_speech_stream, cached_text_to_speech, get_tts_cache,
+                                       prewarm_tts_cache)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "TTS_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "TTS_CACHE_DIR", str(tmp_path / "tts_cache"))
+    get_tts_cache.cache_clear()
+    yield tmp_path
+    get_tts_cache.cache_clear()
+
+
+def _speech(text):
+    return AudioBuffer(np.full(len(text) * 100, 1000, dtype=np.int16).tobytes(), 22050)
+
+
+def _fake_text_to_speech(engine, calls):
+    def text_to_speech(model, api_key, text, output_file_path, local_model_path=None):
+        calls.append(text)
+        with open(output_file_path, "wb") as output_file:
+            output_file.write(_speech(text).to_wav_bytes())
+        return engine
+    return text_to_speech
+
+
+def _fake_stream(engine, calls):
+    def text_to_speech_stream(model, api_key, text):
+        calls.append(text)
+        yield _speech(text)
+        return engine
+    return text_to_speech_stream
+
+
+def test_key_depends_on_engine_voice_and_text():
+    key = TTSCache.key('piper', 'amy', "Hello.")
+    assert key == TTSCache.key('piper', 'amy', "Hello.")
+    assert len({key, TTSCache.key('openai', 'amy', "Hello."), TTSCache.key('piper', 'ryan', "Hello."),
+                TTSCache.key('piper', 'amy', "Hello!")}) == 4
+
+
+def test_memory_lru_and_disk_store(cache_dir):
+    cache = TTSCache(str(cache_dir / "store"), max_memory_entries=1, max_disk_mb=1)
+    cache.put("a", b"first")
+    cache.put("b", b"second")
+    assert list(cache._memory) == ["b"]
+    assert cache.get("a") == b"first"  # Read back from disk
+
+
+def test_disk_store_is_trimmed_oldest_first(cache_dir):
+    cache = TTSCache(str(cache_dir / "store"), max_memory_entries=1, max_disk_mb=0.001)
+    cache.put("old", b"x" * 600)
+    cache.put("new", b"y" * 600)
+    cache._memory.clear()
+    assert cache.get("old") is None
+    assert cache.get("new") == b"y" * 600
+
+
+def test_disk_store_is_only_scanned_when_over_budget(cache_dir, monkeypatch):
+    cache = TTSCache(str(cache_dir / "store"), max_memory_entries=1, max_disk_mb=0.001)
+    scans = []
+    monkeypatch.setattr(cache, "_evict_disk", lambda: scans.append(cache._disk_bytes))
+    cache.put("a", b"x" * 400)
+    cache.put("a", b"x" * 500)  # Replacing an entry only counts the difference
+    cache.put("b", b"y" * 400)
+    assert scans == []
+    cache.put("c", b"z" * 200)
+    assert scans == [1100]
+
+
+def test_file_synthesis_is_cached(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(tts_cache, "text_to_speech", _fake_text_to_speech('piper', calls))
+    output = str(tmp_path / "out.wav")
+    assert cached_text_to_speech('piper', None, "Hello there.", output) == 'piper'
+    assert cached_text_to_speech('piper', None, "Hello there.", output) == 'piper'
+    assert calls == ["Hello there."]
+
+
+def test_fallback_audio_is_not_cached(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(tts_cache, "text_to_speech", _fake_text_to_speech('espeak', calls))
+    output = str(tmp_path / "out.wav")
+    assert cached_text_to_speech('piper', None, "Hello there.", output) == 'espeak'
+    cached_text_to_speech('piper', None, "Hello there.", output)
+    assert calls == ["Hello there.", "Hello there."]
+
+
+def test_local_placeholder_is_not_cached(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(tts_cache, "text_to_speech", _fake_text_to_speech('local', calls))
+    output = str(tmp_path / "out.wav")
+    cached_text_to_speech('local', None, "Hello there.", output)
+    cached_text_to_speech('local', None, "Hello there.", output)
+    assert len(calls) == 2
+
+
+def test_stream_is_cached_and_replayed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tts_cache, "text_to_speech_stream", _fake_stream('piper', calls))
+    first = list(cached_speech_stream('piper', None, "Hello there."))
+    second = list(cached_speech_stream('piper', None, "Hello there."))
+    assert calls == ["Hello there."]
+    assert second[0].pcm == first[0].pcm
+
+
+def test_fallback_stream_is_not_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tts_cache, "text_to_speech_stream", _fake_stream('espeak', calls))
+    list(cached_speech_stream('piper', None, "Hello there."))
+    list(cached_speech_stream('piper', None, "Hello there."))
+    assert len(calls) == 2
+
+
+def test_prewarm_leaves_only_cache_entries(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tts_cache, "text_to_speech", _fake_text_to_speech('piper', calls))
+    prewarm_tts_cache(["Hello there.", "Goodbye."], model='piper')
+    assert calls == ["Hello there.", "Goodbye."]
+    assert all(name.endswith(".audio") for name in os.listdir(get_tts_cache().cache_dir))
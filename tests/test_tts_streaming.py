@@ -0,0 +1,122 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pytest
+
+from voice_assistant import text_to_speech as tts
+from voice_assistant.audio_buffer import AudioBuffer
+from voice_assistant.config import Config
+from voice_assistant.tts_cache import cached_speech_stream, get_tts_cache
+
+PCM = (np.sin(np.arange(24000) / 10.0) * 10000).astype("<i2").tobytes()  # 1 s at 24 kHz
+PIECE_BYTES = 1001  # Odd, so network reads split samples
+PIECE_DELAY = 0.01
+
+
+class _DribblingSpeakServer(BaseHTTPRequestHandler):
+    """Answers every POST with PCM sent in small chunked pieces, like a streaming TTS API."""
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.requests.append((self.path, self.headers["Authorization"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/l16")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for start in range(0, len(PCM), PIECE_BYTES):
+                piece = PCM[start:start + PIECE_BYTES]
+                self.wfile.write(f"{len(piece):x}\r\n".encode() + piece + b"\r\n")
+                self.wfile.flush()
+                time.sleep(PIECE_DELAY)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped listening (barge-in)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def speak_server(tmp_path, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _DribblingSpeakServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _DribblingSpeakServer.requests = []
+    monkeypatch.setattr(Config, "DEEPGRAM_SPEAK_URL", f"http://127.0.0.1:{server.server_port}/v1/speak")
+    monkeypatch.setattr(Config, "DEEPGRAM_API_KEY", "test-key")
+    monkeypatch.setattr(Config, "TTS_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "TTS_CACHE_DIR", str(tmp_path / "tts_cache"))
+    get_tts_cache.cache_clear()
+    yield _DribblingSpeakServer.requests
+    get_tts_cache.cache_clear()
+    server.shutdown()
+    server.server_close()
+
+
+def test_chunks_play_before_the_reply_finishes(speak_server):
+    start = time.monotonic()
+    arrivals, chunks = [], []
+    for chunk in tts.text_to_speech_stream('deepgram', None, "Hello there."):
+        arrivals.append(time.monotonic() - start)
+        chunks.append(chunk)
+
+    assert b"".join(chunk.pcm for chunk in chunks) == PCM
+    assert len(chunks) > 1
+    assert all(len(chunk.pcm) % 2 == 0 for chunk in chunks)
+    assert {chunk.sample_rate for chunk in chunks} == {tts.DEEPGRAM_PCM_SAMPLE_RATE}
+    # The whole reply takes about half a second to arrive; the first chunk must not wait for it
+    assert arrivals[0] < arrivals[-1] / 2
+
+
+def test_request_asks_for_raw_pcm(speak_server):
+    list(tts.text_to_speech_stream('deepgram', None, "Hello there."))
+    path, authorization = speak_server[0]
+    params = parse_qs(urlparse(path).query)
+    assert params["encoding"] == ["linear16"]
+    assert params["container"] == ["none"]
+    assert authorization == "Token test-key"
+
+
+def test_file_output_is_wav(speak_server, tmp_path):
+    output = str(tmp_path / "speech.wav")
+    assert tts.text_to_speech('deepgram', None, "Hello there.", output) == 'deepgram'
+    assert AudioBuffer.from_wav_file(output).pcm == PCM
+
+
+def test_complete_stream_is_cached(speak_server):
+    list(cached_speech_stream('deepgram', None, "Cache me."))
+    replay = list(cached_speech_stream('deepgram', None, "Cache me."))
+    assert len(speak_server) == 1
+    assert b"".join(chunk.pcm for chunk in replay) == PCM
+
+
+def test_interrupted_stream_is_not_cached(speak_server):
+    stream = cached_speech_stream('deepgram', None, "Interrupted.")
+    next(stream)
+    stream.close()
+    list(cached_speech_stream('deepgram', None, "Interrupted."))
+    assert len(speak_server) == 2
+
+
+def test_piper_stream_falls_back_to_espeak(monkeypatch):
+    class BrokenVoice:
+        def synthesize(self, text):
+            raise RuntimeError("voice crashed")
+
+    def fake_espeak(text, output_file_path):
+        with open(output_file_path, "wb") as output_file:
+            output_file.write(AudioBuffer(PCM[:4800], 22050).to_wav_bytes())
+
+    monkeypatch.setattr(tts, "_resident_piper", lambda: BrokenVoice())
+    monkeypatch.setattr(tts, "_espeak_to_file", fake_espeak)
+    stream = tts.text_to_speech_stream('piper', None, "Hello there.")
+    assert next(stream).pcm == PCM[:4800]
+    with pytest.raises(StopIteration) as stop:
+        next(stream)
+    assert stop.value.value == 'espeak'
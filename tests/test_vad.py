@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from voice_assistant.audio_buffer import TARGET_SAMPLE_RATE
+from voice_assistant.config import Config
+from voice_assistant.vad import VoiceActivityDetector
+
+FRAME_SECONDS = 0.03
+NOISE_FLOOR = 100.0
+
+
+def _frame(samples):
+    pcm = np.clip(samples, -32768, 32767).astype("<i2")
+    rms = float(np.sqrt(np.mean(pcm.astype(np.float64) ** 2)))
+    return pcm.tobytes(), rms
+
+
+def _voiced(amplitude=4000):
+    t = np.arange(int(FRAME_SECONDS * TARGET_SAMPLE_RATE)) / TARGET_SAMPLE_RATE
+    return _frame(sum(amplitude / k * np.sin(2 * np.pi * 180 * k * t) for k in range(1, 8)))
+
+
+def _white_noise(amplitude=4000, seed=0):
+    return _frame(np.random.default_rng(seed).normal(0, amplitude, int(FRAME_SECONDS * TARGET_SAMPLE_RATE)))
+
+
+@pytest.fixture
+def vad(monkeypatch):
+    monkeypatch.setattr(Config, "VAD_HANGOVER_SECONDS", 0.12)
+    return VoiceActivityDetector(backend='numpy')
+
+
+def test_voiced_frames_are_speech(vad):
+    pcm, rms = _voiced()
+    assert vad.is_speech(pcm, rms, NOISE_FLOOR, FRAME_SECONDS)
+
+
+def test_flat_noise_is_not_speech(vad):
+    pcm, rms = _white_noise()
+    assert not vad.is_speech(pcm, rms, NOISE_FLOOR, FRAME_SECONDS)
+
+
+def test_frames_close_to_the_noise_floor_are_not_speech(vad):
+    pcm, rms = _voiced()
+    assert not vad.is_speech(pcm, rms, noise_floor=rms, frame_duration=FRAME_SECONDS)
+
+
+def test_hangover_bridges_short_gaps(vad):
+    voiced = _voiced()
+    silence = _frame(np.zeros(int(FRAME_SECONDS * TARGET_SAMPLE_RATE)))
+    assert vad.is_speech(*voiced, NOISE_FLOOR, FRAME_SECONDS)
+    decisions = [vad.is_speech(*silence, NOISE_FLOOR, FRAME_SECONDS) for _ in range(6)]
+    assert decisions == [True] * 4 + [False] * 2
+
+    vad.is_speech(*voiced, NOISE_FLOOR, FRAME_SECONDS)
+    vad.reset()
+    assert not vad.is_speech(*silence, NOISE_FLOOR, FRAME_SECONDS)
+
+
+def test_endpoint_silence_shrinks_as_the_phrase_gets_longer(monkeypatch):
+    monkeypatch.setattr(Config, "VAD_MIN_ENDPOINT_SILENCE", 0.4)
+    monkeypatch.setattr(Config, "VAD_COMPLETE_PHRASE_SECONDS", 1.0)
+    endpoint = VoiceActivityDetector.endpoint_silence
+    assert endpoint(0.0, 1.2) == pytest.approx(1.2)
+    assert endpoint(0.5, 1.2) == pytest.approx(0.8)
+    assert endpoint(1.0, 1.2) == pytest.approx(0.4)
+    assert endpoint(5.0, 1.2) == pytest.approx(0.4)
+
+
+def test_endpoint_silence_never_exceeds_the_configured_pause(monkeypatch):
+    monkeypatch.setattr(Config, "VAD_MIN_ENDPOINT_SILENCE", 0.4)
+    assert VoiceActivityDetector.endpoint_silence(2.0, 0.3) == pytest.approx(0.3)
@@ -0,0 +1,66 @@
+import numpy as np
+
+from voice_assistant.audio_buffer import AudioBuffer, TARGET_SAMPLE_RATE
+from voice_assistant.wake_word import WakeWordDetector, mfcc_features, subsequence_dtw
+
+
+def _word(pitches, syllable_seconds=0.15):
+    """A voiced "word": one harmonic-rich syllable per pitch, each with a smooth envelope."""
+    t = np.arange(int(syllable_seconds * TARGET_SAMPLE_RATE)) / TARGET_SAMPLE_RATE
+    envelope = np.hanning(len(t))
+    syllables = [sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6)) * envelope for pitch in pitches]
+    return (0.3 * np.concatenate(syllables)).astype(np.float32)
+
+
+def _in_noise(samples, seed=0, padding_seconds=0.4):
+    noise = np.random.default_rng(seed).normal(0, 0.003, int(padding_seconds * TARGET_SAMPLE_RATE))
+    return np.concatenate([noise, samples + np.random.default_rng(seed + 1).normal(0, 0.003, len(samples)), noise]).astype(np.float32)
+
+
+WAKE = [220, 330, 550]
+OTHER = [600, 180, 420]
+
+
+def test_identical_sequences_match_perfectly():
+    features = mfcc_features(_word(WAKE))
+    assert subsequence_dtw(features, features) < 1e-5
+
+
+def test_match_is_found_anywhere_in_the_window():
+    template = mfcc_features(_word(WAKE))
+    window = mfcc_features(_in_noise(_word(WAKE)))
+    assert subsequence_dtw(template, window) < subsequence_dtw(template, mfcc_features(_in_noise(_word(OTHER))))
+
+
+def test_slower_speech_still_matches():
+    template = mfcc_features(_word(WAKE))
+    slower = mfcc_features(_in_noise(_word(WAKE, syllable_seconds=0.19)))
+    other = mfcc_features(_in_noise(_word(OTHER)))
+    assert subsequence_dtw(template, slower) < subsequence_dtw(template, other)
+
+
+def test_too_short_inputs_never_match():
+    features = mfcc_features(_word(WAKE))
+    assert subsequence_dtw(features[:1], features) == float('inf')
+    assert mfcc_features(np.zeros(100, dtype=np.float32)).shape == (0, 12)
+
+
+def test_detector_uses_enrolled_templates(tmp_path):
+    for take in range(2):
+        audio = AudioBuffer.from_float32(_in_noise(_word(WAKE), seed=take * 10, padding_seconds=0.2))
+        (tmp_path / f"take_{take}.wav").write_bytes(audio.to_wav_bytes())
+
+    detector = WakeWordDetector(template_dir=str(tmp_path))
+    assert detector.has_templates
+    wake_score = detector.score(_in_noise(_word(WAKE), seed=42))
+    other_score = detector.score(_in_noise(_word(OTHER), seed=42))
+    assert wake_score < other_score
+    detector.threshold = (wake_score + other_score) / 2
+    assert detector.detect(_in_noise(_word(WAKE), seed=42))
+    assert not detector.detect(_in_noise(_word(OTHER), seed=42))
+
+
+def test_detector_without_templates_never_fires(tmp_path):
+    detector = WakeWordDetector(template_dir=str(tmp_path))
+    assert not detector.has_templates
+    assert not detector.detect(_word(WAKE))
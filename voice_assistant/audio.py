@@ -1,17 +1,25 @@
 # voice_assistant/audio.py
 
+import os
+import tempfile
 import speech_recognition as sr
-import pygame
 import time
 import logging
-import pydub
-from io import BytesIO
-from pydub import AudioSegment
 from functools import lru_cache
 
+from voice_assistant.audio_buffer import AudioBuffer, TARGET_SAMPLE_RATE
+from voice_assistant.backends import load_backend
+from voice_assistant.config import Config
+from voice_assistant.microphone import get_microphone_stream
+from voice_assistant.playback import SOUNDDEVICE_AVAILABLE, get_playback_engine
+from voice_assistant.tracing import record_span, trace_event, trace_span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Playback volume shared by the stream engine and pygame (changed by voice commands)
+_volume = Config.PLAYBACK_VOLUME
+
 @lru_cache(maxsize=None)
 def get_recognizer():
     """
@@ -19,14 +27,15 @@ def get_recognizer():
     """
     return sr.Recognizer()
 
-def record_audio(file_path, timeout=15, phrase_time_limit=10, retries=3, energy_threshold=1000, 
+def record_audio(file_path=None, timeout=15, phrase_time_limit=10, retries=3, energy_threshold=1000, 
                  pause_threshold=1.5, phrase_threshold=0.1, dynamic_energy_threshold=True, 
-                 calibration_duration=1, wake_word_mode=False, use_fallback=True):
+                 calibration_duration=1, wake_word_mode=False, use_fallback=True, start_index=None,
+                 on_speech=None):
     """
-    Record audio from the microphone and save it as a WAV file.
+    Record audio from the microphone into memory.
     
     Args:
-    file_path (str): The path to save the recorded audio file.
+    file_path (str): Optional path to also dump the recording as a WAV file for debugging.
     timeout (int): Maximum time to wait for a phrase to start (in seconds).
     phrase_time_limit (int): Maximum time for the recorded phrase (in seconds).
     retries (int): Number of retry attempts if recording fails.
@@ -36,11 +45,18 @@ def record_audio(file_path, timeout=15, phrase_time_limit=10, retries=3, energy_
     dynamic_energy_threshold (bool): Automatically adjust energy threshold.
     calibration_duration (int): Duration for ambient noise calibration (in seconds).
     wake_word_mode (bool): If True, use optimized settings for wake word detection.
+    use_fallback (bool): If True, try arecord/sox/manual recording when the microphone fails.
+    start_index (int): With the always-open stream, start from this buffered frame
+        (e.g. where the user barged in) instead of from now, plus pre-roll.
+    on_speech (callable): With the always-open stream, receives utterance PCM while it is
+        captured (see MicrophoneStream.listen); returning True ends the recording early.
+
+    Returns:
+    AudioBuffer: 16 kHz mono 16-bit PCM audio.
     """
     
     # Adjust settings for wake word mode
     if wake_word_mode:
-        from voice_assistant.config import Config
         energy_threshold = getattr(Config, 'WAKE_WORD_ENERGY_THRESHOLD', 600)
         pause_threshold = getattr(Config, 'WAKE_WORD_PAUSE_THRESHOLD', 0.8)
         timeout = 10  # Reasonable timeout for wake word
@@ -48,10 +64,11 @@ def record_audio(file_path, timeout=15, phrase_time_limit=10, retries=3, energy_
         logging.info("🎤 Recording in WAKE WORD mode...")
     else:
         # Conversation mode - more generous timeouts
-        timeout = 15  # More time to start speaking
-        phrase_time_limit = 10  # More time for longer responses
-        energy_threshold = 800  # Slightly lower for conversation
-        pause_threshold = 2.0  # Longer pause for end of sentence
+        timeout = Config.CONVERSATION_TIMEOUT
+        phrase_time_limit = Config.CONVERSATION_PHRASE_TIME_LIMIT
+        energy_threshold = Config.CONVERSATION_ENERGY_THRESHOLD
+        # Adaptive endpointing only runs on the always-open stream (see CONVERSATION_PAUSE_THRESHOLD)
+        pause_threshold = Config.CONVERSATION_PAUSE_THRESHOLD
         logging.info("🎤 Recording in CONVERSATION mode...")
         
     recognizer = get_recognizer()
@@ -62,36 +79,21 @@ def record_audio(file_path, timeout=15, phrase_time_limit=10, retries=3, energy_
     
     for attempt in range(retries):
         try:
-            with sr.Microphone() as source:
-                logging.info("Calibrating for ambient noise...")
-                try:
-                    recognizer.adjust_for_ambient_noise(source, duration=calibration_duration)
-                    logging.info(f"Energy threshold after calibration: {recognizer.energy_threshold}")
-                except OSError as audio_error:
-                    logging.warning(f"Audio calibration failed: {audio_error}")
-                    # Continue with default energy threshold
-                    recognizer.energy_threshold = energy_threshold
-                
-                logging.info(f"🎙️ Recording started - Please speak now! (timeout: {timeout}s, phrase_limit: {phrase_time_limit}s)")
-                
-                # Listen for the first phrase and extract it into audio data
-                start_time = time.time()
-                audio_data = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
-                record_duration = time.time() - start_time
-                
-                logging.info(f"✅ Recording complete in {record_duration:.2f} seconds")
-
-                # Save the recorded audio data as WAV file
-                wav_data = audio_data.get_wav_data()
-                
+            if getattr(Config, 'KEEP_MICROPHONE_OPEN', False):
+                audio = _listen_with_stream(timeout, phrase_time_limit, pause_threshold, phrase_threshold,
+                                            None if dynamic_energy_threshold else energy_threshold,
+                                            start_index, on_speech)
+            else:
+                audio = _listen_with_recognizer(recognizer, timeout, phrase_time_limit,
+                                                energy_threshold, calibration_duration)
+            
+            if file_path:
                 try:
-                    with open(file_path, 'wb') as audio_file:
-                        audio_file.write(wav_data)
-                    logging.info(f"Audio saved successfully to {file_path}")
-                    return
+                    audio.save(file_path)
                 except Exception as save_error:
                     logging.error(f"Failed to save audio file: {save_error}")
                     raise
+            return audio
         except sr.WaitTimeoutError:
             if wake_word_mode:
                 # For wake word mode, timeout is expected - just retry
@@ -117,21 +119,83 @@ def record_audio(file_path, timeout=15, phrase_time_limit=10, retries=3, energy_
     if use_fallback:
         logging.info("🔄 Trying alternative recording methods...")
         
-        # Method 1: Direct arecord command
-        if _record_with_arecord(file_path, phrase_time_limit):
-            return
-            
-        # Method 2: sox recording (if available)
-        if _record_with_sox(file_path, phrase_time_limit):
-            return
-            
-        # Method 3: Manual recording prompt
-        if _manual_recording_prompt(file_path):
-            return
+        # The command line recorders need a file; use a private temp file unless a dump was requested
+        recording_path = file_path or _temporary_wav_path()
+        try:
+            # Method 1: Direct arecord command
+            if _record_with_arecord(recording_path, phrase_time_limit):
+                return AudioBuffer.from_wav_file(recording_path)
+                
+            # Method 2: sox recording (if available)
+            if _record_with_sox(recording_path, phrase_time_limit):
+                return AudioBuffer.from_wav_file(recording_path)
+                
+            # Method 3: Manual recording prompt
+            if _manual_recording_prompt(recording_path):
+                return AudioBuffer.from_wav_file(recording_path)
+        finally:
+            if not file_path and os.path.exists(recording_path):
+                os.remove(recording_path)
     
     logging.error("❌ All recording methods failed")
     raise Exception("All audio recording methods failed")
 
+def _listen_with_stream(timeout, phrase_time_limit, pause_threshold, phrase_threshold, energy_threshold,
+                        start_index=None, on_speech=None):
+    """Pull the next utterance from the always-open microphone stream."""
+    stream = get_microphone_stream()
+    logging.info(f"🎙️ Listening - Please speak now! (timeout: {timeout}s, phrase_limit: {phrase_time_limit}s)")
+    
+    start_time = time.time()
+    audio = stream.listen(
+        timeout=timeout,
+        phrase_time_limit=phrase_time_limit,
+        pause_threshold=pause_threshold,
+        phrase_threshold=phrase_threshold,
+        energy_threshold=energy_threshold,
+        start_index=None if start_index is None else max(0, start_index - stream.pre_roll_frames),
+        on_speech=on_speech
+    )
+    logging.info(f"✅ Recording complete in {time.time() - start_time:.2f} seconds")
+    return audio
+
+def _listen_with_recognizer(recognizer, timeout, phrase_time_limit, energy_threshold, calibration_duration):
+    """Open the microphone, calibrate, and record a single phrase with speech_recognition."""
+    open_started = time.monotonic()
+    with sr.Microphone() as source:
+        record_span("mic_open", open_started, time.monotonic())
+        logging.info("Calibrating for ambient noise...")
+        try:
+            with trace_span("calibration"):
+                recognizer.adjust_for_ambient_noise(source, duration=calibration_duration)
+            logging.info(f"Energy threshold after calibration: {recognizer.energy_threshold}")
+        except OSError as audio_error:
+            logging.warning(f"Audio calibration failed: {audio_error}")
+            # Continue with default energy threshold
+            recognizer.energy_threshold = energy_threshold
+        
+        logging.info(f"🎙️ Recording started - Please speak now! (timeout: {timeout}s, phrase_limit: {phrase_time_limit}s)")
+        
+        # Listen for the first phrase and extract it into audio data
+        start_time = time.time()
+        audio_data = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+        trace_event("vad_end")
+        record_duration = time.time() - start_time
+        
+        logging.info(f"✅ Recording complete in {record_duration:.2f} seconds")
+
+    # Keep the PCM in memory, converted once to the rate Whisper expects
+    return AudioBuffer(
+        audio_data.get_raw_data(convert_rate=TARGET_SAMPLE_RATE, convert_width=2),
+        sample_rate=TARGET_SAMPLE_RATE
+    )
+
+def _temporary_wav_path():
+    """Return a unique temporary WAV path so concurrent runs never share a file."""
+    fd, path = tempfile.mkstemp(prefix="verbi_", suffix=".wav")
+    os.close(fd)
+    return path
+
 def _record_with_arecord(file_path, duration=10):
     """Fallback recording using arecord command directly"""
     try:
@@ -144,7 +208,9 @@ def _record_with_arecord(file_path, duration=10):
         # Use arecord directly with specific parameters
         cmd = [
             "arecord",
-            "-f", "cd",  # CD quality (16-bit, 44.1kHz, stereo)
+            "-f", "S16_LE",  # 16-bit, 16 kHz mono - the format speech recognition uses
+            "-r", "16000",
+            "-c", "1",
             "-t", "wav",
             "-d", str(duration),
             file_path
@@ -225,20 +291,132 @@ def _manual_recording_prompt(file_path):
 
 def play_audio(file_path):
     """
-    Play an audio file using pygame.
+    Play an audio file through the persistent output stream (pygame as a fallback).
     
     Args:
     file_path (str): The path to the audio file to play.
+
+    Returns:
+    PlaybackItem: Start/end timestamps from the stream engine, or None when pygame played the file.
+    """
+    if Config.PLAYBACK_ENGINE == 'sounddevice' and SOUNDDEVICE_AVAILABLE:
+        try:
+            return play_pcm(_decode_audio_file(file_path))
+        except Exception as e:
+            logging.warning(f"⚠️ Stream playback failed, falling back to pygame: {e}")
+    _play_with_pygame(file_path)
+    return None
+
+def play_pcm(audio, wait=True):
+    """
+    Play in-memory audio through the persistent output stream.
+    
+    Args:
+    audio (AudioBuffer): The audio to play.
+    wait (bool): Block until playback has finished.
+
+    Returns:
+    PlaybackItem: Handle with precise start/end timestamps.
     """
+    return get_playback_engine().play(audio, wait=wait)
+
+def play_pcm_stream(chunks, wait=True):
+    """
+    Play audio through the persistent output stream while it is still arriving.
+    
+    Args:
+    chunks (iterable): AudioBuffer chunks, played as soon as each one is available.
+    wait (bool): Block until playback has finished.
+
+    Returns:
+    PlaybackItem: Handle with precise start/end timestamps.
+    """
+    return get_playback_engine().play_stream(chunks, wait=wait)
+
+def open_audio_output():
+    """
+    Open the output device ahead of the first playback.
+
+    Returns:
+    str: The engine that will play audio ('sounddevice' or 'pygame').
+    """
+    if Config.PLAYBACK_ENGINE == 'sounddevice' and SOUNDDEVICE_AVAILABLE:
+        try:
+            get_playback_engine()
+            return 'sounddevice'
+        except Exception as e:
+            logging.warning(f"⚠️ Could not open the output stream, falling back to pygame: {e}")
+    _init_pygame_mixer()
+    return 'pygame'
+
+def get_volume():
+    """Return the playback volume from 0.0 to 1.0."""
+    return _volume
+
+def set_volume(level):
+    """
+    Set the playback volume for both the stream engine and pygame.
+    
+    Args:
+    level (float): Volume from 0.0 (muted) to 1.0 (full).
+
+    Returns:
+    float: The volume actually set, clamped to the valid range.
+    """
+    global _volume
+    level = min(1.0, max(0.0, float(level)))
+    _volume = level
+    if Config.PLAYBACK_ENGINE == 'sounddevice' and SOUNDDEVICE_AVAILABLE:
+        try:
+            get_playback_engine().volume = level
+        except Exception as e:
+            logging.warning(f"⚠️ Could not set stream volume: {e}")
+    if _init_pygame_mixer.cache_info().currsize:
+        _init_pygame_mixer().mixer.music.set_volume(level)
+    return level
+
+def stop_audio():
+    """
+    Interrupt whatever is playing (stream engine or pygame) and drop queued clips.
+    """
+    if Config.PLAYBACK_ENGINE == 'sounddevice' and SOUNDDEVICE_AVAILABLE and get_playback_engine.cache_info().currsize:
+        get_playback_engine().stop()
+    if _init_pygame_mixer.cache_info().currsize:
+        _init_pygame_mixer().mixer.music.stop()
+
+def _decode_audio_file(file_path):
+    """Decode a WAV (directly) or any other format (through pydub) into an AudioBuffer."""
+    if file_path.lower().endswith('.wav'):
+        try:
+            return AudioBuffer.from_wav_file(file_path)
+        except Exception:
+            pass  # Not plain PCM WAV - let pydub handle it
+    segment = load_backend('pydub').AudioSegment.from_file(file_path)
+    return AudioBuffer(segment.raw_data, segment.frame_rate, segment.sample_width, segment.channels)
+
+@lru_cache(maxsize=None)
+def _init_pygame_mixer():
+    """Import pygame and initialize its mixer once instead of on every playback."""
+    pygame = load_backend('pygame')
+    pygame.mixer.init()
+    return pygame
+
+def _play_with_pygame(file_path):
+    """
+    Play an audio file using pygame.
+    """
+    try:
+        pygame = _init_pygame_mixer()
+    except Exception as e:
+        logging.error(f"Failed to play audio: {e}")
+        return
     try:
-        pygame.mixer.init()
         pygame.mixer.music.load(file_path)
+        pygame.mixer.music.set_volume(_volume)
         pygame.mixer.music.play()
         while pygame.mixer.music.get_busy():
-            pygame.time.wait(100)
+            pygame.time.wait(10)
     except pygame.error as e:
         logging.error(f"Failed to play audio: {e}")
     except Exception as e:
         logging.error(f"An unexpected error occurred while playing audio: {e}")
-    finally:
-        pygame.mixer.quit()
\ No newline at end of file
@@ -0,0 +1,133 @@
+# voice_assistant/audio_buffer.py
+
+import io
+import logging
+import wave
+from functools import lru_cache
+
+import numpy as np
+
+# Sample rate expected by Whisper-family models
+TARGET_SAMPLE_RATE = 16000
+
+# Length of the anti-aliasing filter applied before downsampling
+LOWPASS_TAPS = 63
+
+
+@lru_cache(maxsize=None)
+def _lowpass_taps(cutoff, num_taps=LOWPASS_TAPS):
+    """Hamming-windowed sinc low-pass filter; cutoff is in cycles per sample (0.5 = Nyquist)."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2.0
+    taps = 2.0 * cutoff * np.sinc(2.0 * cutoff * n) * np.hamming(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class AudioBuffer:
+    """
+    In-memory PCM audio passed from recording to transcription without touching disk.
+
+    Attributes:
+        pcm (bytes): Raw little-endian signed PCM frames.
+        sample_rate (int): Frames per second.
+        sample_width (int): Bytes per sample (2 for 16-bit audio).
+        channels (int): Number of interleaved channels.
+    """
+
+    def __init__(self, pcm, sample_rate=TARGET_SAMPLE_RATE, sample_width=2, channels=1):
+        self.pcm = bytes(pcm)
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.channels = channels
+
+    def __len__(self):
+        return len(self.pcm)
+
+    @property
+    def duration(self):
+        """Length of the audio in seconds."""
+        frame_size = self.sample_width * self.channels
+        return len(self.pcm) / float(frame_size * self.sample_rate) if frame_size else 0.0
+
+    @classmethod
+    def from_wav_bytes(cls, wav_bytes):
+        """Decode a WAV container held in memory."""
+        with wave.open(io.BytesIO(wav_bytes), 'rb') as wav_file:
+            return cls(
+                wav_file.readframes(wav_file.getnframes()),
+                sample_rate=wav_file.getframerate(),
+                sample_width=wav_file.getsampwidth(),
+                channels=wav_file.getnchannels()
+            )
+
+    @classmethod
+    def from_wav_file(cls, file_path):
+        """Load a WAV file from disk."""
+        with open(file_path, 'rb') as wav_file:
+            return cls.from_wav_bytes(wav_file.read())
+
+    @classmethod
+    def from_float32(cls, samples, sample_rate=TARGET_SAMPLE_RATE):
+        """Build a 16-bit mono buffer from float32 samples in [-1, 1]."""
+        clipped = np.clip(np.asarray(samples, dtype=np.float32), -1.0, 1.0)
+        return cls((clipped * 32767.0).astype('<i2').tobytes(), sample_rate=sample_rate)
+
+    def to_wav_bytes(self):
+        """Encode the buffer as a WAV container in memory (for HTTP upload APIs)."""
+        output = io.BytesIO()
+        with wave.open(output, 'wb') as wav_file:
+            wav_file.setnchannels(self.channels)
+            wav_file.setsampwidth(self.sample_width)
+            wav_file.setframerate(self.sample_rate)
+            wav_file.writeframes(self.pcm)
+        return output.getvalue()
+
+    def save(self, file_path):
+        """Write the buffer to disk as a WAV file (debug dump)."""
+        with open(file_path, 'wb') as wav_file:
+            wav_file.write(self.to_wav_bytes())
+        logging.info(f"Audio saved successfully to {file_path}")
+
+    def to_float32(self, sample_rate=TARGET_SAMPLE_RATE):
+        """
+        Return mono float32 samples in [-1, 1] at the requested sample rate.
+
+        This is the array format faster-whisper accepts directly.
+        """
+        if self.sample_width == 1:
+            samples = (np.frombuffer(self.pcm, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        elif self.sample_width == 2:
+            samples = np.frombuffer(self.pcm, dtype='<i2').astype(np.float32) / 32768.0
+        elif self.sample_width == 4:
+            samples = np.frombuffer(self.pcm, dtype='<i4').astype(np.float32) / 2147483648.0
+        else:
+            raise ValueError(f"Unsupported sample width: {self.sample_width}")
+
+        if self.channels > 1:
+            usable = len(samples) - len(samples) % self.channels
+            samples = samples[:usable].reshape(-1, self.channels).mean(axis=1)
+
+        if self.sample_rate != sample_rate and len(samples):
+            if sample_rate < self.sample_rate:
+                # Remove content above the new Nyquist frequency, or interpolation folds it back as aliasing
+                cutoff = round(0.45 * sample_rate / float(self.sample_rate), 4)
+                samples = np.convolve(samples, _lowpass_taps(cutoff), mode='same')
+            target_length = int(round(len(samples) * sample_rate / float(self.sample_rate)))
+            positions = np.linspace(0, len(samples) - 1, num=target_length)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+        return samples
+
+
+def load_audio(audio):
+    """
+    Normalize a file path or AudioBuffer into an AudioBuffer.
+
+    Args:
+        audio (str | AudioBuffer): Path to a WAV file or an in-memory buffer.
+
+    Returns:
+        AudioBuffer: The audio held in memory.
+    """
+    if isinstance(audio, AudioBuffer):
+        return audio
+    return AudioBuffer.from_wav_file(audio)
@@ -0,0 +1,123 @@
+# voice_assistant/backends.py
+
+import argparse
+import importlib
+import importlib.util
+import logging
+import time
+from functools import lru_cache
+
+from voice_assistant.config import Config
+
+# Optional SDKs behind each backend: name -> (module to import, pip package).
+# Config selects one provider per stage, so each SDK is imported the first time
+# its provider is actually used rather than when the package is imported.
+BACKENDS = {
+    'openai': ('openai', 'openai'),
+    'groq': ('groq', 'groq'),
+    'deepgram': ('deepgram', 'deepgram-sdk'),
+    'elevenlabs': ('elevenlabs', 'elevenlabs'),
+    'cartesia': ('cartesia', 'cartesia'),
+    'ollama': ('ollama', 'ollama'),
+    'faster-whisper': ('faster_whisper', 'faster-whisper'),
+    'piper': ('piper.voice', 'piper-tts'),
+    'pygame': ('pygame', 'pygame'),
+    'pydub': ('pydub', 'pydub'),
+}
+
+_modules = {}
+_import_seconds = {}
+
+
+@lru_cache(maxsize=None)
+def backend_available(name):
+    """
+    Return True if the backend's SDK is installed, without importing it.
+    """
+    module_name, _ = BACKENDS[name]
+    if name in _modules:
+        return True
+    try:
+        # Only the top-level package is located - finding a submodule would import its parent
+        return importlib.util.find_spec(module_name.split(".")[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def load_backend(name):
+    """
+    Import a backend's SDK on first use and return the module.
+
+    Raises:
+        ImportError: If the SDK is not installed (the message says how to install it).
+    """
+    module = _modules.get(name)
+    if module is not None:
+        return module
+
+    module_name, package = BACKENDS[name]
+    start_time = time.perf_counter()
+    try:
+        module = importlib.import_module(module_name)
+    except (ImportError, OSError) as e:  # OSError: installed, but a native library is missing
+        raise ImportError(f"{name} not available ({e}) - install with: pip install {package}") from e
+    elapsed = time.perf_counter() - start_time
+
+    _import_seconds.setdefault(name, elapsed)
+    logging.info(f"📦 Imported {name} backend in {elapsed * 1000:.0f} ms")
+    return _modules.setdefault(name, module)
+
+
+def configured_backends():
+    """Backends the current Config selects, in pipeline order."""
+    names = [Config.TRANSCRIPTION_MODEL, Config.RESPONSE_MODEL, Config.TTS_MODEL]
+    if Config.PLAYBACK_ENGINE == 'pygame':
+        names.append('pygame')
+    return [name for name in dict.fromkeys(names) if name in BACKENDS]
+
+
+def import_report():
+    """
+    Return the seconds spent importing each backend loaded so far, slowest first.
+    """
+    return dict(sorted(_import_seconds.items(), key=lambda item: item[1], reverse=True))
+
+
+def log_import_report():
+    report = import_report()
+    if not report:
+        logging.info("📦 No backend SDKs imported")
+        return
+    summary = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in report.items())
+    logging.info(f"📦 Backend imports: {summary} (total {sum(report.values()) * 1000:.0f} ms)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report how long the voice assistant spends importing backends")
+    parser.add_argument("--all", action="store_true", help="Import every installed backend, not only the configured ones")
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    importlib.import_module("voice_assistant.conversation")
+    importlib.import_module("voice_assistant.intents")
+    package_seconds = time.perf_counter() - start_time
+
+    names = list(BACKENDS) if args.all else configured_backends()
+    print(f"\n{'backend':<16}{'import (ms)':>12}")
+    print(f"{'(package)':<16}{package_seconds * 1000:>12.0f}")
+    for name in names:
+        if not backend_available(name):
+            print(f"{name:<16}{'missing':>12}")
+            continue
+        try:
+            load_backend(name)
+        except ImportError as e:
+            print(f"{name:<16}{'failed':>12}  {e}")
+            continue
+        print(f"{name:<16}{_import_seconds[name] * 1000:>12.0f}")
+    print(f"{'total':<16}{(time.perf_counter() - start_time) * 1000:>12.0f}\n")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,98 @@
+# voice_assistant/barge_in.py
+
+import logging
+import threading
+
+from voice_assistant.config import Config
+from voice_assistant.playback import SOUNDDEVICE_AVAILABLE, get_playback_engine
+
+# Mic RMS (16-bit scale) is compared against playback RMS (float scale)
+_PCM_SCALE = 32768.0
+
+
+def playback_level_available():
+    """
+    True if the playback engine reports its output level, which echo suppression needs.
+    """
+    return Config.PLAYBACK_ENGINE == 'sounddevice' and SOUNDDEVICE_AVAILABLE
+
+
+class BargeInMonitor:
+    """
+    Watches the live microphone while a reply plays and fires when the user starts talking.
+
+    Echo suppression is a simple level model: the monitor learns how loud the speaker
+    sounds in the microphone (the echo coupling) from frames where nobody is talking,
+    and only counts a frame as speech when it is clearly louder than both the noise floor
+    and the echo expected from what is currently being played. The same margin applies
+    to the noise floor, so a pause between sentences doesn't drop the threshold to bare
+    ambient level, and speech must last min_speech_frames frames whatever is playing.
+    """
+
+    def __init__(self, stream, on_barge_in, min_speech_seconds=None, echo_margin=None):
+        self.stream = stream
+        self.on_barge_in = on_barge_in
+        self.min_speech_frames = max(1, int(
+            (min_speech_seconds or Config.BARGE_IN_MIN_SPEECH_SECONDS) / stream.frame_duration))
+        self.echo_margin = echo_margin or Config.BARGE_IN_ECHO_MARGIN
+        self.echo_coupling = Config.BARGE_IN_INITIAL_ECHO_COUPLING
+        self.speech_start = None  # Frame index where the interrupting speech began
+        self._running = False
+        self._thread = None
+
+    def _playback_level(self):
+        if playback_level_available():
+            return get_playback_engine().recent_level()
+        return None  # Stream playback fell back to pygame - use a raised energy threshold
+
+    def is_speech(self, rms):
+        """
+        Classify one microphone frame, learning the echo coupling from non-speech frames.
+        """
+        noise_floor = self.stream.energy_threshold * self.echo_margin
+        playback_level = self._playback_level()
+        if playback_level is None:
+            return rms > noise_floor
+
+        expected_echo = self.echo_coupling * playback_level * _PCM_SCALE
+        if rms > max(noise_floor, expected_echo * self.echo_margin):
+            return True
+        if playback_level > 1e-3:
+            # Slowly track how much of the playback leaks into the microphone
+            observed = rms / (playback_level * _PCM_SCALE)
+            self.echo_coupling += 0.05 * (observed - self.echo_coupling)
+        return False
+
+    def start(self):
+        self.speech_start = None
+        self._running = True
+        self._thread = threading.Thread(target=self._monitor, name="barge-in", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def _monitor(self):
+        voiced_run = 0
+        first_voiced = None
+        try:
+            for index, _, rms in self.stream.iter_frames(timeout=0.5):
+                if not self._running:
+                    return
+                if self.is_speech(rms):
+                    if voiced_run == 0:
+                        first_voiced = index
+                    voiced_run += 1
+                    if voiced_run >= self.min_speech_frames:
+                        self.speech_start = first_voiced
+                        logging.info("✋ Barge-in detected - stopping playback")
+                        self._running = False
+                        self.on_barge_in()
+                        return
+                else:
+                    voiced_run = 0
+        except OSError as e:
+            logging.warning(f"⚠️ Barge-in monitor stopped: {e}")
@@ -0,0 +1,299 @@
+# voice_assistant/benchmark.py
+
+import argparse
+import glob
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from voice_assistant.audio_buffer import AudioBuffer, TARGET_SAMPLE_RATE
+from voice_assistant.backends import backend_available, load_backend
+from voice_assistant.config import Config
+
+# Prompts fed to the response and TTS stages
+BENCHMARK_PROMPTS = [
+    "What's a good name for a cat?",
+    "Tell me something interesting about the moon.",
+    "How do I boil an egg?",
+]
+BENCHMARK_SENTENCES = [
+    "Hello! How can I help?",
+    "The moon is slowly drifting away from the Earth, about four centimeters every year.",
+    "Put the egg in boiling water for about seven minutes, then cool it in cold water.",
+]
+
+# Backends that need the network, and the local stand-in used for each stage instead
+CLOUD_BACKENDS = ('openai', 'groq', 'deepgram', 'elevenlabs', 'cartesia', 'server')
+OFFLINE_TRANSCRIPTION = 'faster-whisper'
+OFFLINE_TTS = 'piper'
+
+# Slowdowns smaller than this are timer noise, whatever the percentage
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def synthetic_fixtures(seed=0):
+    """
+    Build deterministic speech-like fixtures (voiced harmonic bursts between silences).
+
+    Used when no fixture directory is given; exercises the pipeline's timing, not accuracy.
+    """
+    rng = np.random.default_rng(seed)
+    fixtures = {}
+    for seconds in (1.5, 4.0, 8.0):
+        t = np.arange(int(seconds * TARGET_SAMPLE_RATE)) / float(TARGET_SAMPLE_RATE)
+        pitch = 120 + 30 * np.sin(2 * np.pi * 0.5 * t)
+        phase = 2 * np.pi * np.cumsum(pitch) / TARGET_SAMPLE_RATE
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+        syllables = (np.sin(2 * np.pi * 3.0 * t) > -0.2).astype(np.float32)
+        edges = (t > 0.3) & (t < seconds - 0.3)  # Leading and trailing silence
+        samples = 0.2 * voiced * syllables * edges + 0.003 * rng.standard_normal(len(t))
+        fixtures[f"synthetic_{seconds:g}s"] = AudioBuffer.from_float32(samples)
+    return fixtures
+
+
+def load_fixtures(fixture_dir):
+    """Load every WAV file in a directory (raw .pcm files are read as 16 kHz mono 16-bit)."""
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*.wav"))):
+        fixtures[os.path.basename(path)] = AudioBuffer.from_wav_file(path)
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*.pcm"))):
+        with open(path, "rb") as pcm_file:
+            fixtures[os.path.basename(path)] = AudioBuffer(pcm_file.read(), sample_rate=TARGET_SAMPLE_RATE)
+    return fixtures
+
+
+class StageTimer:
+    """Collects wall time, CPU time and a real-time factor for each run of a stage."""
+
+    def __init__(self):
+        self.results = {}
+
+    def measure(self, stage, func, audio_seconds=None):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = func()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        runs = self.results.setdefault(stage, {"wall": [], "cpu": [], "rtf": []})
+        runs["wall"].append(wall)
+        runs["cpu"].append(cpu)
+        if callable(audio_seconds):
+            audio_seconds = audio_seconds(result)
+        if audio_seconds:
+            runs["rtf"].append(wall / audio_seconds)
+        return result
+
+    def summary(self):
+        summary = {}
+        for stage, runs in self.results.items():
+            wall = np.array(runs["wall"])
+            summary[stage] = {
+                "runs": len(wall),
+                "p50": round(float(np.percentile(wall, 50)), 4),
+                "p95": round(float(np.percentile(wall, 95)), 4),
+                "cpu_mean": round(float(np.mean(runs["cpu"])), 4),
+            }
+            if runs["rtf"]:
+                summary[stage]["rtf"] = round(float(np.median(runs["rtf"])), 4)
+        return summary
+
+
+def _offline_backends():
+    """Pick local stand-ins for any configured cloud backend."""
+    transcription = Config.TRANSCRIPTION_MODEL
+    if transcription in CLOUD_BACKENDS:
+        transcription = OFFLINE_TRANSCRIPTION
+    if transcription == 'faster-whisper' and not backend_available('faster-whisper'):
+        transcription = 'local'
+
+    response = Config.RESPONSE_MODEL
+    if response in CLOUD_BACKENDS or (response == 'ollama' and not _ollama_reachable()):
+        response = 'stand-in'
+
+    tts = OFFLINE_TTS if Config.TTS_MODEL in CLOUD_BACKENDS else Config.TTS_MODEL
+    return transcription, response, tts
+
+
+def _ollama_reachable():
+    try:
+        load_backend('ollama').list()
+        return True
+    except Exception:
+        return False
+
+
+def _stand_in_tokens(prompt, token_delay):
+    """Deterministic local stand-in for an LLM: streams a fixed reply word by word."""
+    reply = f"You asked about {prompt.rstrip('?.!').lower()}. Here is a short and simple answer for you."
+    for word in reply.split():
+        time.sleep(token_delay)
+        yield word + " "
+
+
+def _transcribe(transcription_model, audio):
+    """
+    Transcribe already-preprocessed audio.
+
+    Bypasses transcribe_audio, which would preprocess a second time and fall back to
+    the online speech_recognition engines whenever whisper finds no speech.
+    """
+    from voice_assistant.transcription import FASTER_WHISPER_DECODE_OPTIONS, _transcribe_with_backend, get_whisper_model
+
+    if transcription_model == 'faster-whisper':
+        segments, _ = get_whisper_model().transcribe(audio.to_float32(), **FASTER_WHISPER_DECODE_OPTIONS)
+        return " ".join(segment.text.strip() for segment in segments)
+    return _transcribe_with_backend(transcription_model, None, audio, None)
+
+
+def _generate(response_model, prompt, token_delay):
+    from voice_assistant.response_generation import _clean_sentences, generate_response_stream
+
+    if response_model == 'stand-in':
+        return list(_clean_sentences(_stand_in_tokens(prompt, token_delay)))
+    return list(generate_response_stream(response_model, None, [{"role": "user", "content": prompt}]))
+
+
+def _usable_tts(tts_model, output_file):
+    """Fall back to the placeholder TTS when the configured engine isn't installed here."""
+    from voice_assistant.text_to_speech import text_to_speech
+
+    try:
+        text_to_speech(tts_model, None, BENCHMARK_SENTENCES[0], output_file)
+        return tts_model
+    except Exception as e:
+        logging.warning(f"⚠️ {tts_model} TTS unavailable ({e}) - benchmarking the placeholder instead")
+        return 'local'
+
+
+def _synthesized_seconds(output_file):
+    try:
+        return AudioBuffer.from_wav_file(output_file).duration
+    except Exception:
+        return None  # Not a WAV (e.g. placeholder output) - no real-time factor
+
+
+def run_benchmark(fixtures, runs=5, token_delay=0.02):
+    """
+    Run every stage over the fixtures and prompts, skipping one warm-up pass per stage.
+
+    Returns:
+        dict: Backends used, per-stage statistics and peak RSS.
+    """
+    from voice_assistant.preprocessing import preprocess_audio
+    from voice_assistant.text_to_speech import text_to_speech
+
+    output_file = os.path.join(tempfile.mkdtemp(prefix="verbi_benchmark_"), "speech.wav")
+    transcription_model, response_model, tts_model = _offline_backends()
+    tts_model = _usable_tts(tts_model, output_file)
+    logging.info(f"🏁 Benchmarking STT={transcription_model} LLM={response_model} TTS={tts_model} "
+                 f"({len(fixtures)} fixtures x {runs} runs)")
+
+    timer = StageTimer()
+    warm_up = StageTimer()
+    try:
+        for run in range(runs + 1):
+            stages = warm_up if run == 0 else timer
+            for audio in fixtures.values():
+                processed = stages.measure("preprocess", lambda: preprocess_audio(audio), audio.duration)
+                if len(processed):  # All silence - the assistant skips transcription too
+                    stages.measure("transcribe", lambda: _transcribe(transcription_model, processed), audio.duration)
+            for prompt in BENCHMARK_PROMPTS:
+                stages.measure("generate", lambda: _generate(response_model, prompt, token_delay))
+            for sentence in BENCHMARK_SENTENCES:
+                stages.measure("synthesize", lambda: text_to_speech(tts_model, None, sentence, output_file),
+                               lambda _: _synthesized_seconds(output_file))
+    finally:
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        os.rmdir(os.path.dirname(output_file))
+
+    return {
+        "backends": {"transcription": transcription_model, "response": response_model, "tts": tts_model},
+        "stages": timer.summary(),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.2):
+    """
+    Return a list of regressions: stages whose p50 or p95 grew by more than tolerance.
+    """
+    if baseline.get("backends") != report["backends"]:
+        logging.warning("⚠️ Baseline was recorded with different backends - comparison may be meaningless")
+
+    regressions = []
+    for stage, stats in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        for metric in ("p50", "p95"):
+            slower = stats[metric] - previous[metric]
+            if previous[metric] > 0 and slower > MIN_REGRESSION_SECONDS and slower > previous[metric] * tolerance:
+                regressions.append(f"{stage} {metric}: {previous[metric]:.3f}s -> {stats[metric]:.3f}s "
+                                   f"(+{(stats[metric] / previous[metric] - 1) * 100:.0f}%)")
+    previous_rss = baseline.get("peak_rss_mb")
+    if previous_rss and report["peak_rss_mb"] > previous_rss * (1 + tolerance):
+        regressions.append(f"peak RSS: {previous_rss:.0f} MB -> {report['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def print_report(report):
+    print(f"\nBackends: {report['backends']}")
+    print(f"{'stage':<12}{'runs':>6}{'p50 (s)':>10}{'p95 (s)':>10}{'cpu (s)':>10}{'RTF':>8}")
+    for stage, stats in report["stages"].items():
+        rtf = f"{stats['rtf']:.3f}" if "rtf" in stats else "-"
+        print(f"{stage:<12}{stats['runs']:>6}{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['cpu_mean']:>10.3f}{rtf:>8}")
+    print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline latency benchmark for the voice pipeline")
+    parser.add_argument("--fixtures", help="Directory of .wav/.pcm fixtures (default: synthetic audio)")
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs per stage (after one warm-up)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Per-token delay of the stand-in LLM")
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="Baseline report to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures()
+    if not fixtures:
+        parser.error(f"No .wav or .pcm fixtures found in {args.fixtures}")
+
+    # Keep the measurement free of side effects and caches
+    Config.TRACE_LOG_PATH = None
+    Config.RESPONSE_CACHE_ENABLED = False
+
+    report = run_benchmark(fixtures, runs=args.runs, token_delay=args.token_delay)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        logging.info(f"💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(report, json.load(baseline_file), args.tolerance)
+        if regressions:
+            for regression in regressions:
+                logging.error(f"📉 Regression: {regression}")
+            return 1
+        logging.info("✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# voice_assistant/bulk_transcription.py
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from voice_assistant.backends import backend_available
+from voice_assistant.config import Config
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg', '.m4a')
+
+# Per-process model, loaded once by the pool initializer
+_worker_model = None
+
+
+def find_audio_files(paths):
+    """
+    Expand files and directories into a sorted list of audio files.
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                found.extend(os.path.join(root, name) for name in names
+                             if name.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            found.append(path)
+    return sorted(found)
+
+
+def load_checkpoint(output_path):
+    """
+    Return the set of files already transcribed successfully in an existing JSONL output.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as output_file:
+        for line in output_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line from an interrupted run
+            if "error" not in record:
+                done.add(record["path"])
+    return done
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as output_file:
+        output_file.seek(-1, os.SEEK_END)
+        return output_file.read(1) == b"\n"
+
+
+def _init_worker(model_size, cpu_threads):
+    global _worker_model
+    from voice_assistant.transcription import get_whisper_model
+
+    logging.basicConfig(level=logging.WARNING)
+    _worker_model = get_whisper_model(model_size=model_size, cpu_threads=cpu_threads, num_workers=1)
+
+
+def _transcribe_file(path):
+    from voice_assistant.transcription import FASTER_WHISPER_DECODE_OPTIONS
+
+    started_at = time.time()
+    try:
+        # faster-whisper decodes any container/codec itself, so pass the path straight through
+        segments, info = _worker_model.transcribe(path, **FASTER_WHISPER_DECODE_OPTIONS)
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+    except Exception as e:
+        return {"path": path, "error": str(e)}
+    processing_time = time.time() - started_at
+    return {
+        "path": path,
+        "text": text,
+        "language": info.language,
+        "duration": round(info.duration, 3),
+        "processing_time": round(processing_time, 3),
+        "real_time_factor": round(processing_time / info.duration, 3) if info.duration else None,
+        "worker": os.getpid(),
+    }
+
+
+def transcribe_files(paths, output_path, model_size=None, num_workers=None, total_threads=None, resume=True):
+    """
+    Transcribe many audio files in parallel, writing one JSON line per file to output_path.
+
+    Files are sharded across a process pool; each worker loads the model once and gets
+    an equal share of the CPU threads, so the machine is used fully without oversubscribing.
+    With resume, files already present in output_path are skipped and new results are
+    appended; without it, output_path is started over.
+
+    Args:
+        paths (list): Audio files and/or directories to search.
+        output_path (str): JSONL file to write results to.
+        model_size (str): faster-whisper model size (defaults to FASTER_WHISPER_MODEL_SIZE).
+        num_workers (int): Worker processes (defaults to the CPU count).
+        total_threads (int): CPU threads shared between the workers (defaults to the CPU count).
+        resume (bool): Skip files already transcribed in output_path instead of overwriting it.
+
+    Yields:
+        dict: Each result as it completes.
+    """
+    if not backend_available('faster-whisper'):
+        raise RuntimeError("faster-whisper not installed. Use: pip install faster-whisper")
+
+    files = find_audio_files(paths)
+    if resume:
+        done = load_checkpoint(output_path)
+        if done:
+            logging.info(f"⏭️ Resuming: {len(done)} files already transcribed")
+        files = [path for path in files if path not in done]
+    if not files:
+        logging.info("✅ Nothing to transcribe")
+        return
+
+    model_size = model_size or Config.FASTER_WHISPER_MODEL_SIZE
+    total_threads = total_threads or os.cpu_count() or 1
+    num_workers = max(1, min(num_workers or total_threads, len(files)))
+    cpu_threads = max(1, total_threads // num_workers)
+    logging.info(f"🚀 Transcribing {len(files)} files with {num_workers} workers x {cpu_threads} threads ({model_size})")
+
+    started_at = time.time()
+    audio_seconds = 0.0
+    # Spawn rather than fork: CTranslate2's thread pools don't survive a fork
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=context,
+                             initializer=_init_worker, initargs=(model_size, cpu_threads)) as pool, \
+            open(output_path, "a" if resume else "w", encoding="utf-8") as output_file:
+        if output_file.tell() and not _ends_with_newline(output_path):
+            output_file.write("\n")  # Terminate a line cut short by an interrupted run
+        futures = [pool.submit(_transcribe_file, path) for path in files]
+        for future in as_completed(futures):
+            record = future.result()
+            output_file.write(json.dumps(record) + "\n")
+            output_file.flush()  # Every finished file is checkpointed immediately
+            if "error" in record:
+                logging.error(f"❌ {record['path']}: {record['error']}")
+            else:
+                audio_seconds += record["duration"]
+            yield record
+
+    elapsed = time.time() - started_at
+    logging.info(f"✅ Transcribed {audio_seconds:.1f}s of audio in {elapsed:.1f}s "
+                 f"({audio_seconds / elapsed:.1f}x real time)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Transcribe a batch of audio files with faster-whisper")
+    parser.add_argument("paths", nargs="+", help="Audio files or directories")
+    parser.add_argument("-o", "--output", default="transcriptions.jsonl", help="JSONL output (also the checkpoint)")
+    parser.add_argument("--model-size", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=None, help="Total CPU threads across all workers")
+    parser.add_argument("--no-resume", action="store_true", help="Transcribe every file again, overwriting the output")
+    args = parser.parse_args()
+    for result in transcribe_files(args.paths, args.output, args.model_size, args.workers,
+                                   args.threads, resume=not args.no_resume):
+        if "error" not in result:
+            print(f"{result['path']}: {result['text']}")
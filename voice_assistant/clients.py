@@ -0,0 +1,125 @@
+# voice_assistant/clients.py
+
+import logging
+import time
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from voice_assistant.backends import load_backend
+from voice_assistant.config import Config
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# A POST is only repeated when the server turned it away before doing the work
+POST_RETRY_STATUS_CODES = (429, 503)
+
+
+def _build_client(provider, api_key):
+    timeout = Config.API_TIMEOUT
+    max_retries = Config.API_MAX_RETRIES
+    if provider == 'openai':
+        # The SDK retries connection errors, 429 and 5xx with exponential backoff itself
+        return load_backend('openai').OpenAI(api_key=api_key, timeout=timeout, max_retries=max_retries)
+    if provider == 'groq':
+        return load_backend('groq').Groq(api_key=api_key, timeout=timeout, max_retries=max_retries)
+    if provider == 'deepgram':
+        # The SDK only takes a timeout per request - see request_timeout()
+        return load_backend('deepgram').DeepgramClient(api_key)
+    if provider == 'elevenlabs':
+        load_backend('elevenlabs')
+        from elevenlabs.client import ElevenLabs
+        return ElevenLabs(api_key=api_key, timeout=timeout)
+    if provider == 'cartesia':
+        return load_backend('cartesia').Cartesia(api_key=api_key, timeout=timeout)
+    if provider == 'http':
+        return _build_session()
+    raise ValueError(f"Unknown API provider: {provider}")
+
+
+class _SessionRetry(Retry):
+    """
+    Retry idempotent requests on any transient failure, but a POST only on connection
+    errors and 429/503. A read timeout or 5xx may come from a server that is still
+    working on the request (a long transcription), and sending it again doubles the load.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method and method.upper() == "POST":
+            return status_code in POST_RETRY_STATUS_CODES
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def _build_session():
+    # POST is not in the default allowed_methods, so read errors on it are never retried
+    retry = _SessionRetry(
+        total=Config.API_MAX_RETRIES,
+        backoff_factor=Config.API_RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUS_CODES
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@lru_cache(maxsize=None)
+def get_client(provider, api_key=None):
+    """
+    Return the shared SDK client for a provider and API key, creating it on first use.
+
+    Clients hold keep-alive connection pools, so reusing them avoids a new TCP and TLS
+    handshake on every request.
+
+    Args:
+        provider (str): 'openai', 'groq', 'deepgram', 'elevenlabs', 'cartesia', or 'http'
+            for a plain requests.Session with retries.
+        api_key (str): The API key (None lets the SDK read its usual environment variable).
+
+    Returns:
+        The provider's client object.
+    """
+    logging.info(f"🔌 Creating {provider} API client")
+    return _build_client(provider, api_key)
+
+
+def request_timeout():
+    """
+    Return Config.API_TIMEOUT as an httpx timeout, for SDKs that take one per request (Deepgram).
+    """
+    import httpx  # Installed with the SDKs that need it
+
+    return httpx.Timeout(Config.API_TIMEOUT)
+
+
+def _is_transient(error):
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status in RETRY_STATUS_CODES:
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout)):
+        return True
+    # SDKs wrap httpx/aiohttp errors in their own types, e.g. httpx.ConnectTimeout
+    name = type(error).__name__
+    return "Timeout" in name or "Connect" in name
+
+
+def call_with_retries(func, *args, **kwargs):
+    """
+    Call func, retrying transient network failures with exponential backoff.
+
+    For SDKs without built-in retries (Deepgram, ElevenLabs). Errors such as bad
+    credentials or invalid input are raised immediately. Don't wrap requests made
+    with get_client('http') - its session already retries them.
+    """
+    for attempt in range(Config.API_MAX_RETRIES + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == Config.API_MAX_RETRIES or not _is_transient(e):
+                raise
+            delay = Config.API_RETRY_BACKOFF * (2 ** attempt)
+            logging.warning(f"⚠️ API call failed ({e}) - retrying in {delay:.1f}s")
+            time.sleep(delay)
@@ -11,7 +11,7 @@ class Config:
     Configuration class to hold the model selection and API keys.
     
     Attributes:
-        TRANSCRIPTION_MODEL (str): The model to use for transcription ('openai', 'groq', 'deepgram', 'faster-whisper', 'local').
+        TRANSCRIPTION_MODEL (str): The model to use for transcription ('openai', 'groq', 'deepgram', 'faster-whisper', 'server', 'local').
         RESPONSE_MODEL (str): The model to use for response generation ('openai', 'groq', 'local').
         TTS_MODEL (str): The model to use for text-to-speech ('openai', 'deepgram', 'elevenlabs', 'local').
         OPENAI_API_KEY (str): API key for OpenAI services.
@@ -29,9 +29,11 @@ class Config:
     PIPER_OUTPUT_FILE = "output.wav"
     PIPER_MODEL_PATH = "/home/pi/.local/share/piper-voices/en/en_US/lessac/medium/en_US-lessac-medium.onnx"
     PIPER_EXECUTABLE = "piper"  # Should be in PATH after installation
+    PIPER_SYNTHESIS_TIMEOUT = 10  # Seconds to wait for the piper process to voice a sentence before restarting it
 
     # LLM Selection - MATCH YOUR INSTALLED MODEL
     OLLAMA_LLM="phi3.5:3.0b-mini-instruct-q3_k_m"  # Updated to match your installed model
+    OLLAMA_KEEP_ALIVE = "60m"  # Keep the model loaded between turns: a duration string with a unit, or the int -1 to keep it forever
     GROQ_LLM="llama3-8b-8192"  # Not used
     OPENAI_LLM="gpt-4o"  # Not used
 
@@ -41,17 +43,68 @@ class Config:
     FASTER_WHISPER_COMPUTE_TYPE = "int8" # Keep int8 for speed and memory efficiency
     FASTER_WHISPER_CPU_THREADS = 2       # Adjust based on Pi model
     FASTER_WHISPER_NUM_WORKERS = 1       # Single worker for Pi
+    FASTER_WHISPER_MEMORY_BUDGET_MB = 400  # Evict least recently used models above this (None to disable)
+    FASTER_WHISPER_MODEL_IDLE_TIMEOUT = None  # Seconds before an unused model is unloaded (None keeps it loaded)
+
+    # Shared transcription server for several microphones (python -m voice_assistant.transcription_server)
+    TRANSCRIPTION_SERVER_HOST = "127.0.0.1"
+    TRANSCRIPTION_SERVER_PORT = 5160
+    TRANSCRIPTION_SERVER_URL = os.getenv("TRANSCRIPTION_SERVER_URL", "http://127.0.0.1:5160")  # Used by TRANSCRIPTION_MODEL = 'server'
+    TRANSCRIPTION_SERVER_NUM_WORKERS = 4      # Parallel decodes on one shared model
+    TRANSCRIPTION_SERVER_CPU_THREADS = None   # Total threads split across workers (None = all cores)
+
+    # Incremental transcription while the user is still speaking (faster-whisper + KEEP_MICROPHONE_OPEN)
+    STREAMING_TRANSCRIPTION = True
+    STREAMING_DECODE_INTERVAL = 1.0  # Seconds of new audio between partial decodes
+    STREAMING_COMMIT_LAG = 2.0       # Segments ending this far behind the newest audio are final
 
     # Wake Word Configuration - OPTIMIZED FOR RASPBERRY PI SPEED
     WAKE_WORD = "hi windy"
     SLEEP_WORD = "bye windy"
     WAKE_WORD_TIMEOUT = 3  # Faster timeout for wake word (was 5)
     CONVERSATION_TIMEOUT = 15  # Shorter conversation timeout for faster response (was 30)
+    CONVERSATION_PHRASE_TIME_LIMIT = 10  # Longest utterance recorded in conversation mode
+    CONVERSATION_ENERGY_THRESHOLD = 800  # Fixed trigger level when the microphone is opened per recording
+    # Silence that ends an utterance. With KEEP_MICROPHONE_OPEN and VAD_ENABLED this is only the
+    # upper bound - adaptive endpointing shrinks it towards VAD_MIN_ENDPOINT_SILENCE once a phrase
+    # is complete. With the microphone opened per recording, speech_recognition always waits this long.
+    CONVERSATION_PAUSE_THRESHOLD = 2.0
     
     # Audio settings for wake word detection - RASPBERRY PI OPTIMIZED
     WAKE_WORD_ENERGY_THRESHOLD = 600  # Lower threshold for Pi microphones (was 800)
     WAKE_WORD_PAUSE_THRESHOLD = 0.8   # Even shorter pause for faster detection (was 1.0)
 
+    # Always-open microphone stream - avoids re-opening the device and re-calibrating per recording
+    KEEP_MICROPHONE_OPEN = True
+    MIC_RING_BUFFER_SECONDS = 30      # Audio kept in the capture ring buffer
+    MIC_PRE_ROLL_SECONDS = 0.5        # Audio kept from before the energy trigger (avoids clipped syllables)
+    MIC_NOISE_FLOOR_MULTIPLIER = 3.0  # Speech triggers at this multiple of the running noise floor
+    MIC_MIN_ENERGY_THRESHOLD = 300    # Never trigger below this energy, even in a silent room
+
+    # Preprocessing applied before any transcription backend sees the audio
+    AUDIO_PREPROCESSING = True             # Downmix, resample to 16 kHz, trim silence, normalize gain
+    PREPROCESS_SILENCE_THRESHOLD_DBFS = -45.0  # Frames quieter than this are silence
+    PREPROCESS_TRIM_PADDING = 0.2          # Seconds kept around the trimmed speech
+    PREPROCESS_TARGET_PEAK_DBFS = -3.0     # Peak level after normalization
+    PREPROCESS_MAX_GAIN_DB = 20.0          # Never boost quiet recordings by more than this
+
+    # Voice activity detection and endpointing on the always-open stream
+    VAD_ENABLED = True
+    VAD_BACKEND = 'numpy'              # 'numpy' (built in) or 'webrtc' (pip install webrtcvad)
+    VAD_WEBRTC_AGGRESSIVENESS = 2      # 0 (least) to 3 (most aggressive at rejecting non-speech)
+    VAD_MIN_SNR_DB = 6.0               # Frames must be this far above the noise floor
+    VAD_HANGOVER_SECONDS = 0.12        # Keep a voiced decision through short gaps between words
+    VAD_MIN_ENDPOINT_SILENCE = 0.4     # Silence that ends a clearly complete phrase
+    VAD_COMPLETE_PHRASE_SECONDS = 1.0  # Voiced time after which a phrase counts as complete
+
+    # Lightweight wake word spotting - matches enrolled recordings instead of running Whisper in sleep mode.
+    # Nothing is enrolled out of the box; until you record a few takes with
+    #   python -m voice_assistant.wake_word
+    # sleep mode falls back to transcribing every sound. Needs KEEP_MICROPHONE_OPEN.
+    WAKE_WORD_TEMPLATE_DIR = "wake_word_templates"
+    WAKE_WORD_MATCH_THRESHOLD = 0.3    # Max MFCC match distance to fire (lower is stricter)
+    WAKE_WORD_CONFIRM_WITH_ASR = True  # Confirm matches with a full transcription before waking
+
     # API keys and paths
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -59,24 +112,73 @@ class Config:
     ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
     LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH")
     CARTESIA_API_KEY = os.getenv("CARTESIA_API_KEY")
+    DEEPGRAM_SPEAK_URL = os.getenv("DEEPGRAM_SPEAK_URL", "https://api.deepgram.com/v1/speak")  # Streaming TTS endpoint
 
     # for serving the MeloTTS model
     TTS_PORT_LOCAL = 5150
 
-    # temp file generated by the initial STT model
+    # Recordings stay in memory; set SAVE_INPUT_AUDIO to also dump each one here for debugging
     INPUT_AUDIO = "test.wav"
+    SAVE_INPUT_AUDIO = False
     
     # Wake word configuration
     WAKE_WORD = "hi windy"
     SLEEP_WORD = "bye windy" 
     WAKE_WORD_ENERGY_THRESHOLD = 800  # Lower threshold for wake word detection
-    CONVERSATION_ENERGY_THRESHOLD = 1000  # Normal threshold for conversation
     
     # Response length configuration - OPTIMIZED FOR SPEED
     MAX_RESPONSE_WORDS = 15  # Shorter responses for faster speech (was 30)
     MAX_RESPONSE_TOKENS = 30  # Lower token limit for faster generation (was 60)
     RESPONSE_TEMPERATURE = 0.3  # Lower temperature for faster, more focused responses (was 0.7)
 
+    # Response cache - repeated questions skip the LLM entirely
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_MAX_ENTRIES = 256
+    RESPONSE_CACHE_TTL = 3600          # Seconds before a cached reply goes stale
+    RESPONSE_CACHE_SIMILARITY = 0      # Opt-in trigram similarity for rephrased questions, e.g. 0.9 (0 = exact match only)
+
+    # Per-turn latency tracing
+    TRACING_ENABLED = True
+    TRACE_LOG_PATH = "latency_traces.jsonl"  # One JSON line per turn (None to disable)
+    TRACE_LOG_MAX_MB = 10                    # Rotated to TRACE_LOG_PATH + ".1" beyond this size (None = unlimited)
+    METRICS_PORT = None                      # Serve Prometheus metrics on this port, e.g. 9105
+
+    # Cloud API clients - shared per provider and key, reusing keep-alive connections
+    API_TIMEOUT = 15          # Seconds before a request to a cloud API is abandoned
+    API_MAX_RETRIES = 2       # Retries for connection errors, rate limits and 5xx (POSTs: connection errors, 429 and 503 only)
+    API_RETRY_BACKOFF = 0.5   # First retry delay in seconds, doubled on each further retry
+
+    # Conversation memory - keeps every prompt inside the model's context window
+    LLM_CONTEXT_TOKENS = 1024      # Context size (also Ollama's num_ctx)
+    CHAT_HISTORY_MAX_TURNS = 6     # Most recent user/assistant exchanges sent verbatim
+    CHAT_SUMMARY_MAX_TOKENS = 120  # Rolling summary of older turns
+    CHAT_HISTORY_EVICT_TURNS = 3   # Turns dropped at once when full, so the cached prompt prefix changes rarely
+
+    # Audio output - 'sounddevice' keeps one low-latency stream open, 'pygame' decodes files per call
+    PLAYBACK_ENGINE = 'sounddevice'
+    PLAYBACK_SAMPLE_RATE = 22050  # Matches Piper medium voices; other audio is resampled
+    PLAYBACK_VOLUME = 1.0         # Initial volume from 0.0 to 1.0 (changed by voice commands)
+    TTS_STREAMING = True          # Play each sentence's PCM as it arrives from the TTS engine (needs 'sounddevice')
+
+    # Barge-in - stop the reply when the user starts talking over it (needs KEEP_MICROPHONE_OPEN)
+    BARGE_IN_ENABLED = True
+    BARGE_IN_MIN_SPEECH_SECONDS = 0.25    # Sustained speech needed to interrupt
+    BARGE_IN_ECHO_MARGIN = 2.0            # Speech must be this much louder than the expected speaker echo and the noise floor
+    BARGE_IN_INITIAL_ECHO_COUPLING = 0.5  # Starting guess of mic level per unit of playback level
+
+    # Phrase-level TTS cache keyed by (engine, voice, text)
+    TTS_CACHE_ENABLED = True
+    TTS_CACHE_DIR = "tts_cache"
+    TTS_CACHE_MEMORY_ENTRIES = 64  # Clips kept in memory
+    TTS_CACHE_MAX_MB = 50          # Disk store is trimmed back under this size
+
+    # Startup warm-up of models, engines and audio devices (see voice_assistant/warmup.py)
+    WARM_UP_TIMEOUT = 120  # Seconds to wait for every component before listening anyway (None waits forever)
+
+    # Conversation pipeline queue depths (see voice_assistant/conversation.py)
+    PIPELINE_SENTENCE_QUEUE_SIZE = 4  # Sentences generated ahead of speech synthesis
+    PIPELINE_AUDIO_QUEUE_SIZE = 2     # Synthesized sentences waiting for playback
+
     @staticmethod
     def validate_config():
         """
@@ -86,7 +188,7 @@ class Config:
             ValueError: If a required environment variable is not set.
         """
         Config._validate_model('TRANSCRIPTION_MODEL', [
-            'openai', 'groq', 'deepgram', 'faster-whisper', 'local'])
+            'openai', 'groq', 'deepgram', 'faster-whisper', 'server', 'local'])
         Config._validate_model('RESPONSE_MODEL', [
             'openai', 'groq', 'ollama', 'local'])
         Config._validate_model('TTS_MODEL', [
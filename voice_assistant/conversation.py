@@ -0,0 +1,313 @@
+# voice_assistant/conversation.py
+
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+
+from voice_assistant.audio import record_audio, play_audio, play_pcm_stream, stop_audio
+from voice_assistant.backends import backend_available
+from voice_assistant.barge_in import BargeInMonitor, playback_level_available
+from voice_assistant.config import Config
+from voice_assistant.microphone import get_microphone_stream
+from voice_assistant.response_generation import generate_response_stream
+from voice_assistant.playback import SOUNDDEVICE_AVAILABLE
+from voice_assistant.text_to_speech import STREAMING_TTS_MODELS
+from voice_assistant.tts_cache import cached_speech_stream, cached_text_to_speech
+from voice_assistant.tracing import record_span, trace_event, trace_span
+from voice_assistant.transcription import IncrementalTranscriber, transcribe_audio
+from voice_assistant.utils import delete_file
+
+# Marks the end of a turn in the stage queues
+_END_OF_TURN = object()
+
+
+class _SpeechStream:
+    """
+    One sentence's audio, written chunk by chunk by the TTS stage and played as it arrives.
+    """
+
+    def __init__(self):
+        self._chunks = queue.Queue()
+
+    def put(self, chunk):
+        self._chunks.put(chunk)
+
+    def close(self):
+        self._chunks.put(_END_OF_TURN)
+
+    def __iter__(self):
+        while True:
+            chunk = self._chunks.get()
+            if chunk is _END_OF_TURN:
+                return
+            yield chunk
+
+
+class ConversationEngine:
+    """
+    Pipelined STT -> LLM -> TTS -> playback conversation loop.
+
+    Each reply runs as three stages connected by bounded queues:
+    the LLM stream produces sentences, a TTS worker synthesizes them, and a playback
+    worker plays them in order. Sentence N+1 is synthesized while sentence N plays,
+    and the first sentence starts playing while the LLM is still generating the rest.
+
+    Attributes:
+        sentence_queue_size (int): Max sentences waiting for synthesis.
+        audio_queue_size (int): Max synthesized sentences waiting for playback.
+    """
+
+    def __init__(self, transcription_model=None, response_model=None, tts_model=None,
+                 sentence_queue_size=None, audio_queue_size=None, debug_audio_path=None):
+        self.transcription_model = transcription_model or Config.TRANSCRIPTION_MODEL
+        self.response_model = response_model or Config.RESPONSE_MODEL
+        self.tts_model = tts_model or Config.TTS_MODEL
+        self.sentence_queue_size = sentence_queue_size or Config.PIPELINE_SENTENCE_QUEUE_SIZE
+        self.audio_queue_size = audio_queue_size or Config.PIPELINE_AUDIO_QUEUE_SIZE
+        self.debug_audio_path = debug_audio_path
+
+        self._sentences = None
+        self._audio = None
+        self._played = []  # Sentences of the current reply that reached the speaker
+        self._cancelled = threading.Event()
+        # Frame index where the user interrupted the last reply, picked up by the next listen()
+        self._barge_in_index = None
+
+        self.barge_in = Config.BARGE_IN_ENABLED and Config.KEEP_MICROPHONE_OPEN
+        if self.barge_in and not playback_level_available():
+            # Without the output level the assistant's own voice can't be told from the user's
+            logging.warning("⚠️ Barge-in disabled - it needs sounddevice playback (PLAYBACK_ENGINE = 'sounddevice')")
+            self.barge_in = False
+
+    def queue_depths(self):
+        """
+        Return the current number of items waiting in each stage queue.
+        """
+        return {
+            "sentences": self._sentences.qsize() if self._sentences else 0,
+            "audio": self._audio.qsize() if self._audio else 0,
+        }
+
+    def listen(self, wake_word_mode=False, stop_when=None):
+        """
+        Record the next utterance and return its transcription ('' if nothing was understood).
+
+        Args:
+            wake_word_mode (bool): Use the wake word recording settings.
+            stop_when (callable): Checked against partial transcriptions while the user is
+                still talking; returning True ends the recording and returns that partial.
+        """
+        start_index = None
+        if self._barge_in_index is not None:
+            # The user already started talking over the last reply - capture from that point
+            start_index, self._barge_in_index = self._barge_in_index, None
+
+        if self._streaming_transcription_available():
+            return self._listen_incrementally(wake_word_mode, start_index, stop_when)
+
+        audio = record_audio(self.debug_audio_path, wake_word_mode=wake_word_mode, start_index=start_index)
+        return transcribe_audio(self.transcription_model, None, audio, Config.LOCAL_MODEL_PATH)
+
+    def _streaming_transcription_available(self):
+        return (Config.STREAMING_TRANSCRIPTION and Config.KEEP_MICROPHONE_OPEN
+                and self.transcription_model == 'faster-whisper' and backend_available('faster-whisper'))
+
+    def _listen_incrementally(self, wake_word_mode, start_index, stop_when):
+        early_result = []
+
+        def on_partial(partial):
+            if stop_when and stop_when(partial):
+                early_result.append(partial)
+
+        transcriber = IncrementalTranscriber(on_partial=on_partial)
+
+        def on_speech(pcm):
+            transcriber.append(pcm)
+            return bool(early_result)
+
+        try:
+            record_audio(self.debug_audio_path, wake_word_mode=wake_word_mode, use_fallback=False,
+                         start_index=start_index, on_speech=on_speech)
+        finally:
+            final_text = transcriber.finish()
+        return early_result[0] if early_result else final_text
+
+    def say(self, text):
+        """
+        Speak a fixed piece of text through the same TTS and playback stages.
+        """
+        return self._run_pipeline(iter([text]))
+
+    def respond(self, chat_history):
+        """
+        Generate, synthesize and play a reply to the chat history.
+
+        Returns:
+            str: The full spoken reply, for appending to the chat history.
+        """
+        sentences = generate_response_stream(self.response_model, None, chat_history, Config.LOCAL_MODEL_PATH,
+                                             cancelled=self._cancelled)
+        return self._run_pipeline(sentences)
+
+    def cancel(self):
+        """
+        Stop the current reply: drop queued sentences and audio, stop generating and stop playback.
+        """
+        self._cancelled.set()
+        stop_audio()
+
+    @property
+    def interrupted(self):
+        """True if the user barged in on the last reply."""
+        return self._barge_in_index is not None
+
+    def _on_barge_in(self):
+        self._barge_in_index = self._monitor.speech_start
+        self.cancel()
+
+    def _output_file(self):
+        # A private temporary file, so concurrent engines or processes never share one
+        fd, path = tempfile.mkstemp(prefix="voice_assistant_", suffix=".wav")
+        os.close(fd)
+        return path
+
+    def _streaming_tts_available(self):
+        return (Config.TTS_STREAMING and self.tts_model in STREAMING_TTS_MODELS
+                and Config.PLAYBACK_ENGINE == 'sounddevice' and SOUNDDEVICE_AVAILABLE)
+
+    def _run_pipeline(self, sentences):
+        self._cancelled.clear()
+        self._sentences = queue.Queue(maxsize=self.sentence_queue_size)
+        self._audio = queue.Queue(maxsize=self.audio_queue_size)
+        self._played = []
+
+        tts_worker = threading.Thread(target=self._tts_stage, name="tts-stage", daemon=True)
+        playback_worker = threading.Thread(target=self._playback_stage, name="playback-stage", daemon=True)
+        tts_worker.start()
+        playback_worker.start()
+
+        self._barge_in_index = None
+        self._monitor = None
+        if self.barge_in:
+            self._monitor = BargeInMonitor(get_microphone_stream(), self._on_barge_in)
+            self._monitor.start()
+
+        try:
+            for sentence in sentences:
+                if self._cancelled.is_set():
+                    break
+                logging.info(f"Windy: {sentence}")
+                self._put(self._sentences, sentence)
+        finally:
+            if hasattr(sentences, 'close'):
+                sentences.close()  # Stops the upstream LLM stream if we broke out early
+            self._put(self._sentences, _END_OF_TURN, force=True)
+
+        tts_worker.join()
+        playback_worker.join()
+        if self._monitor is not None:
+            self._monitor.stop()
+        # Only what the user actually heard goes into the chat history - not sentences
+        # that failed to synthesize or were still queued when they barged in
+        return " ".join(self._played)
+
+    def _put(self, stage_queue, item, force=False):
+        """Put into a bounded queue, giving up if the turn is cancelled (unless forced)."""
+        while True:
+            cancelled = self._cancelled.is_set()
+            if cancelled and not force:
+                return False
+            try:
+                stage_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if cancelled:
+                    self._drain(stage_queue)
+
+    def _drain(self, stage_queue):
+        """Discard everything waiting in a queue, deleting any synthesized audio files."""
+        while True:
+            try:
+                item = stage_queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, tuple) and isinstance(item[1], str):
+                delete_file(item[1])
+
+    def _tts_stage(self):
+        streaming = self._streaming_tts_available()
+        while True:
+            sentence = self._sentences.get()
+            if sentence is _END_OF_TURN:
+                break
+            if self._cancelled.is_set():
+                continue
+            if streaming:
+                self._stream_sentence(sentence)
+                continue
+            output_file = self._output_file()
+            try:
+                with trace_span("tts", words=len(sentence.split())):
+                    cached_text_to_speech(self.tts_model, None, sentence, output_file, Config.LOCAL_MODEL_PATH)
+                trace_event("tts_first_audio", once=True)
+            except Exception as e:
+                logging.error(f"Failed to synthesize sentence: {e}")
+                delete_file(output_file)
+                continue
+            if not self._put(self._audio, (sentence, output_file)):
+                delete_file(output_file)
+
+        if self._cancelled.is_set():
+            self._drain(self._audio)
+        self._put(self._audio, _END_OF_TURN, force=True)
+
+    def _stream_sentence(self, sentence):
+        """Queue the sentence for playback right away, then feed it audio as the TTS engine delivers it."""
+        speech = _SpeechStream()
+        if not self._put(self._audio, (sentence, speech)):
+            return
+        try:
+            with trace_span("tts", words=len(sentence.split())):
+                for chunk in cached_speech_stream(self.tts_model, None, sentence):
+                    trace_event("tts_first_audio", once=True)
+                    speech.put(chunk)
+                    if self._cancelled.is_set():
+                        break
+        except Exception as e:
+            logging.error(f"Failed to synthesize sentence: {e}")
+        finally:
+            speech.close()
+
+    def _playback_stage(self):
+        while True:
+            item = self._audio.get()
+            if item is _END_OF_TURN:
+                break
+            sentence, output_file = item
+            if not self._cancelled.is_set():
+                if self._audio.empty() and self._sentences.empty():
+                    self._arm_microphone()
+                started_at = time.monotonic()
+                if isinstance(output_file, _SpeechStream):
+                    played = play_pcm_stream(output_file)
+                else:
+                    played = play_audio(output_file)
+                if played is not None:
+                    started_at, finished_at = played.started_at, played.finished_at  # DAC timestamps
+                else:
+                    finished_at = time.monotonic()
+                if started_at is not None:  # None if nothing reached the speaker (failed or cancelled)
+                    self._played.append(sentence)
+                    record_span("playback", started_at, finished_at)
+                    trace_event("playback_start", at=started_at, once=True)
+                    trace_event("playback_end", at=finished_at)
+            if isinstance(output_file, str):
+                delete_file(output_file)
+
+    def _arm_microphone(self):
+        """Make sure the microphone is capturing before the tail of the reply finishes playing."""
+        if Config.KEEP_MICROPHONE_OPEN:
+            get_microphone_stream().start()
@@ -0,0 +1,276 @@
+# voice_assistant/intents.py
+
+import datetime
+import logging
+import re
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+from voice_assistant.audio import get_volume, set_volume
+from voice_assistant.config import Config
+
+# What a matched intent asks the conversation loop to do. action is None for plain
+# answers, or 'sleep', 'shutdown' or 'stop' for control commands.
+IntentResult = namedtuple("IntentResult", ["intent", "response", "action"])
+
+# Actions that end the current turn immediately
+CONTROL_ACTIONS = ('sleep', 'shutdown')
+
+# Longer utterances are questions for the LLM, whatever words they contain
+MAX_COMMAND_WORDS = 12
+
+# Politeness and addressing the assistant by name, allowed around every built-in command
+_LEAD = r"^(?:(?:hey|ok|okay|so|um|uh) )?(?:(?:windy|wendy) )?(?:(?:please|can you|could you|would you) )?"
+_TRAIL = r"(?: (?:please|windy|wendy|right now|now|thanks|thank you))*$"
+
+# The only sleep phrases acted on mid-utterance. A partial "turn off" may still become
+# "turn off the oven timer", but nobody continues after "bye windy".
+_PARTIAL_SLEEP = re.compile(r"^(?:ok |okay )?(?:(?:good ?)?bye|see you later|sleep|stop) (?:windy|wendy)$")
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "fifteen": 15, "twenty": 20, "thirty": 30, "forty": 40, "forty five": 45,
+    "fifty": 50, "sixty": 60, "ninety": 90,
+}
+_NUMBER = r"(?:\d+|" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True)) + r")"
+_UNIT_SECONDS = {"second": 1, "minute": 60, "hour": 3600}
+_VOLUME_STEP = 0.2
+
+
+def _parse_number(text):
+    return int(text) if text.isdigit() else _NUMBER_WORDS[text]
+
+
+def _normalize(text):
+    text = re.sub(r"[^\w\s%]", " ", text.lower().replace("'", ""))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _command(*bodies):
+    """Anchor alternative phrasings so they only match an utterance that is just the command."""
+    return _LEAD + "(?:" + "|".join(bodies) + ")" + _TRAIL
+
+
+def _time_answer():
+    now = datetime.datetime.now()
+    # %-I is glibc-only, so the hour is formatted by hand
+    return f"It's {now.hour % 12 or 12}:{now:%M %p}."
+
+
+def _date_answer():
+    now = datetime.datetime.now()
+    return f"Today is {now:%A, %B} {now.day}."
+
+
+def _describe_duration(seconds):
+    for unit, size in (("hour", 3600), ("minute", 60), ("second", 1)):
+        if seconds >= size and seconds % size == 0:
+            count = seconds // size
+            return f"{count} {unit}" + ("s" if count != 1 else "")
+    return f"{seconds} seconds"
+
+
+class IntentRouter:
+    """
+    Answers simple deterministic requests locally before anything reaches the LLM.
+
+    Each intent has one or more regular expressions and a handler. All patterns are
+    also compiled into a single alternation, so the common case - an utterance that
+    matches nothing and must go to the LLM - is rejected with one regex scan. Intents
+    are tried in registration order, which sets their priority (sleep before stop, etc.).
+
+    The built-in patterns are anchored to the whole utterance: "turn off" is a command,
+    "how do I turn off dark mode" is a question for the LLM.
+    """
+
+    def __init__(self, announce=None):
+        self.announce = announce  # Called with text when a timer finishes
+        self.last_response = None
+        self._intents = []
+        self._index = None
+        self._timers = []
+        self._timers_lock = threading.Lock()
+        self._register_builtin_intents()
+
+    def register(self, name, patterns, handler):
+        """
+        Add an intent.
+
+        Args:
+            name (str): Intent name, reported in IntentResult.intent.
+            patterns (list): Regular expressions matched against the normalized utterance
+                (lowercase, no punctuation or apostrophes). Anchor them with ^ and $ unless
+                the words are a command wherever they appear.
+            handler (callable): Called with the re.Match; returns an IntentResult.
+        """
+        self._intents.append((name, [re.compile(pattern) for pattern in patterns], handler))
+        # Named groups may repeat across intents, so the combined index uses plain groups
+        self._index = re.compile("|".join(
+            "(?:" + re.sub(r"\(\?P<\w+>", "(?:", pattern.pattern) + ")"
+            for _, compiled, _ in self._intents for pattern in compiled))
+
+    def match(self, text):
+        """
+        Find the intent an utterance matches without running its handler.
+
+        Returns:
+            tuple: (name, handler, re.Match), or None if the utterance should go to the LLM.
+        """
+        normalized = _normalize(text or "")
+        if not normalized or self._index is None or len(normalized.split()) > MAX_COMMAND_WORDS:
+            return None
+        if not self._index.search(normalized):
+            return None
+        for name, patterns, handler in self._intents:
+            for pattern in patterns:
+                found = pattern.search(normalized)
+                if found:
+                    return name, handler, found
+        return None
+
+    def control_action(self, text, partial=False):
+        """
+        Return 'sleep' or 'shutdown' if the text is one of those commands, else None.
+
+        Args:
+            partial (bool): The text is a partial transcription of an utterance still in
+                progress. Only sleep phrases that address the assistant by name count, and
+                shutdown never does - the rest of the sentence could change its meaning.
+        """
+        if partial:
+            return 'sleep' if _PARTIAL_SLEEP.match(_normalize(text or "")) else None
+        matched = self.match(text)
+        if matched is None:
+            return None
+        name, _, _ = matched
+        return name if name in CONTROL_ACTIONS else None
+
+    def route(self, text):
+        """
+        Handle an utterance locally if it matches an intent.
+
+        Returns:
+            IntentResult: The local answer or action, or None to fall through to the LLM.
+        """
+        matched = self.match(text)
+        if matched is None:
+            return None
+        name, handler, found = matched
+        result = handler(found)
+        logging.info(f"⚡ Intent '{name}' handled locally")
+        return result
+
+    def _register_builtin_intents(self):
+        self.register('sleep', [_command(
+            r"(?:good ?)?bye (?:windy|wendy)",
+            r"see you later (?:windy|wendy)",
+            r"(?:sleep|stop) (?:windy|wendy)",
+            r"turn (?:yourself )?off",
+            r"shut down",
+            r"go (?:back )?to sleep",
+            r"stop listening",
+        )], lambda found: IntentResult('sleep', None, 'sleep'))
+        self.register('shutdown', [_command(
+            r"shutdown",
+            r"exit(?: the)? program",
+            r"quit(?: the program)?",
+        )], lambda found: IntentResult('shutdown', None, 'shutdown'))
+        self.register('cancel_timer', [_command(
+            r"(?:cancel|stop|delete) (?:the |my |all (?:the |my )?)?timers?",
+        )], self._cancel_timers)
+        self.register('timer', [
+            _command(rf"(?:set |start )?(?:a |the )?timer for (?P<count>{_NUMBER}) (?P<unit>second|minute|hour)s?"),
+            _command(rf"(?:set |start )?(?:a |an )?(?P<count>{_NUMBER}) (?P<unit>second|minute|hour)s? timer"),
+        ], self._set_timer)
+        self.register('volume', [
+            _command(r"(?:set |change )?(?:the )?volume (?:to )?(?P<level>\d{1,3})(?: ?%| percent)?"),
+            _command(r"(?:turn (?:it |the volume |the sound )?|volume )(?P<direction>up|down)"),
+            _command(r"(?:speak |talk |be )?(?:a (?:bit |little )?)?(?P<direction>louder|quieter|softer)"),
+            _command(r"(?P<direction>mute|unmute)(?: yourself| the sound)?"),
+        ], self._change_volume)
+        self.register('repeat', [_command(
+            r"(?:sorry |what )?(?:repeat(?: that| yourself| it)?|pardon(?: me)?)",
+            r"say (?:that|it) again",
+            r"what did you (?:just )?say",
+        )], self._repeat)
+        self.register('time', [_command(
+            # "what time is it in Tokyo" doesn't match - that needs the LLM
+            r"what time is it",
+            r"what(?:s| is) the (?:current )?time",
+            r"tell me the time",
+            r"current time",
+        )], lambda found: IntentResult('time', _time_answer(), None))
+        self.register('date', [_command(
+            r"what(?:s| is)? (?:the |todays )?date(?: today)?",
+            r"what day is (?:it|today)(?: today)?",
+            r"todays date",
+        )], lambda found: IntentResult('date', _date_answer(), None))
+        self.register('stop', [_command(
+            r"(?:stop|cancel|never ?mind|be quiet|quiet|shut up|thats enough)(?: it| that)?",
+        )], lambda found: IntentResult('stop', None, 'stop'))
+
+    def _set_timer(self, found):
+        seconds = _parse_number(found.group("count")) * _UNIT_SECONDS[found.group("unit")]
+        description = _describe_duration(seconds)
+
+        timer = threading.Timer(seconds, self._timer_finished, args=(description,))
+        timer.daemon = True
+        with self._timers_lock:
+            self._timers.append(timer)
+        timer.start()
+        return IntentResult('timer', f"Timer set for {description}.", None)
+
+    def _timer_finished(self, description):
+        with self._timers_lock:
+            self._timers = [timer for timer in self._timers if timer.is_alive() and timer is not threading.current_thread()]
+        message = f"Your {description} timer is done."
+        logging.info(f"⏰ {message}")
+        if self.announce:
+            try:
+                self.announce(message)
+            except Exception as e:
+                logging.error(f"Failed to announce timer: {e}")
+
+    def _cancel_timers(self, found):
+        with self._timers_lock:
+            timers, self._timers = self._timers, []
+        for timer in timers:
+            timer.cancel()
+        if not timers:
+            return IntentResult('cancel_timer', "There are no timers running.", None)
+        return IntentResult('cancel_timer', "Timer cancelled." if len(timers) == 1 else "All timers cancelled.", None)
+
+    def _change_volume(self, found):
+        groups = found.groupdict()
+        if groups.get("level"):
+            level = int(groups["level"]) / 100.0
+        else:
+            direction = groups["direction"]
+            level = {
+                "up": get_volume() + _VOLUME_STEP,
+                "louder": get_volume() + _VOLUME_STEP,
+                "down": get_volume() - _VOLUME_STEP,
+                "quieter": get_volume() - _VOLUME_STEP,
+                "softer": get_volume() - _VOLUME_STEP,
+                "mute": 0.0,
+                "unmute": Config.PLAYBACK_VOLUME or 1.0,
+            }[direction]
+        level = set_volume(level)
+        if level == 0.0:
+            return IntentResult('volume', None, None)  # Nothing to hear the confirmation with
+        return IntentResult('volume', f"Volume set to {int(round(level * 100))} percent.", None)
+
+    def _repeat(self, found):
+        if not self.last_response:
+            return IntentResult('repeat', "I haven't said anything yet.", None)
+        return IntentResult('repeat', self.last_response, None)
+
+
+@lru_cache(maxsize=None)
+def get_intent_router():
+    """
+    Return the shared intent router (timers keep running across conversation sessions).
+    """
+    return IntentRouter()
@@ -0,0 +1,129 @@
+# voice_assistant/memory.py
+
+import collections
+import logging
+
+from voice_assistant.config import Config
+
+# Extra tokens each chat message costs for its role and delimiters
+_MESSAGE_OVERHEAD_TOKENS = 4
+# Words kept from an evicted message in the rolling summary
+_SUMMARY_FRAGMENT_WORDS = 12
+
+
+def estimate_tokens(text):
+    """
+    Cheap, deliberately pessimistic token estimate (about 3 characters per token).
+
+    Real tokenizers average closer to 4 characters per token for English, so prompts
+    sized with this estimate fit the model's context with room to spare.
+    """
+    return len(text) // 3 + 1
+
+
+def _message_tokens(message):
+    return estimate_tokens(message["content"]) + _MESSAGE_OVERHEAD_TOKENS
+
+
+class ConversationMemory:
+    """
+    Chat history that always fits the model's context window.
+
+    Holds exactly one system prompt, a sliding window of the most recent turns and a
+    compact rolling summary of turns that fell out of the window. The prompt built by
+    messages() stays within LLM_CONTEXT_TOKENS minus the tokens reserved for the reply,
+    so its size - and the model's prompt evaluation time - stays flat however long
+    the session runs.
+    """
+
+    def __init__(self, system_prompt, context_tokens=None, reply_tokens=None, max_turns=None, summary_tokens=None):
+        self.system_prompt = system_prompt.strip()
+        self.context_tokens = context_tokens or Config.LLM_CONTEXT_TOKENS
+        self.reply_tokens = reply_tokens or Config.MAX_RESPONSE_TOKENS
+        self.max_messages = 2 * (max_turns or Config.CHAT_HISTORY_MAX_TURNS)
+        self.summary_tokens = summary_tokens or Config.CHAT_SUMMARY_MAX_TOKENS
+        self._recent = []
+        self._summary = collections.deque()
+
+    @property
+    def history_budget(self):
+        """Tokens available for recent turns once the system prompt, summary and reply are reserved."""
+        reserved = self.reply_tokens + estimate_tokens(self.system_prompt) + self.summary_tokens
+        return max(0, self.context_tokens - reserved - 2 * _MESSAGE_OVERHEAD_TOKENS)
+
+    def add(self, role, content):
+        """
+        Append a user or assistant message, evicting old turns into the summary as needed.
+        """
+        if role == "system":
+            # The memory owns the one system prompt - never stack another on top
+            self.system_prompt = content.strip()
+        else:
+            self._recent.append({"role": role, "content": content})
+        self._trim()
+
+    def clear(self):
+        self._recent = []
+        self._summary.clear()
+
+    def _summary_text(self):
+        if not self._summary:
+            return ""
+        return "Earlier in this conversation: " + " ".join(self._summary)
+
+    def _summarize(self, message):
+        words = message["content"].split()
+        fragment = " ".join(words[:_SUMMARY_FRAGMENT_WORDS])
+        speaker = "The user said" if message["role"] == "user" else "You replied"
+        self._summary.append(f"{speaker}: {fragment.rstrip('.')}.")
+        while self._summary and estimate_tokens(self._summary_text()) > self.summary_tokens:
+            self._summary.popleft()  # Forget the oldest context first
+
+    def _over_limit(self, max_messages, budget):
+        return len(self._recent) > 1 and (
+            len(self._recent) > max_messages or
+            sum(_message_tokens(message) for message in self._recent) > budget)
+
+    def _oldest_turn_length(self):
+        # A turn is a user message and the replies after it - evicting whole turns keeps the
+        # window starting with a user message, which some chat templates require
+        for index, message in enumerate(self._recent[1:], start=1):
+            if message["role"] == "user":
+                return index
+        return len(self._recent)
+
+    def _trim(self):
+        budget = self.history_budget
+        if self._over_limit(self.max_messages, budget):
+            # Evict several turns at once: every eviction changes the prompt right after the
+            # system prompt, so batching them lets the model's prefix cache hit on most turns
+            evict_messages = 2 * Config.CHAT_HISTORY_EVICT_TURNS
+            low_budget = budget * max(0.0, 1.0 - evict_messages / float(self.max_messages))
+            while self._over_limit(self.max_messages - evict_messages, low_budget):
+                turn_length = self._oldest_turn_length()
+                if turn_length == len(self._recent):
+                    break  # Only the current turn is left
+                for message in self._recent[:turn_length]:
+                    self._summarize(message)
+                del self._recent[:turn_length]
+
+        newest = self._recent[-1] if self._recent else None
+        if newest is not None and _message_tokens(newest) > budget:
+            # A single message larger than the whole budget - keep its most recent part
+            max_chars = max(0, (budget - _MESSAGE_OVERHEAD_TOKENS - 1) * 3)
+            newest["content"] = newest["content"][-max_chars:] if max_chars else ""
+            logging.warning("⚠️ Message too long for the context window - truncated")
+
+    def messages(self):
+        """
+        Return the prompt messages: one system message (with the summary) followed by recent turns.
+        """
+        system_content = self.system_prompt
+        summary = self._summary_text()
+        if summary:
+            system_content += "\n\n" + summary
+        return [{"role": "system", "content": system_content}] + [dict(message) for message in self._recent]
+
+    def token_count(self):
+        """Estimated tokens in the prompt built by messages()."""
+        return sum(_message_tokens(message) for message in self.messages())
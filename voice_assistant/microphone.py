@@ -0,0 +1,258 @@
+# voice_assistant/microphone.py
+
+import collections
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+import speech_recognition as sr
+
+from voice_assistant.audio_buffer import AudioBuffer, TARGET_SAMPLE_RATE
+from voice_assistant.config import Config
+from voice_assistant.tracing import record_span, trace_event
+from voice_assistant.vad import VoiceActivityDetector
+
+
+def frame_rms(pcm):
+    """Root-mean-square energy of 16-bit PCM, on the same scale as speech_recognition's threshold."""
+    samples = np.frombuffer(pcm, dtype='<i2').astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+
+
+class MicrophoneStream:
+    """
+    Long-lived microphone capture that keeps the input device open.
+
+    A background thread reads fixed-size frames into a ring buffer and keeps a running
+    noise-floor estimate, so listen() can cut utterances out of the buffer (including
+    pre-roll audio from before the energy trigger) without re-opening the device or
+    re-calibrating on every call.
+    """
+
+    def __init__(self, sample_rate=TARGET_SAMPLE_RATE, frame_ms=30, buffer_seconds=30,
+                 pre_roll_seconds=0.5, device_index=None):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_duration = self.frame_samples / float(sample_rate)
+        self.pre_roll_frames = int(pre_roll_seconds / self.frame_duration)
+        self.device_index = device_index
+
+        self.noise_floor = None
+        self.noise_floor_multiplier = getattr(Config, 'MIC_NOISE_FLOOR_MULTIPLIER', 3.0)
+        self.min_energy_threshold = getattr(Config, 'MIC_MIN_ENERGY_THRESHOLD', 300)
+        # Roughly two seconds of quiet audio to fully re-adapt the noise floor
+        self._noise_alpha = min(1.0, self.frame_duration / 2.0)
+
+        # Ring buffer of (frame_index, pcm, rms); the oldest frames fall off automatically
+        self._frames = collections.deque(maxlen=int(buffer_seconds / self.frame_duration))
+        self._next_index = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._error = None
+
+    @property
+    def energy_threshold(self):
+        """Current trigger level derived from the running noise floor."""
+        if self.noise_floor is None:
+            return self.min_energy_threshold
+        return max(self.noise_floor * self.noise_floor_multiplier, self.min_energy_threshold)
+
+    def start(self):
+        """Open the device and start the capture thread (no-op if already running)."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._error = None
+        self._thread = threading.Thread(target=self._capture_loop, name="microphone-capture", daemon=True)
+        self._thread.start()
+
+    def wait_until_ready(self, timeout=None):
+        """
+        Start the stream and block until the first frame has been captured.
+
+        Returns:
+            bool: True once audio is flowing, False if it didn't start within timeout.
+
+        Raises:
+            OSError: If the input device could not be opened.
+        """
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return self._wait_for_frame(0, deadline) is not None
+
+    def stop(self):
+        """Stop capturing and release the input device."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _capture_loop(self):
+        try:
+            open_started = time.monotonic()
+            with sr.Microphone(device_index=self.device_index, sample_rate=self.sample_rate,
+                               chunk_size=self.frame_samples) as source:
+                record_span("mic_open", open_started, time.monotonic())
+                logging.info("🎙️ Microphone stream opened")
+                while self._running:
+                    pcm = source.stream.read(self.frame_samples)
+                    self._push_frame(pcm)
+        except Exception as e:
+            logging.error(f"🔧 Microphone stream error: {e}")
+            with self._condition:
+                self._error = e
+        finally:
+            with self._condition:
+                self._running = False
+                self._condition.notify_all()
+
+    def _push_frame(self, pcm):
+        rms = frame_rms(pcm)
+        with self._condition:
+            if self.noise_floor is None:
+                self.noise_floor = rms
+            elif rms < self.energy_threshold:
+                # Only quiet frames move the noise floor, so speech doesn't raise it
+                self.noise_floor += self._noise_alpha * (rms - self.noise_floor)
+            self._frames.append((self._next_index, pcm, rms))
+            self._next_index += 1
+            self._condition.notify_all()
+
+    def _wait_for_frame(self, index, deadline):
+        """Return the buffered frame at index (or the oldest still buffered), waiting until deadline."""
+        with self._condition:
+            while index >= self._next_index:
+                if not self._running:
+                    raise OSError(f"Microphone stream is not running: {self._error}")
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            first_index = self._frames[0][0]
+            return self._frames[max(index, first_index) - first_index]
+
+    def _collect(self, start_index, end_index):
+        with self._condition:
+            return b"".join(pcm for index, pcm, _ in self._frames if start_index <= index <= end_index)
+
+    def audio_between(self, start_index, end_index):
+        """Return the buffered frames start_index..end_index (inclusive) as an AudioBuffer."""
+        return AudioBuffer(self._collect(start_index, end_index), self.sample_rate)
+
+    def iter_frames(self, timeout=None):
+        """
+        Yield (frame_index, pcm, rms) for each new frame as it is captured.
+
+        Stops once timeout seconds pass without a new frame being consumed.
+        """
+        self.start()
+        with self._condition:
+            index = self._next_index
+        while True:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            frame = self._wait_for_frame(index, deadline)
+            if frame is None:
+                return
+            yield frame
+            index = frame[0] + 1
+
+    def listen(self, timeout=None, phrase_time_limit=None, pause_threshold=0.8,
+               phrase_threshold=0.1, energy_threshold=None, start_index=None, on_speech=None):
+        """
+        Wait for the next utterance and return it from the ring buffer.
+
+        Args:
+            timeout (float): Maximum time to wait for speech to start (in seconds).
+            phrase_time_limit (float): Maximum length of the utterance (in seconds).
+            pause_threshold (float): Silence that ends the utterance (in seconds).
+            phrase_threshold (float): Minimum voiced time for a trigger to count as speech (in seconds).
+            energy_threshold (float): Fixed trigger level; None follows the running noise floor.
+            start_index (int): Scan from this already-buffered frame instead of from now
+                (used to pick up speech that interrupted playback).
+            on_speech (callable): Called with the utterance PCM as it is captured (pre-roll
+                first, then each frame); None means a false start was discarded. Returning
+                True ends the utterance immediately.
+
+        Returns:
+            AudioBuffer: The utterance, including pre-roll audio.
+
+        Raises:
+            sr.WaitTimeoutError: If no speech starts within the timeout.
+        """
+        self.start()
+        with self._condition:
+            index = self._next_index if start_index is None else start_index
+
+        wait_deadline = None if timeout is None else time.monotonic() + timeout
+        pause_frames = max(1, int(pause_threshold / self.frame_duration))
+        phrase_frames = max(1, int(phrase_threshold / self.frame_duration))
+        limit_frames = None if phrase_time_limit is None else int(phrase_time_limit / self.frame_duration)
+
+        # The VAD replaces the plain energy trigger unless a fixed threshold was requested
+        vad = VoiceActivityDetector(self.sample_rate) if Config.VAD_ENABLED and energy_threshold is None else None
+
+        speech_start = None
+        last_voiced = None
+        voiced_frames = 0
+        while True:
+            frame = self._wait_for_frame(index, wait_deadline if speech_start is None else None)
+            if frame is None:
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+            index, pcm, rms = frame
+            if vad is not None:
+                is_voiced = vad.is_speech(pcm, rms, self.noise_floor, self.frame_duration)
+            else:
+                threshold = energy_threshold if energy_threshold is not None else self.energy_threshold
+                is_voiced = rms > threshold
+
+            if speech_start is None:
+                if is_voiced:
+                    trace_event("speech_start")
+                    speech_start = index
+                    last_voiced = index
+                    voiced_frames = 1
+                    if on_speech and on_speech(self._collect(speech_start - self.pre_roll_frames, index)):
+                        break
+            else:
+                if on_speech and on_speech(pcm):
+                    break
+                if is_voiced:
+                    last_voiced = index
+                    voiced_frames += 1
+                if vad is not None:
+                    # Close clearly complete phrases after a short pause instead of the full pause_threshold
+                    silence = vad.endpoint_silence(voiced_frames * self.frame_duration, pause_threshold)
+                    pause_frames = max(1, int(silence / self.frame_duration))
+                if index - last_voiced >= pause_frames:
+                    if voiced_frames >= phrase_frames:
+                        break
+                    # Too short to be speech (a click or bump) - keep waiting
+                    speech_start = None
+                    if on_speech:
+                        on_speech(None)
+                elif limit_frames is not None and index - speech_start >= limit_frames:
+                    break
+            index += 1
+
+        trace_event("vad_end")
+        audio = AudioBuffer(self._collect(speech_start - self.pre_roll_frames, index), self.sample_rate)
+        logging.info(f"Captured {audio.duration:.2f}s utterance (noise floor {self.noise_floor:.0f})")
+        return audio
+
+
+@lru_cache(maxsize=None)
+def get_microphone_stream():
+    """
+    Return the shared, process-wide microphone stream.
+    """
+    return MicrophoneStream(
+        buffer_seconds=getattr(Config, 'MIC_RING_BUFFER_SECONDS', 30),
+        pre_roll_seconds=getattr(Config, 'MIC_PRE_ROLL_SECONDS', 0.5)
+    )
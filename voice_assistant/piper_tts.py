@@ -0,0 +1,181 @@
+# voice_assistant/piper_tts.py
+
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from functools import lru_cache
+
+from voice_assistant.audio_buffer import AudioBuffer
+from voice_assistant.backends import backend_available, load_backend
+from voice_assistant.config import Config
+from voice_assistant.tracing import trace_span
+
+# Common Raspberry Pi installation paths, checked after PATH
+PIPER_EXECUTABLE_PATHS = [
+    "/usr/local/bin/piper",
+    "/home/pi/.local/bin/piper",
+]
+
+
+@lru_cache(maxsize=None)
+def find_piper_executable():
+    """
+    Resolve the piper executable once per process.
+
+    Returns:
+        str: Path to the executable, or None if piper is not installed.
+    """
+    executable = shutil.which(Config.PIPER_EXECUTABLE)
+    if executable:
+        return executable
+    for path in PIPER_EXECUTABLE_PATHS:
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+class PiperEngine:
+    """
+    Long-lived Piper voice that loads the ONNX model once and returns raw PCM.
+
+    Uses the piper-tts Python package in-process when it is installed; otherwise keeps a
+    single piper child process running in JSON-input mode and feeds it one line per sentence.
+    """
+
+    def __init__(self, model_path=None):
+        self.model_path = model_path or Config.PIPER_MODEL_PATH
+        self._lock = threading.Lock()
+        self._voice = None
+        self._process = None
+        self._lines = None
+        self._output_dir = None
+
+        if backend_available('piper') and os.path.exists(self.model_path):
+            try:
+                piper_voice = load_backend('piper')
+            except ImportError as e:
+                logging.warning(f"⚠️ {e} - using the piper executable instead")
+            else:
+                logging.info(f"🔄 Loading Piper voice: {self.model_path}")
+                with trace_span("piper_load"):
+                    self._voice = piper_voice.PiperVoice.load(self.model_path)
+        if self._voice is None and not find_piper_executable():
+            raise FileNotFoundError("Piper is not installed (neither the piper-tts package nor the executable)")
+
+    @property
+    def sample_rate(self):
+        if self._voice is not None:
+            return self._voice.config.sample_rate
+        config_path = self.model_path + ".json"
+        if os.path.exists(config_path):
+            with open(config_path) as config_file:
+                return json.load(config_file)["audio"]["sample_rate"]
+        return 22050
+
+    def synthesize(self, text):
+        """
+        Synthesize text with the resident voice.
+
+        Returns:
+            AudioBuffer: 16-bit mono PCM at the voice's sample rate.
+        """
+        with self._lock:
+            if self._voice is not None:
+                return self._synthesize_in_process(text)
+            return self._synthesize_with_process(text)
+
+    def _synthesize_in_process(self, text):
+        if hasattr(self._voice, "synthesize_wav"):
+            # piper-tts >= 1.3 yields AudioChunk objects
+            pcm = b"".join(chunk.audio_int16_bytes for chunk in self._voice.synthesize(text))
+        else:
+            pcm = b"".join(self._voice.synthesize_stream_raw(text))
+        return AudioBuffer(pcm, sample_rate=self.sample_rate)
+
+    def _start_process(self):
+        command = [find_piper_executable(), "--json-input"]
+        if os.path.exists(self.model_path):
+            command += ["-m", self.model_path]
+        else:
+            logging.warning(f"Piper model not found at {self.model_path}, using default")
+        if self._output_dir is None:
+            self._output_dir = tempfile.mkdtemp(prefix="verbi_piper_")  # Kept across restarts
+        logging.info("🔄 Starting resident Piper process")
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1
+        )
+        # A blocking readline can't time out, so a thread hands piper's output over a queue
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read_lines, args=(self._process.stdout, self._lines), daemon=True).start()
+
+    @staticmethod
+    def _read_lines(stdout, lines):
+        for line in stdout:
+            lines.put(line.strip())
+        lines.put(None)  # The process exited
+
+    def _stop_process(self):
+        process, self._process = self._process, None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass  # Already gone
+        process.terminate()
+        try:
+            process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def _synthesize_with_process(self, text):
+        if self._process is None or self._process.poll() is not None:
+            self._start_process()
+
+        output_file = os.path.join(self._output_dir, "sentence.wav")
+        try:
+            self._process.stdin.write(json.dumps({"text": text, "output_file": output_file}) + "\n")
+            self._process.stdin.flush()
+        except OSError:
+            self._stop_process()
+            raise RuntimeError("Piper process exited unexpectedly")
+
+        # Piper prints the output path once the sentence has been written
+        try:
+            written_path = self._lines.get(timeout=Config.PIPER_SYNTHESIS_TIMEOUT)
+        except queue.Empty:
+            logging.warning(f"⚠️ Piper gave no audio within {Config.PIPER_SYNTHESIS_TIMEOUT}s - restarting it")
+            self._stop_process()
+            self._start_process()
+            raise TimeoutError("Piper did not finish the sentence in time")
+        if not written_path:
+            self._stop_process()
+            raise RuntimeError("Piper process exited unexpectedly")
+        try:
+            return AudioBuffer.from_wav_file(written_path)
+        finally:
+            os.remove(written_path)
+
+    def close(self):
+        """Stop the resident piper process, if any."""
+        if self._process is not None:
+            self._stop_process()
+        if self._output_dir is not None:
+            shutil.rmtree(self._output_dir, ignore_errors=True)
+            self._output_dir = None
+
+
+@lru_cache(maxsize=None)
+def get_piper_engine():
+    """
+    Return the shared Piper engine, loading the voice on first use.
+    """
+    return PiperEngine()
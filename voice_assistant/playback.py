@@ -0,0 +1,201 @@
+# voice_assistant/playback.py
+
+import collections
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from voice_assistant.audio_buffer import AudioBuffer
+from voice_assistant.config import Config
+
+# Optional import - only if available
+try:
+    import sounddevice as sd
+    SOUNDDEVICE_AVAILABLE = True
+except (ImportError, OSError):
+    SOUNDDEVICE_AVAILABLE = False
+    logging.warning("sounddevice not available - install with: pip install sounddevice")
+
+
+class PlaybackItem:
+    """
+    One queued clip (or stream of chunks) and its playback timestamps.
+
+    Attributes:
+        started_at (float): time.monotonic() when the first sample reached the DAC.
+        finished_at (float): time.monotonic() when the last sample reached the DAC.
+        cancelled (bool): True if playback was interrupted before the end.
+    """
+
+    def __init__(self):
+        self.chunks = collections.deque()
+        self.offset = 0  # Samples already played from chunks[0]
+        self.complete = False  # No more chunks will be added
+        self.started_at = None
+        self.finished_at = None
+        self.cancelled = False
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        """Block until the item has finished playing or was interrupted."""
+        return self.done.wait(timeout)
+
+
+class PlaybackEngine:
+    """
+    Persistent audio output stream that plays in-memory PCM gaplessly.
+
+    The output device is opened once; clips are queued and mixed into the stream
+    callback back to back, so there is no mixer start-up or polling delay between
+    sentences. Clips may also be fed chunk by chunk while they are still being produced.
+    """
+
+    def __init__(self, sample_rate=None, device=None):
+        if not SOUNDDEVICE_AVAILABLE:
+            raise RuntimeError("sounddevice package not installed. Use: pip install sounddevice")
+        self.sample_rate = sample_rate or Config.PLAYBACK_SAMPLE_RATE
+        self.volume = Config.PLAYBACK_VOLUME  # Software gain from 0.0 to 1.0
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+        # (dac_time, rms) of recent output blocks, used for echo suppression
+        self._levels = collections.deque(maxlen=256)
+        self._stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype='float32',
+            device=device,
+            latency='low',
+            callback=self._callback
+        )
+        self._stream.start()
+        logging.info(f"🔊 Audio output stream opened at {self.sample_rate} Hz")
+
+    @property
+    def is_playing(self):
+        with self._lock:
+            return bool(self._queue)
+
+    def recent_level(self, window=0.25):
+        """
+        Return the loudest output RMS (float scale) that reached the speaker in the last window seconds.
+        """
+        since = time.monotonic() - window
+        with self._lock:
+            return max((rms for dac_time, rms in self._levels if since <= dac_time), default=0.0)
+
+    def _to_samples(self, audio):
+        if isinstance(audio, AudioBuffer):
+            return audio.to_float32(sample_rate=self.sample_rate)
+        return np.asarray(audio, dtype=np.float32)
+
+    def play(self, audio, wait=False):
+        """
+        Queue a clip after anything already playing.
+
+        Args:
+            audio (AudioBuffer | np.ndarray): The clip; arrays are float32 at the engine's sample rate.
+            wait (bool): Block until the clip has finished playing.
+
+        Returns:
+            PlaybackItem: Handle with start/end timestamps.
+        """
+        item = PlaybackItem()
+        item.chunks.append(self._to_samples(audio))
+        item.complete = True
+        with self._lock:
+            self._queue.append(item)
+        if wait:
+            item.wait()
+        return item
+
+    def play_stream(self, chunks, wait=False):
+        """
+        Queue a clip whose audio is still arriving, playing each chunk as soon as it is added.
+
+        Args:
+            chunks (iterable): AudioBuffer or float32 array chunks, consumed on a background thread.
+            wait (bool): Block until the whole stream has finished playing.
+
+        Returns:
+            PlaybackItem: Handle with start/end timestamps.
+        """
+        item = PlaybackItem()
+        with self._lock:
+            self._queue.append(item)
+
+        def feed():
+            try:
+                for chunk in chunks:
+                    if item.cancelled:
+                        break
+                    samples = self._to_samples(chunk)
+                    with self._lock:
+                        item.chunks.append(samples)
+            except Exception as e:
+                logging.error(f"Audio stream failed while playing: {e}")
+            finally:
+                with self._lock:
+                    item.complete = True
+
+        threading.Thread(target=feed, name="playback-feed", daemon=True).start()
+        if wait:
+            item.wait()
+        return item
+
+    def stop(self):
+        """Interrupt the current clip and drop everything queued."""
+        with self._lock:
+            now = time.monotonic()
+            for item in self._queue:
+                item.cancelled = True
+                item.finished_at = now
+                item.done.set()
+            self._queue.clear()
+
+    def close(self):
+        self.stop()
+        self._stream.stop()
+        self._stream.close()
+
+    def _callback(self, outdata, frames, time_info, status):
+        # Map the stream clock onto time.monotonic() for the first sample of this block
+        dac_time = time.monotonic() + max(0.0, time_info.outputBufferDacTime - time_info.currentTime)
+        filled = 0
+        with self._lock:
+            while filled < frames and self._queue:
+                item = self._queue[0]
+                if not item.chunks:
+                    if item.complete:
+                        item.finished_at = dac_time + filled / float(self.sample_rate)
+                        item.done.set()
+                        self._queue.popleft()
+                        continue
+                    break  # Waiting for the next chunk of a stream - play silence meanwhile
+
+                if item.started_at is None:
+                    item.started_at = dac_time + filled / float(self.sample_rate)
+                chunk = item.chunks[0]
+                count = min(frames - filled, len(chunk) - item.offset)
+                outdata[filled:filled + count, 0] = chunk[item.offset:item.offset + count]
+                filled += count
+                item.offset += count
+                if item.offset >= len(chunk):
+                    item.chunks.popleft()
+                    item.offset = 0
+        outdata[filled:] = 0
+        if self.volume != 1.0:
+            outdata *= self.volume
+        level = float(np.sqrt(np.mean(outdata[:, 0] ** 2))) if frames else 0.0
+        with self._lock:
+            self._levels.append((dac_time, level))
+
+
+@lru_cache(maxsize=None)
+def get_playback_engine():
+    """
+    Return the shared playback engine, opening the output device on first use.
+    """
+    return PlaybackEngine()
@@ -0,0 +1,96 @@
+# voice_assistant/preprocessing.py
+
+import logging
+
+import numpy as np
+
+from voice_assistant.audio_buffer import AudioBuffer, TARGET_SAMPLE_RATE, load_audio
+from voice_assistant.config import Config
+
+# Analysis frame used for silence detection
+FRAME_SECONDS = 0.02
+
+
+def _dbfs_to_amplitude(dbfs):
+    return 10.0 ** (dbfs / 20.0)
+
+
+def _frame_rms(samples, frame_length):
+    """RMS of consecutive non-overlapping frames (the last partial frame is zero padded)."""
+    frame_count = -(-len(samples) // frame_length)
+    padded = np.zeros(frame_count * frame_length, dtype=np.float32)
+    padded[:len(samples)] = samples
+    frames = padded.reshape(frame_count, frame_length)
+    return np.sqrt(np.mean(frames ** 2, axis=1))
+
+
+def trim_silence(samples, sample_rate=TARGET_SAMPLE_RATE, threshold_dbfs=None, padding_seconds=None):
+    """
+    Cut leading and trailing silence from float32 samples.
+
+    A frame counts as sound when it is above both the absolute threshold and a few times
+    the recording's own noise floor (its quietest frames), so the trim adapts to noisy rooms.
+    A clip that is speech from start to end has no quiet frames to measure, so the relative
+    threshold is capped at half the level of the clip's loud frames.
+
+    Returns:
+        np.ndarray: The trimmed samples (empty if the whole recording is silent).
+    """
+    threshold_dbfs = Config.PREPROCESS_SILENCE_THRESHOLD_DBFS if threshold_dbfs is None else threshold_dbfs
+    padding_seconds = Config.PREPROCESS_TRIM_PADDING if padding_seconds is None else padding_seconds
+    if not len(samples):
+        return samples
+
+    frame_length = max(1, int(sample_rate * FRAME_SECONDS))
+    rms = _frame_rms(samples, frame_length)
+    absolute_threshold = _dbfs_to_amplitude(threshold_dbfs)
+    noise_floor = np.percentile(rms, 10)
+    speech_level = np.percentile(rms, 90)
+    relative_threshold = min(noise_floor * Config.MIC_NOISE_FLOOR_MULTIPLIER, speech_level / 2.0)
+    threshold = max(absolute_threshold, relative_threshold)
+
+    loud = np.flatnonzero(rms > threshold)
+    if not len(loud):
+        # Nothing above the silence threshold is silence; anything else is kept whole
+        return samples[:0] if rms.max() <= absolute_threshold else samples
+
+    padding = int(padding_seconds * sample_rate)
+    start = max(0, loud[0] * frame_length - padding)
+    end = min(len(samples), (loud[-1] + 1) * frame_length + padding)
+    return samples[start:end]
+
+
+def normalize_gain(samples, target_peak_dbfs=None, max_gain_db=None):
+    """
+    Scale samples so the peak sits at the target level, never boosting by more than max_gain_db.
+    """
+    target_peak_dbfs = Config.PREPROCESS_TARGET_PEAK_DBFS if target_peak_dbfs is None else target_peak_dbfs
+    max_gain_db = Config.PREPROCESS_MAX_GAIN_DB if max_gain_db is None else max_gain_db
+    peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+    if peak <= 0.0:
+        return samples
+    gain = min(_dbfs_to_amplitude(target_peak_dbfs) / peak, _dbfs_to_amplitude(max_gain_db))
+    return samples * np.float32(gain)
+
+
+def preprocess_audio(audio):
+    """
+    Prepare a recording for speech recognition.
+
+    Downmixes to mono, resamples to 16 kHz once, trims leading/trailing silence and
+    normalizes the gain, so every backend receives only the speech in the format
+    Whisper-family models use.
+
+    Args:
+        audio (AudioBuffer | str): In-memory audio or the path to a WAV file.
+
+    Returns:
+        AudioBuffer: 16 kHz mono 16-bit audio (empty if the recording is silent).
+    """
+    buffer = load_audio(audio)
+    samples = buffer.to_float32(sample_rate=TARGET_SAMPLE_RATE)
+    trimmed = trim_silence(samples)
+    if len(trimmed) < len(samples):
+        logging.info(f"✂️ Trimmed {(len(samples) - len(trimmed)) / TARGET_SAMPLE_RATE:.2f}s of silence "
+                     f"({buffer.duration:.2f}s -> {len(trimmed) / TARGET_SAMPLE_RATE:.2f}s)")
+    return AudioBuffer.from_float32(normalize_gain(trimmed))
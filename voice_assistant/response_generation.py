@@ -1,27 +1,151 @@
 # voice_assistant/response_generation.py
 
+import hashlib
 import logging
+import math
 import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
 
-# Only import what we need for Ollama
-import ollama
-
+from voice_assistant.backends import backend_available, load_backend
+from voice_assistant.clients import get_client
 from voice_assistant.config import Config
+from voice_assistant.tracing import record_span, trace_event, trace_span
+
+# Canned replies used when the model fails or its output is unusable
+ERROR_RESPONSE = "I'm having trouble processing that right now."
+EMPTY_RESPONSE = "I didn't catch that. Could you repeat?"
+CLEANED_AWAY_RESPONSE = "I'm here to help! What would you like to know?"
+TOO_LONG_RESPONSE = "That's an interesting question. Could you be more specific?"
+FALLBACK_RESPONSES = [ERROR_RESPONSE, EMPTY_RESPONSE, CLEANED_AWAY_RESPONSE, TOO_LONG_RESPONSE]
+
+# Words that make a question depend on the previous reply ("tell me more about it")
+_CONTEXT_WORDS = {"it", "its", "that", "this", "those", "these", "he", "she", "they", "them",
+                  "him", "her", "there", "more", "again", "else", "why", "also"}
+
+
+def _normalize_text(text):
+    """Lowercase, drop punctuation and collapse whitespace so trivially different phrasings match."""
+    text = re.sub(r"[^\w\s]", "", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+# Words that can differ between two phrasings of the same question
+_FILLER_WORDS = {"a", "an", "the", "is", "are", "was", "were", "what", "whats", "who", "whos", "how", "hows",
+                 "do", "does", "did", "of", "in", "on", "to", "for", "me", "tell", "please", "can", "could",
+                 "you", "i", "would", "like", "know", "about", "hey", "ok", "okay", "so", "just", "and"}
+
+
+def _content_words(text):
+    return set(text.split()) - _FILLER_WORDS
+
+
+def _ngram_vector(text, n=3):
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+def _cosine_similarity(a, b):
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+    return dot / norm if norm else 0.0
+
+
+class ResponseCache:
+    """
+    Cache of generated replies keyed on the normalized user question.
+
+    Entries are scoped to the model and system prompt, and - when the question refers
+    back to the conversation ("why is that?") - to the previous reply too. Lookups try
+    an exact match first and then, optionally, the most similar cached question by
+    character trigram cosine similarity. A near-duplicate must also use exactly the same
+    content words, because spelling alike is not meaning alike ("austria" and "australia"
+    score 0.9). Fuzzy matching is off unless a similarity is configured. Entries expire after a TTL and the least
+    recently used are evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries=None, ttl=None, similarity=None):
+        self.max_entries = Config.RESPONSE_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl = Config.RESPONSE_CACHE_TTL if ttl is None else ttl
+        self.similarity = Config.RESPONSE_CACHE_SIMILARITY if similarity is None else similarity
+        self._entries = OrderedDict()  # (scope, question) -> (sentences, vector, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def lookup_key(model, chat_history):
+        """
+        Return the (scope, question) key for the last user message, or None if there is none.
+        """
+        if not chat_history or chat_history[-1]["role"] != "user":
+            return None
+        question = _normalize_text(chat_history[-1]["content"])
+        if not question:
+            return None
+
+        scope = [model]
+        scope.extend(message["content"] for message in chat_history if message["role"] == "system")
+        if _CONTEXT_WORDS.intersection(question.split()):
+            previous = [message["content"] for message in chat_history[:-1] if message["role"] == "assistant"]
+            scope.append(previous[-1] if previous else "")
+        return hashlib.sha256("\0".join(scope).encode("utf-8")).hexdigest(), question
+
+    def get(self, key):
+        """Return the cached sentences for a key (or a near-duplicate question), or None."""
+        scope, question = key
+        now = time.time()
+        with self._lock:
+            for expired in [k for k, (_, _, stored_at) in self._entries.items() if now - stored_at > self.ttl]:
+                del self._entries[expired]
+
+            match = key if key in self._entries else None
+            if match is None and self.similarity:
+                vector = _ngram_vector(question)
+                words = _content_words(question)
+                best = 0.0
+                for candidate, (_, candidate_vector, _) in self._entries.items():
+                    # Only rephrasings qualify: "capital of niger" must not answer "capital of nigeria",
+                    # nor "2 plus 3" answer "2 plus 4"
+                    if candidate[0] != scope or _content_words(candidate[1]) != words:
+                        continue
+                    score = _cosine_similarity(vector, candidate_vector)
+                    if score >= self.similarity and score > best:
+                        match, best = candidate, score
+
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(match)
+            return list(self._entries[match][0])
+
+    def put(self, key, sentences):
+        with self._lock:
+            self._entries[key] = (list(sentences), _ngram_vector(key[1]), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
 
-# Optional imports for external APIs - only if available
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    logging.warning("OpenAI not available - install with: pip install openai")
+@lru_cache(maxsize=None)
+def get_response_cache():
+    """
+    Return the shared response cache.
+    """
+    return ResponseCache()
 
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
-    logging.warning("Groq not available - install with: pip install groq")
+
+def _cache_key(model, chat_history):
+    if not Config.RESPONSE_CACHE_ENABLED:
+        return None
+    return ResponseCache.lookup_key(model, chat_history)
 
 
 def generate_response(model:str, api_key:str, chat_history:list, local_model_path:str=None):
@@ -37,15 +161,22 @@ def generate_response(model:str, api_key:str, chat_history:list, local_model_pat
     Returns:
     str: The generated response text.
     """
+    key = _cache_key(model, chat_history)
+    if key is not None:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            logging.info("⚡ Response cache hit")
+            return " ".join(cached)
+
     try:
         if model == 'openai':
-            if not OPENAI_AVAILABLE:
+            if not backend_available('openai'):
                 logging.error("OpenAI package not available. Falling back to Ollama.")
                 response = _generate_ollama_response(chat_history)
             else:
                 response = _generate_openai_response(api_key, chat_history)
         elif model == 'groq':
-            if not GROQ_AVAILABLE:
+            if not backend_available('groq'):
                 logging.error("Groq package not available. Falling back to Ollama.")
                 response = _generate_ollama_response(chat_history)
             else:
@@ -59,16 +190,19 @@ def generate_response(model:str, api_key:str, chat_history:list, local_model_pat
             raise ValueError("Unsupported response generation model")
         
         # Clean the response before returning
-        return _clean_response(response)
+        response = _clean_response(response)
+        if key is not None and response not in FALLBACK_RESPONSES:
+            get_response_cache().put(key, [response])
+        return response
         
     except Exception as e:
         logging.error(f"Failed to generate response: {e}")
-        return "I'm having trouble processing that right now."
+        return ERROR_RESPONSE
 
 def _generate_openai_response(api_key, chat_history):
-    if not OPENAI_AVAILABLE:
+    if not backend_available('openai'):
         raise ValueError("OpenAI package not installed. Use: pip install openai")
-    client = OpenAI(api_key=api_key)
+    client = get_client('openai', api_key)
     response = client.chat.completions.create(
         model=Config.OPENAI_LLM,
         messages=chat_history
@@ -77,9 +211,9 @@ def _generate_openai_response(api_key, chat_history):
 
 
 def _generate_groq_response(api_key, chat_history):
-    if not GROQ_AVAILABLE:
+    if not backend_available('groq'):
         raise ValueError("Groq package not installed. Use: pip install groq")
-    client = Groq(api_key=api_key)
+    client = get_client('groq', api_key)
     response = client.chat.completions.create(
         model=Config.GROQ_LLM,
         messages=chat_history
@@ -87,11 +221,9 @@ def _generate_groq_response(api_key, chat_history):
     return response.choices[0].message.content
 
 
-def _generate_ollama_response(chat_history):
-    # Create system prompt for Windy with strict length constraints
-    system_prompt = {
-        "role": "system", 
-        "content": """You are Windy, a helpful voice assistant. CRITICAL RULES:
+OLLAMA_SYSTEM_PROMPT = {
+    "role": "system", 
+    "content": """You are Windy, a helpful voice assistant. CRITICAL RULES:
 - Keep responses under 30 words maximum
 - Be direct and to the point
 - No special characters, symbols, or formatting
@@ -100,33 +232,252 @@ def _generate_ollama_response(chat_history):
 - If asked complex questions, give short summary only
 - Example: "What's India like?" → "India is a diverse country with rich culture, amazing food, and over 1.4 billion people."
 Keep it SHORT and NATURAL for voice interaction."""
-    }
+}
+
+OLLAMA_OPTIONS = {
+    "temperature": Config.RESPONSE_TEMPERATURE,
+    "top_p": 0.7,  # Lower for faster, more focused responses
+    "top_k": 20,   # Reduce choices for faster generation
+    "num_predict": Config.MAX_RESPONSE_TOKENS,  # Limit token count
+    "repeat_penalty": 1.1,  # Avoid repetition
+    "num_ctx": Config.LLM_CONTEXT_TOKENS,  # Smaller context window for speed
+}
+
+
+def _with_system_prompt(chat_history):
+    """
+    Prepend the strict Ollama system prompt unless the history already carries one.
+    
+    Sending two system prompts wastes context and gives the model conflicting instructions.
+    """
+    if any(message["role"] == "system" for message in chat_history):
+        return chat_history
+    return [OLLAMA_SYSTEM_PROMPT] + chat_history
+
+
+def warm_up_ollama():
+    """
+    Load the Ollama model and evaluate the system prompt once at startup.
     
-    # Add system prompt to beginning of chat history
-    messages_with_system = [system_prompt] + chat_history
+    Uses the same options as real requests (a different num_ctx would reload the model)
+    and the byte-identical system prompt, so the first turn hits Ollama's prompt cache.
     
-    response = ollama.chat(
+    Returns:
+        bool: True if the model is loaded and ready.
+    """
+    start_time = time.time()
+    try:
+        with trace_span("ollama_load"):
+            load_backend('ollama').chat(
+                model=Config.OLLAMA_LLM,
+                messages=[OLLAMA_SYSTEM_PROMPT],
+                options=dict(OLLAMA_OPTIONS, num_predict=1),
+                keep_alive=Config.OLLAMA_KEEP_ALIVE
+            )
+        logging.info(f"✅ Ollama model {Config.OLLAMA_LLM} loaded in {time.time() - start_time:.2f}s")
+        return True
+    except Exception as e:
+        logging.warning(f"⚠️ Could not warm up Ollama: {e}")
+        return False
+
+
+def _generate_ollama_response(chat_history):
+    response = load_backend('ollama').chat(
         model=Config.OLLAMA_LLM,
-        messages=messages_with_system,
-        options={
-            "temperature": Config.RESPONSE_TEMPERATURE,
-            "top_p": 0.7,  # Lower for faster, more focused responses
-            "top_k": 20,   # Reduce choices for faster generation
-            "num_predict": Config.MAX_RESPONSE_TOKENS,  # Limit token count
-            "repeat_penalty": 1.1,  # Avoid repetition
-            "num_ctx": 1024,  # Smaller context window for speed
-        }
+        messages=_with_system_prompt(chat_history),
+        options=OLLAMA_OPTIONS,
+        keep_alive=Config.OLLAMA_KEEP_ALIVE
     )
     return response['message']['content']
 
 
-def _clean_response(response):
+def generate_response_stream(model:str, api_key:str, chat_history:list, local_model_path:str=None, cancelled=None):
     """
-    Clean the LLM response to remove unwanted characters and enforce length limits.
+    Generate a response as a stream of cleaned, sentence-sized chunks.
+    
+    Each sentence is yielded as soon as the model finishes it, so speech synthesis can
+    start on the first sentence while the rest is still being generated.
+    
+    Args:
+    model (str): The model to use for response generation ('openai', 'groq', 'ollama', 'local').
+    api_key (str): The API key for the response generation service.
+    chat_history (list): The chat history as a list of messages.
+    local_model_path (str): The path to the local model (if applicable).
+    cancelled (threading.Event): Checked on every token - once set, the model's stream is
+    closed and nothing more is yielded (barge-in), without waiting for the sentence to end.
+
+    Yields:
+    str: Cleaned sentences of the response, within the configured word limit.
     """
-    if not response:
-        return "I didn't catch that. Could you repeat?"
+    key = _cache_key(model, chat_history)
+    if key is not None:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            logging.info("⚡ Response cache hit")
+            trace_event("response_cache_hit")
+            yield from cached
+            return
+
+    sentences = []
+    try:
+        if model == 'openai' and backend_available('openai'):
+            tokens = _stream_openai_response(api_key, chat_history)
+        elif model == 'groq' and backend_available('groq'):
+            tokens = _stream_groq_response(api_key, chat_history)
+        elif model in ('openai', 'groq', 'ollama'):
+            if model != 'ollama':
+                logging.error(f"{model} package not available. Falling back to Ollama.")
+            tokens = _stream_ollama_response(chat_history)
+        elif model == 'local':
+            # Placeholder for local LLM response generation
+            tokens = iter(["Generated response from local model"])
+        else:
+            raise ValueError("Unsupported response generation model")
+        if cancelled is not None:
+            tokens = _until_cancelled(tokens, cancelled)
+        
+        for sentence in _clean_sentences(_traced_tokens(tokens)):
+            if cancelled is not None and cancelled.is_set():
+                return  # The sentence was cut off - don't speak or cache it
+            sentences.append(sentence)
+            yield sentence
+    except Exception as e:
+        logging.error(f"Failed to generate response: {e}")
+        if not sentences:
+            yield ERROR_RESPONSE
+        return
     
+    if not sentences:
+        yield _clean_response("")
+    elif key is not None:
+        # Only complete replies get here - a reply cut short by barge-in closes the generator first
+        get_response_cache().put(key, sentences)
+
+
+def _stream_openai_response(api_key, chat_history):
+    client = get_client('openai', api_key)
+    stream = client.chat.completions.create(
+        model=Config.OPENAI_LLM,
+        messages=chat_history,
+        stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def _stream_groq_response(api_key, chat_history):
+    client = get_client('groq', api_key)
+    stream = client.chat.completions.create(
+        model=Config.GROQ_LLM,
+        messages=chat_history,
+        stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def _stream_ollama_response(chat_history):
+    stream = load_backend('ollama').chat(
+        model=Config.OLLAMA_LLM,
+        messages=_with_system_prompt(chat_history),
+        options=OLLAMA_OPTIONS,
+        keep_alive=Config.OLLAMA_KEEP_ALIVE,
+        stream=True
+    )
+    for chunk in stream:
+        content = chunk['message']['content']
+        if content:
+            yield content
+
+
+def _until_cancelled(tokens, cancelled):
+    """Pass tokens through until cancelled is set, then close the model's stream."""
+    try:
+        for token in tokens:
+            if cancelled.is_set():
+                return
+            yield token
+    finally:
+        if hasattr(tokens, 'close'):
+            tokens.close()
+
+
+def _traced_tokens(tokens):
+    """Pass tokens through, marking the first and last token of the reply in the turn trace."""
+    started_at = time.monotonic()
+    first_token_at = None
+    for token in tokens:
+        if first_token_at is None:
+            first_token_at = time.monotonic()
+            trace_event("llm_first_token", at=first_token_at)
+            record_span("llm_first_token", started_at, first_token_at)
+        yield token
+    trace_event("llm_last_token")
+    record_span("llm_generate", started_at, time.monotonic())
+
+
+# Abbreviations whose trailing period doesn't end a sentence
+_ABBREVIATIONS = ("Mr", "Mrs", "Ms", "Dr", "Prof", "Sr", "Jr", "St", "Mt", "vs", "e.g", "i.e", "approx")
+
+# A sentence ends at . ! or ? followed by whitespace ("3.5" never splits), except after
+# one of the abbreviations above or a single capital initial ("J. R. R. Tolkien")
+_SENTENCE_END = re.compile(
+    "".join(rf"(?<!\b{re.escape(abbreviation)}\.)" for abbreviation in _ABBREVIATIONS)
+    + r"(?<!\b[A-Z]\.)(?<=[.!?])\s+"
+)
+
+# Shorter pieces are joined to the next sentence - they are more likely an abbreviation
+# missing from the list than a sentence, and too short to synthesize naturally on their own
+MIN_SENTENCE_CHARS = 6
+
+
+def _split_sentences(tokens):
+    """Group a stream of text tokens into complete sentences."""
+    pending = ""
+    for token in tokens:
+        pending += token
+        start = 0
+        for boundary in _SENTENCE_END.finditer(pending):
+            sentence = pending[start:boundary.start()]
+            if len(sentence.strip()) < MIN_SENTENCE_CHARS:
+                continue
+            yield sentence
+            start = boundary.end()
+        pending = pending[start:]
+    if pending.strip():
+        yield pending
+
+
+def _clean_sentences(tokens):
+    """
+    Clean streamed sentences and stop once the response word limit is reached.
+    """
+    remaining_words = Config.MAX_RESPONSE_WORDS
+    for sentence in _split_sentences(tokens):
+        sentence = _strip_formatting(sentence)
+        if not sentence:
+            continue
+        
+        words = sentence.split()
+        if len(words) >= remaining_words:
+            sentence = ' '.join(words[:remaining_words])
+            if not sentence.endswith(('.', '!', '?')):
+                sentence += '.'
+            yield sentence
+            return  # Closing the generator stops the upstream model stream too
+        
+        if not sentence.endswith(('.', '!', '?')):
+            sentence += '.'
+        remaining_words -= len(words)
+        yield sentence
+
+
+def _strip_formatting(response):
+    """
+    Remove markdown, symbols and wake word instructions that shouldn't be spoken.
+    """
     # Remove markdown formatting
     response = re.sub(r'\*{1,2}([^*]+)\*{1,2}', r'\1', response)  # Remove *bold* and **bold**
     response = re.sub(r'_{1,2}([^_]+)_{1,2}', r'\1', response)    # Remove _italic_ and __italic__
@@ -148,6 +499,17 @@ def _clean_response(response):
     
     # Remove leading/trailing whitespace
     response = response.strip()
+    return response
+
+
+def _clean_response(response):
+    """
+    Clean the LLM response to remove unwanted characters and enforce length limits.
+    """
+    if not response:
+        return EMPTY_RESPONSE
+    
+    response = _strip_formatting(response)
     
     # Enforce word count limit (from config for ~20 second speech)
     words = response.split()
@@ -168,7 +530,7 @@ def _clean_response(response):
     
     # If response is empty after cleaning, provide fallback
     if not response or len(response.strip()) < 3:
-        return "I'm here to help! What would you like to know?"
+        return CLEANED_AWAY_RESPONSE
     
     # Ensure response ends with proper punctuation for speech
     if not response.endswith(('.', '!', '?')):
@@ -177,6 +539,6 @@ def _clean_response(response):
     # Final word count check - if still too long, provide generic short response
     final_words = response.split()
     if len(final_words) > 35:  # Hard limit with some buffer
-        return "That's an interesting question. Could you be more specific?"
+        return TOO_LONG_RESPONSE
     
     return response
\ No newline at end of file
@@ -1,201 +1,114 @@
 # voice_assistant/text_to_speech.py
 import logging
-import subprocess
 import os
+import subprocess
+import tempfile
+from functools import lru_cache
 
+from voice_assistant.audio_buffer import AudioBuffer
+from voice_assistant.backends import backend_available
+from voice_assistant.clients import call_with_retries, get_client
 from voice_assistant.config import Config
+from voice_assistant.piper_tts import get_piper_engine
+
+# Voice used by each cloud backend (also part of the TTS cache key)
+OPENAI_TTS_VOICE = "nova"
+DEEPGRAM_TTS_VOICE = "aura-arcas-en"
+ELEVENLABS_TTS_VOICE = "Paul J."
+CARTESIA_TTS_VOICE = "f114a467-c40a-4db8-964d-aaba89cd08fa"
+
+# Backends text_to_speech_stream can deliver chunk by chunk
+STREAMING_TTS_MODELS = ('openai', 'deepgram', 'elevenlabs', 'cartesia', 'piper')
+
+# Raw PCM sample rate requested from each cloud backend (22050 matches the playback stream;
+# OpenAI only offers 24 kHz PCM and Deepgram has no 22.05 kHz option)
+OPENAI_PCM_SAMPLE_RATE = 24000
+DEEPGRAM_PCM_SAMPLE_RATE = 24000
+ELEVENLABS_PCM_SAMPLE_RATE = 22050
+CARTESIA_PCM_SAMPLE_RATE = 22050
+
+# Bytes per network read, and the shortest chunk handed to playback
+STREAM_READ_BYTES = 4096
+STREAM_CHUNK_SECONDS = 0.05
+
+
+def tts_voice(model):
+    """
+    Return an identifier for the voice the given TTS model speaks with.
+    """
+    return {
+        'openai': OPENAI_TTS_VOICE,
+        'deepgram': DEEPGRAM_TTS_VOICE,
+        'elevenlabs': ELEVENLABS_TTS_VOICE,
+        'cartesia': CARTESIA_TTS_VOICE,
+        'piper': Config.PIPER_MODEL_PATH,
+    }.get(model, model)
 
-# Optional imports - only if available
-try:
-    import pyaudio
-    PYAUDIO_AVAILABLE = True
-except ImportError:
-    PYAUDIO_AVAILABLE = False
-    logging.warning("PyAudio not available - install with: pip install pyaudio")
-
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    logging.warning("OpenAI not available - install with: pip install openai")
-
-try:
-    from deepgram import DeepgramClient, SpeakOptions
-    DEEPGRAM_AVAILABLE = True
-except ImportError:
-    DEEPGRAM_AVAILABLE = False
-    logging.warning("Deepgram not available - install with: pip install deepgram-sdk")
-
-try:
-    from elevenlabs.client import ElevenLabs
-    import elevenlabs
-    ELEVENLABS_AVAILABLE = True
-except ImportError:
-    ELEVENLABS_AVAILABLE = False
-    logging.warning("ElevenLabs not available - install with: pip install elevenlabs")
-
-try:
-    from cartesia import Cartesia
-    CARTESIA_AVAILABLE = True
-except ImportError:
-    CARTESIA_AVAILABLE = False
-    logging.warning("Cartesia not available - install with: pip install cartesia")
 
 def text_to_speech(model: str, api_key:str, text:str, output_file_path:str, local_model_path:str=None):
     """
     Convert text to speech using the specified model.
     
     Args:
-    model (str): The model to use for TTS ('openai', 'deepgram', 'elevenlabs', 'local').
+    model (str): The model to use for TTS ('openai', 'deepgram', 'elevenlabs', 'cartesia', 'piper', 'local').
     api_key (str): The API key for the TTS service.
     text (str): The text to convert to speech.
-    output_file_path (str): The path to save the generated speech audio file.
+    output_file_path (str): The path to save the generated speech audio file (WAV).
     local_model_path (str): The path to the local model (if applicable).
+
+    Returns:
+    str: The engine that produced the audio - 'piper' or 'espeak' if it had to fall back.
     """
     
     try:
         if model == 'openai':
-            if not OPENAI_AVAILABLE:
+            if not backend_available('openai'):
                 logging.error("OpenAI package not available. Falling back to Piper TTS.")
                 return text_to_speech('piper', api_key, text, output_file_path, local_model_path)
-            client = OpenAI(api_key=api_key)
-            speech_response = client.audio.speech.create(
-                model="tts-1",
-                voice="nova",
-                input=text
-            )
-            speech_response.stream_to_file(output_file_path)
+            _save_stream(_stream_openai(api_key, text), output_file_path)
 
         elif model == 'deepgram':
-            if not DEEPGRAM_AVAILABLE:
-                logging.error("Deepgram package not available. Falling back to Piper TTS.")
-                return text_to_speech('piper', api_key, text, output_file_path, local_model_path)
-            client = DeepgramClient(api_key=api_key)
-            options = SpeakOptions(
-                model="aura-arcas-en",
-                encoding="linear16",
-                container="wav"
-            )
-            SPEAK_OPTIONS = {"text": text}
-            response = client.speak.v("1").save(output_file_path, SPEAK_OPTIONS, options)
+            # Plain HTTP streaming - the Deepgram SDK isn't needed for speech, and the shared
+            # session retries connection errors and 429/503 itself
+            _save_stream(_stream_deepgram(api_key, text), output_file_path)
         
         elif model == 'elevenlabs':
-            if not ELEVENLABS_AVAILABLE:
+            if not backend_available('elevenlabs'):
                 logging.error("ElevenLabs package not available. Falling back to Piper TTS.")
                 return text_to_speech('piper', api_key, text, output_file_path, local_model_path)
-            client = ElevenLabs(api_key=api_key)
-            audio = client.generate(
-                text=text, 
-                voice="Paul J.", 
-                output_format="mp3_22050_32", 
-                model="eleven_turbo_v2"
-            )
-            elevenlabs.save(audio, output_file_path)
+            # generate() streams lazily, so retry the whole request-and-save
+            call_with_retries(lambda: _save_stream(_stream_elevenlabs(api_key, text), output_file_path))
         
         elif model == "cartesia":
-            if not CARTESIA_AVAILABLE or not PYAUDIO_AVAILABLE:
-                logging.error("Cartesia or PyAudio not available. Falling back to Piper TTS.")
+            if not backend_available('cartesia'):
+                logging.error("Cartesia package not available. Falling back to Piper TTS.")
                 return text_to_speech('piper', api_key, text, output_file_path, local_model_path)
-            client = Cartesia(api_key=api_key)
-            voice_id = "f114a467-c40a-4db8-964d-aaba89cd08fa"
-            voice = client.voices.get(id=voice_id)
-            model_id = "sonic-english"
-            output_format = {
-                "container": "raw",
-                "encoding": "pcm_f32le",
-                "sample_rate": 44100,
-            }
-            p = pyaudio.PyAudio()
-            rate = 44100
-            stream = None
-            for output in client.tts.sse(
-                model_id=model_id,
-                transcript=text,
-                voice_embedding=voice["embedding"],
-                stream=True,
-                output_format=output_format,
-            ):
-                buffer = output["audio"]
-                if stream is None:
-                    stream = p.open(format=pyaudio.paFloat32, channels=1, rate=rate, output=True)
-                stream.write(buffer)
-            if stream:
-                stream.stop_stream()
-                stream.close()
-            p.terminate()
+            _save_stream(_stream_cartesia(api_key, text), output_file_path)
 
         elif model == "piper":  # LOCAL TTS - RASPBERRY PI OPTIMIZED
             try:
-                # For Raspberry Pi, try different installation paths
-                piper_executable = Config.PIPER_EXECUTABLE
-                
-                # Check if piper is in PATH first
-                try:
-                    subprocess.run(["which", "piper"], check=True, capture_output=True)
-                    piper_executable = "piper"
-                except subprocess.CalledProcessError:
-                    # Try common installation paths
-                    possible_paths = [
-                        "/usr/local/bin/piper",
-                        "/home/pi/.local/bin/piper",
-                        "piper"
-                    ]
-                    piper_executable = None
-                    for path in possible_paths:
-                        try:
-                            subprocess.run([path, "--help"], check=True, capture_output=True)
-                            piper_executable = path
-                            break
-                        except (subprocess.CalledProcessError, FileNotFoundError):
-                            continue
-                    
-                    if not piper_executable:
-                        # Use espeak as fallback
-                        logging.warning("Piper not found, using espeak as fallback")
-                        result = subprocess.run(
-                            ["espeak", "-w", output_file_path, text],
-                            capture_output=True,
-                            check=True
-                        )
-                        logging.info(f"Espeak TTS output saved to {output_file_path}")
-                        return
-                
-                # Try to use piper with default model if custom model doesn't exist
-                model_path = Config.PIPER_MODEL_PATH
-                if not os.path.exists(model_path):
-                    logging.warning(f"Piper model not found at {model_path}, using default")
-                    # Run without model path to use default
-                    command = [piper_executable, "-f", output_file_path]
-                else:
-                    command = [piper_executable, "-m", model_path, "-f", output_file_path]
-                
-                result = subprocess.run(
-                    command, 
-                    input=text, 
-                    text=True, 
-                    capture_output=True, 
-                    check=True
-                )
-                
+                # The engine keeps the voice loaded (in-process or as one resident piper process)
+                engine = get_piper_engine()
+            except FileNotFoundError:
+                # Use espeak as fallback
+                logging.warning("Piper not found, using espeak as fallback")
+                _espeak_to_file(text, output_file_path)
+                logging.info(f"Espeak TTS output saved to {output_file_path}")
+                return 'espeak'
+            
+            try:
+                engine.synthesize(text).save(output_file_path)
                 logging.info(f"Piper TTS output saved to {output_file_path}")
-                
-            except subprocess.CalledProcessError as e:
-                logging.error(f"Piper TTS command failed: {e.stderr}")
+            except Exception as e:
+                logging.error(f"Piper TTS error: {e}")
                 # Fallback to espeak
                 try:
-                    subprocess.run(
-                        ["espeak", "-w", output_file_path, text],
-                        capture_output=True,
-                        check=True
-                    )
+                    _espeak_to_file(text, output_file_path)
                     logging.info(f"Espeak fallback TTS output saved to {output_file_path}")
+                    return 'espeak'
                 except subprocess.CalledProcessError as e2:
                     logging.error(f"Espeak fallback also failed: {e2}")
                     raise
-            except Exception as e:
-                logging.error(f"Piper TTS error: {e}")
-                raise
         
         elif model == 'local':
             with open(output_file_path, "wb") as f:
@@ -206,4 +119,170 @@ def text_to_speech(model: str, api_key:str, text:str, output_file_path:str, loca
         
     except Exception as e:
         logging.error(f"Failed to convert text to speech: {e}")
-        raise
\ No newline at end of file
+        raise
+    return model
+
+
+def text_to_speech_stream(model, api_key, text):
+    """
+    Synthesize text as a stream of PCM chunks, yielded as soon as the audio arrives.
+
+    Cloud backends are asked for raw 16-bit PCM, so nothing is encoded to MP3 and decoded
+    again, and the first chunk can play while the provider is still synthesizing the rest.
+    Backends without a streaming API synthesize a file that is yielded as one chunk.
+
+    Args:
+        model (str): The TTS model (see text_to_speech).
+        api_key (str): The API key for the TTS service (None reads the usual environment variable).
+        text (str): The text to speak.
+
+    Yields:
+        AudioBuffer: Consecutive 16-bit mono chunks of the speech.
+
+    Returns:
+        str: The engine that produced the audio (the generator's return value, as in text_to_speech).
+    """
+    if model == 'openai' and backend_available('openai'):
+        yield from _stream_openai(api_key, text)
+    elif model == 'deepgram':
+        yield from _stream_deepgram(api_key, text)
+    elif model == 'elevenlabs' and backend_available('elevenlabs'):
+        yield from _stream_elevenlabs(api_key, text)
+    elif model == 'cartesia' and backend_available('cartesia'):
+        yield from _stream_cartesia(api_key, text)
+    elif model == 'piper' and _resident_piper() is not None:
+        try:
+            # The resident voice synthesizes a sentence faster than real time - one chunk is enough
+            audio = _resident_piper().synthesize(text)
+        except Exception as e:
+            logging.error(f"Piper TTS error: {e} - falling back to espeak")
+            _, audio = _synthesize_via_file(lambda path: _espeak_to_file(text, path))
+            yield audio
+            return 'espeak'
+        yield audio
+    else:
+        engine, audio = _synthesize_via_file(lambda path: text_to_speech(model, api_key, text, path))
+        yield audio
+        return engine
+    return model
+
+
+def _synthesize_via_file(synthesize):
+    """Run synthesize(path) on a temporary WAV file; return its result and the audio."""
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        result = synthesize(path)
+        return result, AudioBuffer.from_wav_file(path)
+    finally:
+        os.remove(path)
+
+
+def _resident_piper():
+    try:
+        return get_piper_engine()
+    except FileNotFoundError:
+        return None  # text_to_speech falls back to espeak
+
+
+def _pcm_chunks(byte_chunks, sample_rate, sample_width=2):
+    """
+    Turn raw PCM bytes from the network into AudioBuffer chunks.
+
+    Network reads split samples at arbitrary byte offsets and can be tiny, so bytes are
+    gathered into chunks of at least STREAM_CHUNK_SECONDS cut on a sample boundary.
+    """
+    min_bytes = int(sample_rate * STREAM_CHUNK_SECONDS) * sample_width
+    pending = bytearray()
+    for data in byte_chunks:
+        pending.extend(data)
+        if len(pending) >= min_bytes:
+            usable = len(pending) - len(pending) % sample_width
+            yield AudioBuffer(bytes(pending[:usable]), sample_rate, sample_width)
+            del pending[:usable]
+    usable = len(pending) - len(pending) % sample_width
+    if usable:
+        yield AudioBuffer(bytes(pending[:usable]), sample_rate, sample_width)
+
+
+def _save_stream(chunks, output_file_path):
+    chunks = list(chunks)
+    if not chunks:
+        raise ValueError("TTS service returned no audio")
+    audio = AudioBuffer(b"".join(chunk.pcm for chunk in chunks), chunks[0].sample_rate, chunks[0].sample_width)
+    with open(output_file_path, "wb") as output_file:
+        output_file.write(audio.to_wav_bytes())
+
+
+def _stream_openai(api_key, text):
+    client = get_client('openai', api_key)
+    # response_format="pcm" is headerless 24 kHz 16-bit mono
+    with client.audio.speech.with_streaming_response.create(
+        model="tts-1",
+        voice=OPENAI_TTS_VOICE,
+        input=text,
+        response_format="pcm"
+    ) as response:
+        yield from _pcm_chunks(response.iter_bytes(STREAM_READ_BYTES), OPENAI_PCM_SAMPLE_RATE)
+
+
+def _stream_deepgram(api_key, text):
+    response = get_client('http').post(
+        Config.DEEPGRAM_SPEAK_URL,
+        params={
+            "model": DEEPGRAM_TTS_VOICE,
+            "encoding": "linear16",
+            "sample_rate": DEEPGRAM_PCM_SAMPLE_RATE,
+            "container": "none",
+        },
+        headers={"Authorization": f"Token {api_key or Config.DEEPGRAM_API_KEY}"},
+        json={"text": text},
+        stream=True,
+        timeout=Config.API_TIMEOUT
+    )
+    with response:
+        response.raise_for_status()
+        yield from _pcm_chunks(response.iter_content(STREAM_READ_BYTES), DEEPGRAM_PCM_SAMPLE_RATE)
+
+
+def _stream_elevenlabs(api_key, text):
+    client = get_client('elevenlabs', api_key)
+    audio = client.generate(
+        text=text,
+        voice=ELEVENLABS_TTS_VOICE,
+        output_format=f"pcm_{ELEVENLABS_PCM_SAMPLE_RATE}",
+        model="eleven_turbo_v2",
+        stream=True
+    )
+    yield from _pcm_chunks(audio, ELEVENLABS_PCM_SAMPLE_RATE)
+
+
+@lru_cache(maxsize=None)
+def _cartesia_voice_embedding(api_key):
+    """Look the voice up once instead of on every sentence."""
+    return get_client('cartesia', api_key).voices.get(id=CARTESIA_TTS_VOICE)["embedding"]
+
+
+def _stream_cartesia(api_key, text):
+    client = get_client('cartesia', api_key)
+    output_format = {
+        "container": "raw",
+        "encoding": "pcm_s16le",
+        "sample_rate": CARTESIA_PCM_SAMPLE_RATE,
+    }
+    outputs = client.tts.sse(
+        model_id="sonic-english",
+        transcript=text,
+        voice_embedding=_cartesia_voice_embedding(api_key),
+        stream=True,
+        output_format=output_format,
+    )
+    yield from _pcm_chunks((output["audio"] for output in outputs), CARTESIA_PCM_SAMPLE_RATE)
+
+
+def _espeak_to_file(text, output_file_path):
+    subprocess.run(
+        ["espeak", "-w", output_file_path, text],
+        capture_output=True,
+        check=True
+    )
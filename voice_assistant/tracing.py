@@ -0,0 +1,216 @@
+# voice_assistant/tracing.py
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from voice_assistant.config import Config
+
+# Histogram bucket upper bounds in seconds, shared by every stage
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Derived latencies computed from a turn's events: name -> (from event, to event)
+DERIVED_LATENCIES = {
+    "response_latency": ("vad_end", "playback_start"),  # User stops talking -> reply is audible
+    "time_to_first_token": ("vad_end", "llm_first_token"),
+}
+
+
+class TurnTrace:
+    """
+    Spans and events recorded during one conversation turn, as offsets from its start.
+    """
+
+    def __init__(self, **attributes):
+        self.turn_id = uuid.uuid4().hex[:12]
+        self.started_wall = time.time()
+        self.started_at = time.monotonic()
+        self.attributes = dict(attributes)
+        self.spans = []
+        self.events = {}
+
+    def to_dict(self):
+        return {
+            "turn_id": self.turn_id,
+            "timestamp": self.started_wall,
+            "duration": round(time.monotonic() - self.started_at, 4),
+            "attributes": self.attributes,
+            "spans": self.spans,
+            "events": self.events,
+        }
+
+
+class LatencyMetrics:
+    """
+    Cumulative Prometheus-style histograms of stage durations and a turn counter.
+    """
+
+    def __init__(self):
+        self._histograms = {}  # stage -> [bucket counts, sum, count]
+        self.turns = 0
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.setdefault(stage, [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def count_turn(self):
+        with self._lock:
+            self.turns += 1
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP voice_assistant_stage_seconds Duration of each pipeline stage.",
+            "# TYPE voice_assistant_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, (buckets, total, count) in sorted(self._histograms.items()):
+                for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f'voice_assistant_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {bucket_count}')
+                lines.append(f'voice_assistant_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+                lines.append(f'voice_assistant_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+                lines.append(f'voice_assistant_stage_seconds_count{{stage="{stage}"}} {count}')
+            lines.append("# HELP voice_assistant_turns_total Conversation turns completed.")
+            lines.append("# TYPE voice_assistant_turns_total counter")
+            lines.append(f"voice_assistant_turns_total {self.turns}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = LatencyMetrics()
+_current_turn = None
+_turn_lock = threading.Lock()
+
+
+def start_turn(**attributes):
+    """
+    Begin tracing a new turn; spans and events from any thread are attached to it until end_turn().
+    """
+    global _current_turn
+    if not Config.TRACING_ENABLED:
+        return None
+    with _turn_lock:
+        _current_turn = TurnTrace(**attributes)
+        return _current_turn
+
+
+def end_turn(keep=True, **attributes):
+    """
+    Finish the current turn: compute derived latencies, update metrics and append it to the JSONL log.
+
+    Args:
+        keep (bool): False drops the turn instead (e.g. a listen that heard nothing), so idle
+            listening doesn't fill the log or count as a turn.
+    """
+    global _current_turn
+    with _turn_lock:
+        turn, _current_turn = _current_turn, None
+    if turn is None or not keep:
+        return None
+
+    turn.attributes.update(attributes)
+    for name, (start_event, end_event) in DERIVED_LATENCIES.items():
+        if start_event in turn.events and end_event in turn.events:
+            latency = turn.events[end_event] - turn.events[start_event]
+            turn.events[name] = round(latency, 4)
+            metrics.observe(name, latency)
+    metrics.count_turn()
+
+    if Config.TRACE_LOG_PATH:
+        try:
+            _append_trace(Config.TRACE_LOG_PATH, json.dumps(turn.to_dict()))
+        except OSError as e:
+            logging.warning(f"⚠️ Could not write latency trace: {e}")
+    return turn
+
+
+def _append_trace(path, line):
+    max_bytes = (Config.TRACE_LOG_MAX_MB or 0) * 1024 * 1024
+    if max_bytes and os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+        os.replace(path, path + ".1")  # Keep the previous log, drop the one before it
+    with open(path, "a", encoding="utf-8") as trace_file:
+        trace_file.write(line + "\n")
+
+
+def record_span(name, start, end, **attributes):
+    """
+    Record a stage that ran from start to end (time.monotonic() values).
+
+    Spans outside a turn (model loads at startup) still count towards the metrics.
+    """
+    if not Config.TRACING_ENABLED or start is None or end is None:
+        return
+    metrics.observe(name, end - start)
+    turn = _current_turn
+    if turn is not None:
+        span = {"name": name, "start": round(start - turn.started_at, 4), "duration": round(end - start, 4)}
+        if attributes:
+            span.update(attributes)
+        with _turn_lock:
+            turn.spans.append(span)
+
+
+@contextmanager
+def trace_span(name, **attributes):
+    """
+    Time the enclosed block as a span of the current turn.
+    """
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        record_span(name, start, time.monotonic(), **attributes)
+
+
+def trace_event(name, at=None, once=False):
+    """
+    Mark a point in the current turn (at is a time.monotonic() value, default now).
+
+    With once, only the first occurrence in the turn is kept (e.g. the first LLM token).
+    """
+    turn = _current_turn
+    if turn is None:
+        return
+    offset = round((time.monotonic() if at is None else at) - turn.started_at, 4)
+    with _turn_lock:
+        if once and name in turn.events:
+            return
+        turn.events[name] = offset
+
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """
+    Serve the latency metrics at http://host:port/metrics on a background thread.
+    """
+    port = Config.METRICS_PORT if port is None else port
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logging.info(f"📈 Latency metrics at http://{host}:{port}/metrics")
+    return server
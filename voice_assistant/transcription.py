@@ -2,8 +2,17 @@
 
 import json
 import logging
-import requests
+import os
+import threading
 import time
+from collections import OrderedDict
+
+import numpy as np
+
+from voice_assistant.audio_buffer import AudioBuffer, TARGET_SAMPLE_RATE, load_audio
+from voice_assistant.backends import backend_available, load_backend
+from voice_assistant.clients import call_with_retries, get_client, request_timeout
+from voice_assistant.tracing import trace_span
 
 # Optional colorama import for colored output
 try:
@@ -22,69 +31,203 @@ except ImportError:
     def init():
         pass
 
-# Optional imports - only if available
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    logging.warning("OpenAI not available - install with: pip install openai")
+# FastWhisperAPI Docker support removed - use faster-whisper instead
 
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
-    logging.warning("Groq not available - install with: pip install groq")
+# Process-wide faster-whisper model pool, keyed by
+# (model_size, device, compute_type, cpu_threads, num_workers).
+# Values are [model, last_used_timestamp]; order tracks recency of use.
+_whisper_models = OrderedDict()
+_whisper_models_lock = threading.Lock()
 
-try:
-    from deepgram import DeepgramClient, PrerecordedOptions, FileSource
-    DEEPGRAM_AVAILABLE = True
-except ImportError:
-    DEEPGRAM_AVAILABLE = False
-    logging.warning("Deepgram not available - install with: pip install deepgram-sdk")
+# Approximate resident size (MB) of each model size at int8, used for the memory budget
+_WHISPER_MODEL_FOOTPRINT_MB = {
+    "tiny": 75,
+    "tiny.en": 75,
+    "base": 145,
+    "base.en": 145,
+    "small": 480,
+    "small.en": 480,
+    "medium": 1500,
+    "medium.en": 1500,
+    "large-v2": 3000,
+    "large-v3": 3000,
+}
 
-try:
-    from faster_whisper import WhisperModel
-    FASTER_WHISPER_AVAILABLE = True
-except ImportError:
-    FASTER_WHISPER_AVAILABLE = False
-    logging.warning("faster-whisper not available. Install with: pip install faster-whisper")
 
-# FastWhisperAPI Docker support removed - use faster-whisper instead
+# Decode settings optimized for speed on Raspberry Pi
+FASTER_WHISPER_DECODE_OPTIONS = {
+    "beam_size": 1,  # Reduced beam size for speed
+    "language": "en",
+    "condition_on_previous_text": False,  # Disable for speed
+    "temperature": 0.0,  # Deterministic output
+    "compression_ratio_threshold": 2.4,
+    "no_speech_threshold": 0.6,
+}
+
+
+def _whisper_model_key(model_size=None, device=None, compute_type=None, cpu_threads=None, num_workers=None):
+    from voice_assistant.config import Config
+
+    return (
+        model_size or Config.FASTER_WHISPER_MODEL_SIZE,
+        device or Config.FASTER_WHISPER_DEVICE,
+        compute_type or Config.FASTER_WHISPER_COMPUTE_TYPE,
+        cpu_threads or getattr(Config, 'FASTER_WHISPER_CPU_THREADS', 2),
+        num_workers or getattr(Config, 'FASTER_WHISPER_NUM_WORKERS', 1),
+    )
+
+
+def _whisper_model_footprint(key):
+    model_size, _, compute_type = key[0], key[1], key[2]
+    footprint = _WHISPER_MODEL_FOOTPRINT_MB.get(model_size, 500)
+    if compute_type not in ("int8", "int8_float16", "int8_float32"):
+        footprint *= 2  # float16/float32 weights are at least twice the int8 size
+    return footprint
+
+
+def _enforce_whisper_memory_budget(keep_key):
+    """Evict least recently used models (other than keep_key) until the pool fits the budget."""
+    from voice_assistant.config import Config
+
+    budget_mb = getattr(Config, 'FASTER_WHISPER_MEMORY_BUDGET_MB', None)
+    if not budget_mb:
+        return
+    while sum(_whisper_model_footprint(key) for key in _whisper_models) > budget_mb:
+        victim = next((key for key in _whisper_models if key != keep_key), None)
+        if victim is None:
+            break
+        del _whisper_models[victim]
+        logging.info(f"♻️ Evicted faster-whisper model {victim[0]} to stay under {budget_mb} MB")
+
+
+def get_whisper_model(model_size=None, device=None, compute_type=None, cpu_threads=None, num_workers=None):
+    """
+    Return a shared faster-whisper model, loading it on first use.
 
-def transcribe_audio(model, api_key, audio_file_path, local_model_path=None):
+    Any argument left as None falls back to the matching FASTER_WHISPER_* setting in Config.
+
+    Returns:
+        WhisperModel: The cached model instance.
+    """
+    if not backend_available('faster-whisper'):
+        raise ValueError("faster-whisper package not installed. Use: pip install faster-whisper")
+
+    key = _whisper_model_key(model_size, device, compute_type, cpu_threads, num_workers)
+    with _whisper_models_lock:
+        entry = _whisper_models.get(key)
+        if entry is not None:
+            entry[1] = time.time()
+            _whisper_models.move_to_end(key)
+            return entry[0]
+
+        logging.info(f"🔄 Loading faster-whisper model: {key[0]} ({key[1]}, {key[2]})")
+        start_time = time.time()
+        with trace_span("whisper_load", model=key[0]):
+            model = load_backend('faster-whisper').WhisperModel(
+                key[0],
+                device=key[1],
+                compute_type=key[2],
+                cpu_threads=key[3],
+                num_workers=key[4]
+            )
+        logging.info(f"✅ faster-whisper model loaded in {time.time() - start_time:.2f} seconds")
+
+        _whisper_models[key] = [model, time.time()]
+        _enforce_whisper_memory_budget(key)
+        return model
+
+
+def warm_up_whisper_model(**model_kwargs):
+    """
+    Load the configured faster-whisper model ahead of the first transcription.
+
+    Returns:
+        bool: True if the model is loaded and ready.
     """
-    Transcribe an audio file using the specified model.
+    try:
+        get_whisper_model(**model_kwargs)
+        return True
+    except Exception as e:
+        logging.warning(f"⚠️ faster-whisper warm-up failed: {e}")
+        return False
+
+
+def unload_whisper_models(max_idle_seconds=None):
+    """
+    Drop cached faster-whisper models so their memory can be reclaimed.
+
+    Args:
+        max_idle_seconds (float): Only unload models unused for at least this long.
+            None unloads every cached model.
+
+    Returns:
+        int: The number of models unloaded.
+    """
+    now = time.time()
+    with _whisper_models_lock:
+        stale = [
+            key for key, (_, last_used) in _whisper_models.items()
+            if max_idle_seconds is None or now - last_used >= max_idle_seconds
+        ]
+        for key in stale:
+            del _whisper_models[key]
+    for key in stale:
+        logging.info(f"♻️ Unloaded faster-whisper model {key[0]}")
+    return len(stale)
+
+
+def transcribe_audio(model, api_key, audio, local_model_path=None):
+    """
+    Transcribe audio using the specified model.
     
     Args:
-        model (str): The model to use for transcription ('openai', 'groq', 'deepgram', 'faster-whisper', 'local').
+        model (str): The model to use for transcription ('openai', 'groq', 'deepgram', 'faster-whisper', 'server', 'local').
         api_key (str): The API key for the transcription service.
-        audio_file_path (str): The path to the audio file to transcribe.
+        audio (AudioBuffer | str): In-memory audio from record_audio, or the path to a WAV file.
         local_model_path (str): The path to the local model (if applicable).
 
     Returns:
         str: The transcribed text.
     """
+    from voice_assistant.config import Config
+
+    if getattr(Config, 'AUDIO_PREPROCESSING', True):
+        try:
+            from voice_assistant.preprocessing import preprocess_audio
+            with trace_span("preprocess"):
+                audio = preprocess_audio(audio)
+        except Exception as e:
+            logging.warning(f"⚠️ Audio preprocessing failed, transcribing the raw recording: {e}")
+        else:
+            if not len(audio):
+                logging.info("🔇 Recording contains only silence - skipping transcription")
+                return ""
+
+    with trace_span("transcribe", backend=model):
+        return _transcribe_with_backend(model, api_key, audio, local_model_path)
+
+def _transcribe_with_backend(model, api_key, audio, local_model_path):
     try:
         if model == 'openai':
-            if not OPENAI_AVAILABLE:
+            if not backend_available('openai'):
                 logging.error("OpenAI package not available. Falling back to faster-whisper.")
-                return _transcribe_with_faster_whisper(audio_file_path, local_model_path)
-            return _transcribe_with_openai(api_key, audio_file_path)
+                return _transcribe_with_faster_whisper(audio, local_model_path)
+            return _transcribe_with_openai(api_key, audio)
         elif model == 'groq':
-            if not GROQ_AVAILABLE:
+            if not backend_available('groq'):
                 logging.error("Groq package not available. Falling back to faster-whisper.")
-                return _transcribe_with_faster_whisper(audio_file_path, local_model_path)
-            return _transcribe_with_groq(api_key, audio_file_path)
+                return _transcribe_with_faster_whisper(audio, local_model_path)
+            return _transcribe_with_groq(api_key, audio)
         elif model == 'deepgram':
-            if not DEEPGRAM_AVAILABLE:
+            if not backend_available('deepgram'):
                 logging.error("Deepgram package not available. Falling back to faster-whisper.")
-                return _transcribe_with_faster_whisper(audio_file_path, local_model_path)
-            return _transcribe_with_deepgram(api_key, audio_file_path)
+                return _transcribe_with_faster_whisper(audio, local_model_path)
+            return _transcribe_with_deepgram(api_key, audio)
         # FastWhisperAPI Docker support removed - use faster-whisper instead
         elif model == 'faster-whisper':
-            return _transcribe_with_faster_whisper(audio_file_path, local_model_path)
+            return _transcribe_with_faster_whisper(audio, local_model_path)
+        elif model == 'server':
+            return _transcribe_with_server(audio)
         elif model == 'local':
             # Placeholder for local STT model transcription
             return "Transcribed text from local model"
@@ -96,48 +239,54 @@ def transcribe_audio(model, api_key, audio_file_path, local_model_path=None):
         
         # Emergency fallback - try speech_recognition directly
         try:
-            return _transcribe_with_speech_recognition_fallback(audio_file_path)
+            return _transcribe_with_speech_recognition_fallback(audio)
         except Exception as fallback_error:
             logging.error(f"❌ All transcription methods failed: {fallback_error}")
             return ""  # Return empty string instead of raising exception
 
-def _transcribe_with_openai(api_key, audio_file_path):
-    if not OPENAI_AVAILABLE:
+def _wav_upload(audio):
+    """Return audio as a (filename, WAV bytes) pair accepted by the upload APIs."""
+    if isinstance(audio, AudioBuffer):
+        return ("audio.wav", audio.to_wav_bytes())
+    with open(audio, "rb") as audio_file:
+        return (os.path.basename(audio), audio_file.read())
+
+
+def _transcribe_with_openai(api_key, audio):
+    if not backend_available('openai'):
         raise ValueError("OpenAI package not installed. Use: pip install openai")
-    client = OpenAI(api_key=api_key)
-    with open(audio_file_path, "rb") as audio_file:
-        transcription = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            language='en'
-        )
+    client = get_client('openai', api_key)
+    transcription = client.audio.transcriptions.create(
+        model="whisper-1",
+        file=_wav_upload(audio),
+        language='en'
+    )
     return transcription.text
 
 
-def _transcribe_with_groq(api_key, audio_file_path):
-    if not GROQ_AVAILABLE:
+def _transcribe_with_groq(api_key, audio):
+    if not backend_available('groq'):
         raise ValueError("Groq package not installed. Use: pip install groq")
-    client = Groq(api_key=api_key)
-    with open(audio_file_path, "rb") as audio_file:
-        transcription = client.audio.transcriptions.create(
-            model="whisper-large-v3",
-            file=audio_file,
-            language='en'
-        )
+    client = get_client('groq', api_key)
+    transcription = client.audio.transcriptions.create(
+        model="whisper-large-v3",
+        file=_wav_upload(audio),
+        language='en'
+    )
     return transcription.text
 
 
-def _transcribe_with_deepgram(api_key, audio_file_path):
-    if not DEEPGRAM_AVAILABLE:
+def _transcribe_with_deepgram(api_key, audio):
+    if not backend_available('deepgram'):
         raise ValueError("Deepgram package not installed. Use: pip install deepgram-sdk")
-    deepgram = DeepgramClient(api_key)
+    deepgram = get_client('deepgram', api_key)
     try:
-        with open(audio_file_path, "rb") as file:
-            buffer_data = file.read()
+        _, buffer_data = _wav_upload(audio)
 
         payload = {"buffer": buffer_data}
-        options = PrerecordedOptions(model="nova-2", smart_format=True)
-        response = deepgram.listen.prerecorded.v("1").transcribe_file(payload, options)
+        options = load_backend('deepgram').PrerecordedOptions(model="nova-2", smart_format=True)
+        response = call_with_retries(deepgram.listen.prerecorded.v("1").transcribe_file, payload, options,
+                                     timeout=request_timeout())
         data = json.loads(response.to_json())
 
         transcript = data['results']['channels'][0]['alternatives'][0]['transcript']
@@ -147,59 +296,76 @@ def _transcribe_with_deepgram(api_key, audio_file_path):
         raise
 
 
+def _transcribe_with_server(audio):
+    """
+    Transcribe through a shared transcription server (python -m voice_assistant.transcription_server).
+    """
+    from voice_assistant.config import Config
+
+    buffer = load_audio(audio)
+    if buffer.channels != 1 or buffer.sample_width != 2:
+        buffer = AudioBuffer.from_float32(buffer.to_float32())
+    response = get_client('http').post(
+        f"{Config.TRANSCRIPTION_SERVER_URL}/transcribe",
+        data=buffer.pcm,
+        headers={"Content-Type": "application/octet-stream", "X-Sample-Rate": str(buffer.sample_rate)},
+        timeout=Config.API_TIMEOUT
+    )
+    response.raise_for_status()
+    result = response.json()
+    logging.info(f"✅ Server transcription in {result['processing_time']:.2f}s (queued {result['queue_time']:.2f}s)")
+    return result["text"]
+
+
 # FastWhisperAPI Docker function removed - use faster-whisper instead
 
 
-def _transcribe_with_faster_whisper(audio_file_path, local_model_path=None):
+def _transcribe_with_faster_whisper(audio, local_model_path=None):
     """
     Transcribe audio using faster-whisper locally with fallbacks.
     
     Args:
-        audio_file_path (str): Path to the audio file
+        audio (AudioBuffer | str): In-memory audio or path to the audio file
         local_model_path (str): Not used, kept for compatibility
     
     Returns:
         str: Transcribed text
     """
-    if not FASTER_WHISPER_AVAILABLE:
-        return _transcribe_with_speech_recognition_fallback(audio_file_path)
+    if not backend_available('faster-whisper'):
+        return _transcribe_with_speech_recognition_fallback(audio)
     
     try:
-        import os
         from voice_assistant.config import Config
         
-        # Check if audio file exists and has content
-        if not os.path.exists(audio_file_path):
-            logging.error(f"Audio file not found: {audio_file_path}")
-            return ""
-            
-        if os.path.getsize(audio_file_path) == 0:
-            logging.error(f"Audio file is empty: {audio_file_path}")
-            return ""
-        
-        logging.info(f"🔄 Loading faster-whisper model: {Config.FASTER_WHISPER_MODEL_SIZE}")
+        # Release models that have sat idle past the configured timeout
+        idle_timeout = getattr(Config, 'FASTER_WHISPER_MODEL_IDLE_TIMEOUT', None)
+        if idle_timeout:
+            unload_whisper_models(max_idle_seconds=idle_timeout)
         
-        # Initialize the model using config settings
-        model = WhisperModel(
-            Config.FASTER_WHISPER_MODEL_SIZE, 
-            device=Config.FASTER_WHISPER_DEVICE, 
-            compute_type=Config.FASTER_WHISPER_COMPUTE_TYPE,
-            cpu_threads=getattr(Config, 'FASTER_WHISPER_CPU_THREADS', 2),
-            num_workers=getattr(Config, 'FASTER_WHISPER_NUM_WORKERS', 1)
-        )
+        if isinstance(audio, AudioBuffer):
+            if not len(audio):
+                logging.error("Audio buffer is empty")
+                return ""
+            # faster-whisper takes 16 kHz float32 samples directly, skipping any file decode
+            model_input = audio.to_float32()
+            logging.info(f"🎙️ Transcribing {audio.duration:.2f}s of in-memory audio")
+        else:
+            # Check if audio file exists and has content
+            if not os.path.exists(audio):
+                logging.error(f"Audio file not found: {audio}")
+                return ""
+                
+            if os.path.getsize(audio) == 0:
+                logging.error(f"Audio file is empty: {audio}")
+                return ""
+            model_input = audio
+            logging.info(f"🎙️ Transcribing audio file: {audio}")
         
-        logging.info(f"🎙️ Transcribing audio file: {audio_file_path}")
+        # Reuse the process-wide model instead of reloading it for every utterance
+        model = get_whisper_model()
         
         # Transcribe the audio with optimized settings for Raspberry Pi
-        segments, info = model.transcribe(
-            audio_file_path, 
-            beam_size=1,  # Reduced beam size for speed
-            language="en",
-            condition_on_previous_text=False,  # Disable for speed
-            temperature=0.0,  # Deterministic output
-            compression_ratio_threshold=2.4,
-            no_speech_threshold=0.6
-        )
+        segments, info = model.transcribe(model_input, **FASTER_WHISPER_DECODE_OPTIONS)
         
         # Combine all segments into a single text
         transcribed_text = ""
@@ -210,7 +376,7 @@ def _transcribe_with_faster_whisper(audio_file_path, local_model_path=None):
         
         if segment_count == 0:
             logging.warning("No segments transcribed - audio may be silent or too short")
-            return _transcribe_with_speech_recognition_fallback(audio_file_path)
+            return _transcribe_with_speech_recognition_fallback(audio)
         
         logging.info(f"✅ Transcription complete: {segment_count} segments")
         logging.info(f"🌍 Detected language: {info.language} (probability: {info.language_probability:.2f})")
@@ -218,16 +384,126 @@ def _transcribe_with_faster_whisper(audio_file_path, local_model_path=None):
         result = transcribed_text.strip()
         if not result:
             logging.warning("Empty transcription result, trying fallback...")
-            return _transcribe_with_speech_recognition_fallback(audio_file_path)
+            return _transcribe_with_speech_recognition_fallback(audio)
             
         return result
         
     except Exception as e:
         logging.error(f"❌ faster-whisper transcription error: {e}")
         logging.info("🔄 Trying speech_recognition fallback...")
-        return _transcribe_with_speech_recognition_fallback(audio_file_path)
+        return _transcribe_with_speech_recognition_fallback(audio)
+
+class IncrementalTranscriber:
+    """
+    Decodes an utterance with faster-whisper while it is still being recorded.
+
+    Audio is appended as it is captured; a background thread re-decodes the
+    not-yet-committed tail every STREAMING_DECODE_INTERVAL seconds and reports a partial
+    hypothesis. Segments that end more than STREAMING_COMMIT_LAG seconds before the
+    newest audio are committed: their text is kept and their audio is never decoded
+    again, so the final decode after endpointing only covers the last few seconds.
+    """
+
+    def __init__(self, on_partial=None, sample_rate=TARGET_SAMPLE_RATE):
+        from voice_assistant.config import Config
+
+        self.on_partial = on_partial
+        self.sample_rate = sample_rate
+        self.decode_interval = Config.STREAMING_DECODE_INTERVAL
+        self.commit_lag = Config.STREAMING_COMMIT_LAG
+
+        self._pcm = bytearray()
+        self._committed_text = []
+        self._committed_samples = 0  # Audio before this offset is already transcribed
+        self._generation = 0  # Bumped on reset so in-flight decodes are discarded
+        self.partial = ""
+        self._lock = threading.Lock()
+        self._new_audio = threading.Event()
+        self._finished = threading.Event()
+        self._worker = threading.Thread(target=self._decode_loop, name="incremental-transcriber", daemon=True)
+        self._worker.start()
+
+    def append(self, pcm):
+        """Add captured 16-bit mono PCM; None discards everything so far (a false start)."""
+        with self._lock:
+            if pcm is None:
+                self._generation += 1
+                self._pcm = bytearray()
+                self._committed_text = []
+                self._committed_samples = 0
+                self.partial = ""
+                return
+            self._pcm.extend(pcm)
+        self._new_audio.set()
+
+    def _pending_samples(self):
+        with self._lock:
+            samples = np.frombuffer(bytes(self._pcm), dtype='<i2').astype(np.float32) / 32768.0
+            return samples, self._generation, self._committed_samples, " ".join(self._committed_text)
+
+    def _decode(self, commit):
+        """Decode the uncommitted tail; optionally commit segments that are old enough."""
+        samples, generation, committed_samples, committed_text = self._pending_samples()
+        tail = samples[committed_samples:]
+        if len(tail) < self.sample_rate // 4:
+            return committed_text
+
+        segments, _ = get_whisper_model().transcribe(
+            tail,
+            initial_prompt=committed_text or None,  # Carry context across the committed boundary
+            **FASTER_WHISPER_DECODE_OPTIONS
+        )
+        segments = list(segments)
+
+        tail_seconds = len(tail) / float(self.sample_rate)
+        stable, tentative = [], []
+        for segment in segments:
+            if commit and segment.end < tail_seconds - self.commit_lag:
+                stable.append(segment)
+            else:
+                tentative.append(segment)
+
+        with self._lock:
+            if self._generation != generation:
+                return self.partial  # Reset while we were decoding
+            if stable:
+                self._committed_text.extend(segment.text.strip() for segment in stable)
+                self._committed_samples += int(stable[-1].end * self.sample_rate)
+            text = " ".join(self._committed_text + [segment.text.strip() for segment in tentative])
+            self.partial = text.strip()
+            return self.partial
+
+    def _decode_loop(self):
+        while not self._finished.is_set():
+            if not self._new_audio.wait(timeout=0.1):
+                continue
+            if self._finished.wait(timeout=self.decode_interval):
+                return
+            self._new_audio.clear()
+            try:
+                partial = self._decode(commit=True)
+            except Exception as e:
+                logging.error(f"❌ Incremental transcription error: {e}")
+                continue
+            if partial and self.on_partial:
+                logging.info(f"📝 Partial: {partial}")
+                self.on_partial(partial)
+
+    def finish(self):
+        """
+        Stop background decoding and return the final transcription.
+        """
+        self._finished.set()
+        self._worker.join()
+        try:
+            with trace_span("transcribe", backend="incremental"):
+                return self._decode(commit=False)
+        except Exception as e:
+            logging.error(f"❌ Incremental transcription error: {e}")
+            return self.partial
+
 
-def _transcribe_with_speech_recognition_fallback(audio_file_path):
+def _transcribe_with_speech_recognition_fallback(audio):
     """
     Fallback transcription using speech_recognition library.
     """
@@ -235,8 +511,11 @@ def _transcribe_with_speech_recognition_fallback(audio_file_path):
         import speech_recognition as sr
         
         r = sr.Recognizer()
-        with sr.AudioFile(audio_file_path) as source:
-            audio = r.record(source)
+        buffer = load_audio(audio)
+        if buffer.channels != 1:
+            # speech_recognition expects mono frames
+            buffer = AudioBuffer.from_float32(buffer.to_float32())
+        audio = sr.AudioData(buffer.pcm, buffer.sample_rate, buffer.sample_width)
             
         # Try multiple engines in order of preference
         engines = [
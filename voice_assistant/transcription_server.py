@@ -0,0 +1,148 @@
+# voice_assistant/transcription_server.py
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from voice_assistant.audio_buffer import AudioBuffer, TARGET_SAMPLE_RATE
+from voice_assistant.config import Config
+from voice_assistant.transcription import FASTER_WHISPER_DECODE_OPTIONS, get_whisper_model
+
+
+class TranscriptionPool:
+    """
+    Runs concurrent transcription requests in parallel on one shared model.
+
+    faster-whisper has no API for decoding several unrelated recordings in one call, so
+    holding requests back to group them would only add latency. Each request goes straight
+    to one of the model's num_workers, which decode truly in parallel on one copy of the weights.
+    """
+
+    def __init__(self, num_workers=None):
+        self.num_workers = num_workers or Config.TRANSCRIPTION_SERVER_NUM_WORKERS
+        self.model = get_whisper_model(
+            # Split the machine's cores between the workers instead of oversubscribing them
+            cpu_threads=max(1, (Config.TRANSCRIPTION_SERVER_CPU_THREADS or os.cpu_count() or 1) // self.num_workers),
+            num_workers=self.num_workers
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="whisper-worker")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests_served = 0
+
+    @property
+    def queue_depth(self):
+        """Requests waiting for a free worker."""
+        return max(0, self.in_flight - self.num_workers)
+
+    def submit(self, audio):
+        """
+        Start transcribing audio on the next free worker.
+
+        Returns:
+            Future: Resolves to a dict with the text and timings.
+        """
+        future = Future()
+        with self._lock:
+            self.in_flight += 1
+        self._executor.submit(self._transcribe, audio, future, time.time())
+        return future
+
+    def _transcribe(self, audio, future, queued_at):
+        started_at = time.time()
+        try:
+            segments, info = self.model.transcribe(audio.to_float32(), **FASTER_WHISPER_DECODE_OPTIONS)
+            text = " ".join(segment.text.strip() for segment in segments).strip()
+            future.set_result({
+                "text": text,
+                "duration": audio.duration,
+                "queue_time": started_at - queued_at,
+                "processing_time": time.time() - started_at,
+            })
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.requests_served += 1
+
+
+def _make_handler(pool):
+    class TranscriptionHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, so clients reuse their connection
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            self._send_json(200, {
+                "model": Config.FASTER_WHISPER_MODEL_SIZE,
+                "num_workers": pool.num_workers,
+                "queue_depth": pool.queue_depth,
+                "in_flight": pool.in_flight,
+                "requests_served": pool.requests_served,
+            })
+
+        def do_POST(self):
+            if self.path != "/transcribe":
+                self._send_json(404, {"error": "not found"})
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                if self.headers.get("Content-Type", "").startswith("audio/wav"):
+                    audio = AudioBuffer.from_wav_bytes(body)
+                else:
+                    # Raw 16-bit mono PCM; the sample rate may be given in a header
+                    sample_rate = int(self.headers.get("X-Sample-Rate", TARGET_SAMPLE_RATE))
+                    audio = AudioBuffer(body, sample_rate=sample_rate)
+                result = pool.submit(audio).result()
+            except Exception as e:
+                logging.error(f"❌ Transcription request failed: {e}")
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, result)
+
+        def log_message(self, format, *args):
+            logging.debug(format % args)
+
+    return TranscriptionHandler
+
+
+def serve(host=None, port=None, num_workers=None):
+    """
+    Run the transcription server until interrupted.
+    """
+    host = host or Config.TRANSCRIPTION_SERVER_HOST
+    port = port or Config.TRANSCRIPTION_SERVER_PORT
+    pool = TranscriptionPool(num_workers=num_workers)
+    server = ThreadingHTTPServer((host, port), _make_handler(pool))
+    logging.info(f"🚀 Transcription server listening on http://{host}:{port} ({pool.num_workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("👋 Transcription server shutting down...")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Shared faster-whisper transcription server")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
@@ -0,0 +1,216 @@
+# voice_assistant/tts_cache.py
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from voice_assistant.audio_buffer import AudioBuffer
+from voice_assistant.config import Config
+from voice_assistant.text_to_speech import text_to_speech, text_to_speech_stream, tts_voice
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech keyed by (engine, voice, text).
+
+    Recently used clips are held in a memory LRU; every clip is also written to an
+    on-disk store that is trimmed back under a size cap, oldest-used first.
+    """
+
+    # Trim the disk store a little below the cap, so it isn't rescanned on every following put
+    EVICT_TO_FRACTION = 0.9
+
+    def __init__(self, cache_dir=None, max_memory_entries=None, max_disk_mb=None):
+        self.cache_dir = cache_dir or Config.TTS_CACHE_DIR
+        self.max_memory_entries = max_memory_entries or Config.TTS_CACHE_MEMORY_ENTRIES
+        self.max_disk_bytes = int((max_disk_mb or Config.TTS_CACHE_MAX_MB) * 1024 * 1024)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    @staticmethod
+    def key(model, voice, text):
+        return hashlib.sha256(f"{model}\0{voice}\0{text}".encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key + ".audio")
+
+    def get(self, key):
+        """Return the cached audio bytes for a key, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as cached_file:
+                audio = cached_file.read()
+            os.utime(path)  # Mark as recently used for disk eviction
+        except OSError:
+            return None
+        self._remember(key, audio)
+        return audio
+
+    def put(self, key, audio):
+        """Store audio bytes in memory and on disk."""
+        self._remember(key, audio)
+        path = self._disk_path(key)
+        try:
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(path, "wb") as cached_file:
+                cached_file.write(audio)
+            with self._lock:
+                self._disk_bytes += len(audio) - replaced
+                over_budget = self._disk_bytes > self.max_disk_bytes
+            if over_budget:
+                self._evict_disk()
+        except OSError as e:
+            logging.warning(f"⚠️ Could not write TTS cache entry: {e}")
+
+    def _remember(self, key, audio):
+        with self._lock:
+            self._memory[key] = audio
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict_disk(self):
+        # Rescan rather than trust the running total: another process may share the directory
+        entries = self._disk_entries()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * self.EVICT_TO_FRACTION
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+
+@lru_cache(maxsize=None)
+def get_tts_cache():
+    """
+    Return the shared TTS cache.
+    """
+    return TTSCache()
+
+
+def _cacheable(model, engine):
+    # Fallback voices and the 'local' placeholder would otherwise be replayed under this model's key
+    if engine != model or model == 'local':
+        logging.info(f"TTS produced by {engine} instead of {model} - not caching")
+        return False
+    return True
+
+
+def cached_text_to_speech(model, api_key, text, output_file_path, local_model_path=None):
+    """
+    Same as text_to_speech, but reuses previously synthesized audio for identical text.
+
+    Only audio the requested engine produced is cached.
+    """
+    if not Config.TTS_CACHE_ENABLED:
+        return text_to_speech(model, api_key, text, output_file_path, local_model_path)
+
+    cache = get_tts_cache()
+    key = cache.key(model, tts_voice(model), text)
+    audio = cache.get(key)
+    if audio is not None:
+        with open(output_file_path, "wb") as output_file:
+            output_file.write(audio)
+        logging.info(f"⚡ TTS cache hit for: {text[:40]}")
+        return model
+
+    engine = text_to_speech(model, api_key, text, output_file_path, local_model_path)
+    if _cacheable(model, engine):
+        with open(output_file_path, "rb") as output_file:
+            cache.put(key, output_file.read())
+    return engine
+
+
+def cached_speech_stream(model, api_key, text):
+    """
+    Same as text_to_speech_stream, but replays cached audio for identical text.
+
+    A stream is only cached once it has been received completely, so a reply cut short
+    by barge-in never leaves a truncated clip behind, and only if the requested engine
+    produced it.
+    """
+    if not Config.TTS_CACHE_ENABLED:
+        yield from text_to_speech_stream(model, api_key, text)
+        return
+
+    cache = get_tts_cache()
+    key = cache.key(model, tts_voice(model), text)
+    audio = cache.get(key)
+    if audio is not None:
+        logging.info(f"⚡ TTS cache hit for: {text[:40]}")
+        yield AudioBuffer.from_wav_bytes(audio)
+        return
+
+    chunks = []
+    engine = yield from _recorded(text_to_speech_stream(model, api_key, text), chunks)
+    if chunks and _cacheable(model, engine):
+        pcm = b"".join(chunk.pcm for chunk in chunks)
+        cache.put(key, AudioBuffer(pcm, chunks[0].sample_rate, chunks[0].sample_width).to_wav_bytes())
+
+
+def _recorded(stream, chunks):
+    # Like "yield from stream", also appending each chunk to chunks
+    try:
+        while True:
+            try:
+                chunk = next(stream)
+            except StopIteration as stop:
+                return stop.value
+            chunks.append(chunk)
+            yield chunk
+    finally:
+        stream.close()
+
+
+def prewarm_tts_cache(phrases, model=None):
+    """
+    Synthesize known canned phrases ahead of time so they play instantly later.
+    """
+    model = model or Config.TTS_MODEL
+    if not Config.TTS_CACHE_ENABLED:
+        return
+
+    cache = get_tts_cache()
+    # Outside the cache directory, so disk eviction never counts or deletes it
+    scratch_fd, scratch_file = tempfile.mkstemp(prefix="voice_assistant_", suffix=".wav")
+    os.close(scratch_fd)
+    try:
+        for phrase in phrases:
+            if cache.get(cache.key(model, tts_voice(model), phrase)) is not None:
+                continue
+            try:
+                cached_text_to_speech(model, None, phrase, scratch_file, Config.LOCAL_MODEL_PATH)
+            except Exception as e:
+                logging.warning(f"⚠️ Could not pre-synthesize '{phrase}': {e}")
+    finally:
+        if os.path.exists(scratch_file):
+            os.remove(scratch_file)
+    logging.info(f"✅ TTS cache pre-warmed with {len(phrases)} phrases")
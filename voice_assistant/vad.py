@@ -0,0 +1,91 @@
+# voice_assistant/vad.py
+
+import logging
+
+import numpy as np
+
+from voice_assistant.audio_buffer import TARGET_SAMPLE_RATE
+from voice_assistant.config import Config
+
+# Optional import - WebRTC's VAD is more robust than the NumPy model when installed
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+
+# Most speech energy sits in the telephone band
+SPEECH_BAND_HZ = (300, 3400)
+
+
+class VoiceActivityDetector:
+    """
+    Frame-level voice activity detection with hangover and adaptive endpointing.
+
+    Frames (10-30 ms of 16-bit mono PCM) are classified by WebRTC's VAD when it is
+    installed, otherwise by a small NumPy model: the frame must stand out from the noise
+    floor, and its spectrum must look like speech (energy concentrated in the speech band
+    rather than spread flat like fan or hiss noise). A voiced decision is held for a short
+    hangover so brief gaps between words don't count as silence.
+    """
+
+    def __init__(self, sample_rate=TARGET_SAMPLE_RATE, backend=None):
+        self.sample_rate = sample_rate
+        self.backend = backend or Config.VAD_BACKEND
+        self.min_snr_db = Config.VAD_MIN_SNR_DB
+        self.min_rms = getattr(Config, 'MIC_MIN_ENERGY_THRESHOLD', 300)
+        self.hangover_seconds = Config.VAD_HANGOVER_SECONDS
+        self._hangover_left = 0.0
+
+        self._webrtc = None
+        if self.backend == 'webrtc':
+            if WEBRTCVAD_AVAILABLE:
+                self._webrtc = webrtcvad.Vad(Config.VAD_WEBRTC_AGGRESSIVENESS)
+            else:
+                logging.warning("webrtcvad not available - using the NumPy VAD. Install with: pip install webrtcvad")
+
+    def reset(self):
+        self._hangover_left = 0.0
+
+    def _spectral_speech(self, samples):
+        spectrum = np.abs(np.fft.rfft(samples * np.hanning(len(samples)))) ** 2 + 1e-12
+        frequencies = np.fft.rfftfreq(len(samples), 1.0 / self.sample_rate)
+        in_band = (frequencies >= SPEECH_BAND_HZ[0]) & (frequencies <= SPEECH_BAND_HZ[1])
+        band_ratio = spectrum[in_band].sum() / spectrum.sum()
+        flatness = np.exp(np.mean(np.log(spectrum))) / np.mean(spectrum)
+        return band_ratio > 0.5 or flatness < 0.3
+
+    def _raw_decision(self, pcm, rms, noise_floor):
+        snr_db = 20.0 * np.log10((rms + 1.0) / ((noise_floor or 0.0) + 1.0))
+        if rms < self.min_rms or snr_db < self.min_snr_db:
+            return False
+        if self._webrtc is not None:
+            return self._webrtc.is_speech(pcm, self.sample_rate)
+        samples = np.frombuffer(pcm, dtype='<i2').astype(np.float32)
+        return self._spectral_speech(samples)
+
+    def is_speech(self, pcm, rms, noise_floor, frame_duration):
+        """
+        Classify one frame, holding voiced decisions through the hangover period.
+        """
+        if self._raw_decision(pcm, rms, noise_floor):
+            self._hangover_left = self.hangover_seconds
+            return True
+        if self._hangover_left > 0:
+            self._hangover_left -= frame_duration
+            return True
+        return False
+
+    @staticmethod
+    def endpoint_silence(voiced_seconds, max_silence):
+        """
+        Silence required to close an utterance.
+
+        Short utterances ("um...", a hesitant start) get the full max_silence; once the user
+        has clearly said a phrase, the required silence shrinks towards VAD_MIN_ENDPOINT_SILENCE
+        so the turn closes a few hundred milliseconds after they stop talking.
+        """
+        min_silence = min(Config.VAD_MIN_ENDPOINT_SILENCE, max_silence)
+        complete_after = Config.VAD_COMPLETE_PHRASE_SECONDS
+        progress = min(1.0, voiced_seconds / complete_after) if complete_after else 1.0
+        return max_silence - (max_silence - min_silence) * progress
@@ -0,0 +1,245 @@
+# voice_assistant/wake_word.py
+
+import glob
+import logging
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from voice_assistant.audio_buffer import AudioBuffer, TARGET_SAMPLE_RATE, load_audio
+from voice_assistant.config import Config
+
+# Feature extraction settings (25 ms windows every 10 ms, as is standard for speech)
+WINDOW_SAMPLES = 400
+HOP_SAMPLES = 160
+NUM_MEL_BANDS = 26
+NUM_CEPSTRA = 13
+
+
+@lru_cache(maxsize=None)
+def _mel_filterbank(sample_rate=TARGET_SAMPLE_RATE, n_fft=512, num_bands=NUM_MEL_BANDS):
+    """Triangular mel filterbank matrix of shape (num_bands, n_fft // 2 + 1)."""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(60.0), hz_to_mel(sample_rate / 2.0), num_bands + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sample_rate).astype(int)
+
+    filterbank = np.zeros((num_bands, n_fft // 2 + 1), dtype=np.float32)
+    for band in range(1, num_bands + 1):
+        left, center, right = bins[band - 1], bins[band], bins[band + 1]
+        if center > left:
+            filterbank[band - 1, left:center] = (np.arange(left, center) - left) / float(center - left)
+        if right > center:
+            filterbank[band - 1, center:right] = (right - np.arange(center, right)) / float(right - center)
+    return filterbank
+
+
+@lru_cache(maxsize=None)
+def _dct_matrix(num_bands=NUM_MEL_BANDS, num_cepstra=NUM_CEPSTRA):
+    n = np.arange(num_bands)
+    k = np.arange(num_cepstra)[:, None]
+    return np.cos(np.pi * k * (2 * n + 1) / (2.0 * num_bands)).astype(np.float32)
+
+
+def mfcc_features(samples, sample_rate=TARGET_SAMPLE_RATE):
+    """
+    Compute mean-normalized MFCC frames for float32 mono samples.
+
+    Returns:
+        np.ndarray: Array of shape (num_frames, NUM_CEPSTRA - 1); the energy coefficient is dropped.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if len(samples) < WINDOW_SAMPLES:
+        return np.zeros((0, NUM_CEPSTRA - 1), dtype=np.float32)
+
+    # Pre-emphasis, then slice overlapping windows without copying
+    emphasized = np.append(samples[0], samples[1:] - 0.97 * samples[:-1])
+    num_frames = 1 + (len(emphasized) - WINDOW_SAMPLES) // HOP_SAMPLES
+    frames = np.lib.stride_tricks.as_strided(
+        emphasized,
+        shape=(num_frames, WINDOW_SAMPLES),
+        strides=(emphasized.strides[0] * HOP_SAMPLES, emphasized.strides[0])
+    ) * np.hamming(WINDOW_SAMPLES).astype(np.float32)
+
+    power = np.abs(np.fft.rfft(frames, n=512)) ** 2 / 512.0
+    log_mel = np.log(power @ _mel_filterbank(sample_rate).T + 1e-10)
+    cepstra = log_mel @ _dct_matrix().T
+    cepstra = cepstra[:, 1:]
+    return cepstra - cepstra.mean(axis=0)
+
+
+def _trim_silence(samples, relative_threshold=0.1):
+    """Drop leading/trailing hops quieter than a fraction of the loudest hop."""
+    usable = len(samples) - len(samples) % HOP_SAMPLES
+    if not usable:
+        return samples
+    energy = np.sqrt(np.mean(samples[:usable].reshape(-1, HOP_SAMPLES) ** 2, axis=1))
+    loud = np.nonzero(energy >= relative_threshold * energy.max())[0]
+    if not len(loud):
+        return samples
+    return samples[loud[0] * HOP_SAMPLES:(loud[-1] + 1) * HOP_SAMPLES]
+
+
+def _cosine_distances(template, window):
+    template_norm = template / (np.linalg.norm(template, axis=1, keepdims=True) + 1e-8)
+    window_norm = window / (np.linalg.norm(window, axis=1, keepdims=True) + 1e-8)
+    return 1.0 - template_norm @ window_norm.T
+
+
+def subsequence_dtw(template, window):
+    """
+    Best alignment cost of the template against any stretch of the window.
+
+    Uses slope-constrained steps (1,1), (1,2) and (2,1) so each template row depends only
+    on the two rows before it, which keeps every row a single vectorized NumPy operation.
+
+    Returns:
+        float: Average per-frame cosine distance of the best match (0 is identical).
+    """
+    if len(template) < 2 or len(window) < 2:
+        return float('inf')
+
+    cost = _cosine_distances(template, window)
+    infinity = np.inf
+    previous2 = np.full(len(window), infinity)
+    previous1 = cost[0].copy()  # The match may start at any window frame
+    for row in range(1, len(template)):
+        best = np.full(len(window), infinity)
+        best[1:] = previous1[:-1]                                      # step (1, 1)
+        best[2:] = np.minimum(best[2:], previous1[:-2])                # step (1, 2)
+        best[1:] = np.minimum(best[1:], previous2[:-1])                # step (2, 1)
+        current = cost[row] + best
+        previous2, previous1 = previous1, current
+    return float(previous1.min() / len(template))
+
+
+class WakeWordDetector:
+    """
+    Keyword spotter that matches MFCC frames against enrolled recordings of the wake word.
+
+    Matching costs a few milliseconds per check, so sleep mode can run it on every short
+    hop of microphone audio and only escalate to full transcription when it fires.
+    """
+
+    def __init__(self, template_dir=None, threshold=None):
+        self.template_dir = template_dir or Config.WAKE_WORD_TEMPLATE_DIR
+        self.threshold = threshold if threshold is not None else Config.WAKE_WORD_MATCH_THRESHOLD
+        self.templates = []
+        self.load_templates()
+
+    @property
+    def has_templates(self):
+        return bool(self.templates)
+
+    def load_templates(self):
+        """Load every enrolled WAV in the template directory."""
+        self.templates = []
+        for path in sorted(glob.glob(os.path.join(self.template_dir, "*.wav"))):
+            try:
+                # Templates must cover only the spoken keyword, not the silence around it
+                features = mfcc_features(_trim_silence(load_audio(path).to_float32()))
+                if len(features) >= 2:
+                    self.templates.append(features)
+            except Exception as e:
+                logging.warning(f"⚠️ Could not load wake word template {path}: {e}")
+        if self.templates:
+            logging.info(f"👂 Loaded {len(self.templates)} wake word templates from {self.template_dir}")
+        return len(self.templates)
+
+    @property
+    def window_seconds(self):
+        """Audio needed to cover the longest template with some slack for slower speech."""
+        longest = max((len(template) for template in self.templates), default=100)
+        return 1.5 * longest * HOP_SAMPLES / float(TARGET_SAMPLE_RATE)
+
+    def score(self, audio):
+        """
+        Return the best (lowest) match distance of the audio against the enrolled templates.
+
+        Args:
+            audio (AudioBuffer | np.ndarray): Audio to check; arrays are 16 kHz float32 samples.
+        """
+        samples = audio.to_float32() if isinstance(audio, AudioBuffer) else audio
+        features = mfcc_features(samples)
+        return min((subsequence_dtw(template, features) for template in self.templates), default=float('inf'))
+
+    def detect(self, audio):
+        return self.score(audio) <= self.threshold
+
+    def listen(self, stream, check_interval=0.15, timeout=None):
+        """
+        Watch a MicrophoneStream until the wake word is spoken.
+
+        Matching starts once the energy trigger fires and re-runs every check_interval
+        seconds on the most recent window, so it can fire before the phrase has ended.
+
+        Args:
+            stream (MicrophoneStream): The always-open microphone stream.
+            check_interval (float): Seconds of new audio between match attempts.
+            timeout (float): Give up after this many seconds (None waits forever).
+
+        Returns:
+            AudioBuffer: Audio from the start of the phrase to the detection point, or None on timeout.
+        """
+        hop_frames = max(1, int(check_interval / stream.frame_duration))
+        window_frames = int(self.window_seconds / stream.frame_duration)
+        silence_frames = int(getattr(Config, 'WAKE_WORD_PAUSE_THRESHOLD', 0.8) / stream.frame_duration)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        speech_start = None
+        last_voiced = None
+        for index, _, rms in stream.iter_frames(timeout=timeout):
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            if rms > stream.energy_threshold:
+                if speech_start is None:
+                    speech_start = index
+                last_voiced = index
+            if speech_start is None:
+                continue
+            if index - last_voiced > silence_frames:
+                speech_start = None  # Phrase ended without a match
+                continue
+            if (index - speech_start) % hop_frames:
+                continue
+
+            window_start = max(speech_start - stream.pre_roll_frames, index - window_frames)
+            candidate = stream.audio_between(window_start, index)
+            distance = self.score(candidate)
+            logging.debug(f"Wake word match distance: {distance:.3f}")
+            if distance <= self.threshold:
+                logging.info(f"🎯 Wake word matched (distance {distance:.3f})")
+                return candidate
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_wake_word_detector():
+    """
+    Return the shared wake word detector.
+    """
+    return WakeWordDetector()
+
+
+def enroll_wake_word(samples=3):
+    """
+    Record the wake word a few times and save the recordings as matching templates.
+    """
+    from voice_assistant.audio import record_audio
+
+    os.makedirs(Config.WAKE_WORD_TEMPLATE_DIR, exist_ok=True)
+    for sample in range(samples):
+        logging.info(f"🎤 Say '{Config.WAKE_WORD}' ({sample + 1}/{samples})")
+        audio = record_audio(wake_word_mode=True, use_fallback=False)
+        audio.save(os.path.join(Config.WAKE_WORD_TEMPLATE_DIR, f"template_{int(time.time() * 1000)}.wav"))
+    get_wake_word_detector().load_templates()
+
+
+if __name__ == "__main__":
+    enroll_wake_word()
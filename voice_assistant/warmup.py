@@ -0,0 +1,187 @@
+# voice_assistant/warmup.py
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from voice_assistant.audio_buffer import TARGET_SAMPLE_RATE
+from voice_assistant.config import Config
+
+# Readiness of one component after warm-up; detail says what was loaded or what went wrong
+ComponentStatus = namedtuple("ComponentStatus", ["name", "ready", "seconds", "detail"])
+
+# Cloud providers whose only warm-up is building the shared client (importing the SDK)
+CLOUD_PROVIDERS = ('openai', 'groq', 'deepgram', 'elevenlabs', 'cartesia')
+
+# Seconds to wait for the microphone's first frame
+MICROPHONE_READY_TIMEOUT = 5.0
+
+
+def _warm_transcription():
+    model = Config.TRANSCRIPTION_MODEL
+    if model == 'faster-whisper':
+        from voice_assistant.transcription import FASTER_WHISPER_DECODE_OPTIONS, get_whisper_model
+
+        whisper = get_whisper_model()
+        # The first decode allocates the model's buffers - pay for it now, on silence
+        segments, _ = whisper.transcribe(np.zeros(TARGET_SAMPLE_RATE, dtype=np.float32), **FASTER_WHISPER_DECODE_OPTIONS)
+        list(segments)
+        return f"faster-whisper {Config.FASTER_WHISPER_MODEL_SIZE} loaded"
+    if model == 'server':
+        from voice_assistant.clients import get_client
+
+        response = get_client('http').get(f"{Config.TRANSCRIPTION_SERVER_URL}/health", timeout=5)
+        response.raise_for_status()
+        return f"server at {Config.TRANSCRIPTION_SERVER_URL} is up"
+    return _warm_cloud_client(model)
+
+
+def _warm_llm():
+    model = Config.RESPONSE_MODEL
+    if model == 'ollama':
+        from voice_assistant.response_generation import warm_up_ollama
+
+        if not warm_up_ollama():
+            raise RuntimeError(f"Ollama model {Config.OLLAMA_LLM} could not be loaded")
+        return f"ollama {Config.OLLAMA_LLM} loaded"
+    return _warm_cloud_client(model)
+
+
+def _warm_tts(phrases):
+    from voice_assistant.tts_cache import prewarm_tts_cache
+
+    model = Config.TTS_MODEL
+    if model == 'piper':
+        from voice_assistant.piper_tts import get_piper_engine
+
+        try:
+            engine = get_piper_engine()
+        except FileNotFoundError as e:
+            detail = f"espeak fallback ({e})"
+        else:
+            engine.synthesize("Ready.")  # Dummy synthesis so the first real sentence is warm
+            detail = "piper voice loaded"
+    else:
+        detail = _warm_cloud_client(model)
+
+    # Synthesize the canned phrases once so greetings and fallbacks play instantly
+    prewarm_tts_cache(phrases)
+    return f"{detail}, {len(phrases)} phrases cached" if phrases else detail
+
+
+def _warm_cloud_client(provider):
+    if provider not in CLOUD_PROVIDERS:
+        return f"{provider} needs no warm-up"
+    from voice_assistant.clients import get_client
+
+    get_client(provider)
+    return f"{provider} client ready"
+
+
+def _warm_audio_output():
+    from voice_assistant.audio import open_audio_output
+
+    return f"{open_audio_output()} output open"
+
+
+def _warm_microphone():
+    if not Config.KEEP_MICROPHONE_OPEN:
+        return "opened per recording"
+    from voice_assistant.microphone import get_microphone_stream
+
+    if not get_microphone_stream().wait_until_ready(timeout=MICROPHONE_READY_TIMEOUT):
+        raise RuntimeError(f"no audio within {MICROPHONE_READY_TIMEOUT:.0f}s")
+    return "microphone stream open"
+
+
+def _warm_wake_word():
+    from voice_assistant.wake_word import get_wake_word_detector, mfcc_features
+
+    detector = get_wake_word_detector()
+    mfcc_features(np.zeros(TARGET_SAMPLE_RATE, dtype=np.float32))  # Builds the cached filterbank
+    if not detector.has_templates:
+        return "no templates - using transcription"
+    return "templates loaded"
+
+
+def _run_component(name, warm, statuses):
+    start_time = time.monotonic()
+    try:
+        detail = warm()
+        ready = True
+    except Exception as e:
+        detail = str(e) or type(e).__name__
+        ready = False
+    statuses[name] = ComponentStatus(name, ready, time.monotonic() - start_time, detail)
+
+
+def warm_up(phrases=(), timeout=None):
+    """
+    Load models, open audio devices and start engines concurrently before the first conversation.
+
+    Whisper, the LLM, the TTS engine and the audio devices each take seconds to load, mostly
+    waiting on disk, the Ollama server or a device driver, so running them side by side makes
+    startup about as long as the slowest component rather than the sum of all of them.
+
+    Args:
+        phrases (list): Canned phrases to pre-synthesize into the TTS cache.
+        timeout (float): Seconds to wait before giving up on slow components
+            (they keep loading in the background). Defaults to Config.WARM_UP_TIMEOUT.
+
+    Returns:
+        dict: Component name -> ComponentStatus.
+    """
+    timeout = Config.WARM_UP_TIMEOUT if timeout is None else timeout
+    components = {
+        "transcription": _warm_transcription,
+        "llm": _warm_llm,
+        "tts": lambda: _warm_tts(list(phrases)),
+        "audio_output": _warm_audio_output,
+        "microphone": _warm_microphone,
+        "wake_word": _warm_wake_word,
+    }
+
+    logging.info(f"🔥 Warming up {', '.join(components)}...")
+    start_time = time.monotonic()
+    statuses = {}
+    threads = []
+    for name, warm in components.items():
+        # Daemon threads, so a component stuck past the timeout can't block shutdown
+        thread = threading.Thread(target=_run_component, args=(name, warm, statuses),
+                                  name=f"warm-up-{name}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join(None if timeout is None else max(0.0, start_time + timeout - time.monotonic()))
+
+    report = {}
+    for name in components:
+        report[name] = statuses.get(name) or ComponentStatus(name, False, time.monotonic() - start_time, "still loading")
+    log_readiness(report, time.monotonic() - start_time)
+    return report
+
+
+def log_readiness(report, elapsed):
+    for status in report.values():
+        icon = "✅" if status.ready else "⚠️"
+        logging.info(f"{icon} {status.name:<13} {status.seconds:6.2f}s  {status.detail}")
+    ready = sum(status.ready for status in report.values())
+    logging.info(f"🔥 Warm-up finished in {elapsed:.2f}s ({ready}/{len(report)} components ready)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm up the configured components and report their readiness")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds to wait for slow components")
+    args = parser.parse_args(argv)
+    report = warm_up(timeout=args.timeout)
+    return 0 if all(status.ready for status in report.values()) else 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())